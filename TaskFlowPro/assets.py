@@ -0,0 +1,21 @@
+"""
+模板标签：{% bundle 'js/bundle.min.js' %}
+
+STATIC_USE_BUNDLES 开启时（生产环境）输出合并后的单个文件，
+否则逐个输出 STATIC_BUNDLES 中的源文件，便于开发调试。
+"""
+
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+register = template.Library()
+
+
+@register.simple_tag
+def bundle(name):
+    files = [name] if settings.STATIC_USE_BUNDLES else settings.STATIC_BUNDLES[name]
+    if name.endswith('.css'):
+        return format_html_join('\n    ', '<link href="{}" rel="stylesheet">', ((static(f),) for f in files))
+    return format_html_join('\n    ', '<script src="{}"></script>', ((static(f),) for f in files))
@@ -0,0 +1,34 @@
+"""
+异步视图辅助（ASGI 部署时使用，见 gunicorn.conf.py 的 asgi 模式）
+
+Django 4.2 的 login_required 与 request.user 都是同步的，在异步视图里直接访问
+会触发 SynchronousOnlyOperation。这里在线程中一次性加载当前用户及其 profile，
+之后视图中访问 request.user / request.user.profile 不再查询数据库。
+"""
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+
+
+def _load_user(request):
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    user.profile
+    return user
+
+
+def async_login_required(view_func):
+    """异步视图版本的 login_required"""
+
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        user = await sync_to_async(_load_user)(request)
+        if user is None:
+            return redirect_to_login(request.get_full_path())
+        request.user = user
+        return await view_func(request, *args, **kwargs)
+
+    return wrapper
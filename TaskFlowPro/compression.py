@@ -0,0 +1,132 @@
+"""
+动态页面的响应压缩（RESPONSE_COMPRESSION 开启时启用）
+
+客户端支持时优先使用 brotli（需安装 Brotli），否则使用 gzip。
+流式响应每发送一块都会 flush 压缩器，保证压缩后仍能尽早到达浏览器。
+静态文件由 WhiteNoise / nginx 发送预压缩版本，不经过这里。
+"""
+
+import gzip
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('text/html', 'text/plain', 'application/json')
+MIN_SIZE = 200
+GZIP_LEVEL = 6
+# 动态内容每次请求都要压缩，用较低的质量换取速度
+BROTLI_QUALITY = 5
+
+
+def accepted_encodings(request):
+    encodings = set()
+    for part in request.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        encodings.add(coding.strip().lower())
+    return encodings
+
+
+def gzip_compressor():
+    """返回 (压缩一块并 flush, 结束压缩) 两个函数"""
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+def brotli_compressor():
+    compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=BROTLI_QUALITY)
+    return lambda chunk: compressor.process(chunk) + compressor.flush(), compressor.finish
+
+
+def compress_stream(new_compressor, chunks):
+    compress, finish = new_compressor()
+    for chunk in chunks:
+        data = compress(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+async def acompress_stream(new_compressor, chunks):
+    """异步流式响应（ASGI 下 streaming_content 为异步迭代器）"""
+    compress, finish = new_compressor()
+    async for chunk in chunks:
+        data = compress(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+ENCODERS = {
+    'br': (lambda content: brotli.compress(content, mode=brotli.MODE_TEXT, quality=BROTLI_QUALITY), brotli_compressor),
+    'gzip': (lambda content: gzip.compress(content, GZIP_LEVEL, mtime=0), gzip_compressor),
+}
+
+
+class CompressionMiddleware:
+    """同时支持 WSGI 与 ASGI，压缩本身不做 I/O，两条路径共用 compress_response"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.RESPONSE_COMPRESSION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.compress_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress_response(request, await self.get_response(request))
+
+    def compress_response(self, request, response):
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if (
+            content_type not in COMPRESSIBLE_TYPES
+            or response.status_code in (204, 304)
+            or response.has_header('Content-Encoding')
+            or isinstance(response, FileResponse)
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = accepted_encodings(request)
+        encoding = next((e for e in ('br', 'gzip') if e in accepted and (e != 'br' or brotli)), None)
+        if encoding is None:
+            return response
+        compress, new_compressor = ENCODERS[encoding]
+
+        if response.streaming:
+            stream = acompress_stream if response.is_async else compress_stream
+            response.streaming_content = stream(new_compressor, response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            if len(response.content) < MIN_SIZE:
+                return response
+            compressed = compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # 压缩后的表示与原始字节不同，强 ETag 改为弱 ETag
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,178 @@
+"""
+worker 内存诊断
+
+用 tracemalloc 记录当前进程的内存分配，报告占用最多的分配位置以及两次快照之间的增长，
+同时给出进程 RSS 与各代 GC 统计。每个 gunicorn worker 是独立进程，报告只针对处理该请求
+（或收到信号）的那个 worker，结果中带有 pid 便于区分。
+
+两种使用方式：
+- 超级用户访问 /diagnostics/memory/：GET 查看报告，POST action=start / snapshot / stop
+- 向 worker 进程（不是 gunicorn 主进程）发送 SIGUSR2：第一次开启跟踪，之后每次拍快照并写日志
+"""
+
+import gc
+import json
+import logging
+import os
+import resource
+import signal
+import threading
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth.decorators import user_passes_test
+from django.http import JsonResponse
+
+logger = logging.getLogger('django')
+
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+    tracemalloc.Filter(False, __file__),
+)
+GROUP_BY = ('lineno', 'filename', 'traceback')
+
+_lock = threading.Lock()
+_snapshots = {'baseline': None, 'previous': None, 'latest': None}
+
+
+def start(frames=None):
+    """开启跟踪，已开启时不做任何事"""
+    with _lock:
+        if tracemalloc.is_tracing():
+            return False
+        tracemalloc.start(frames or settings.MEMORY_DIAGNOSTICS_FRAMES)
+        _snapshots.update(baseline=None, previous=None, latest=None)
+        return True
+
+
+def stop():
+    with _lock:
+        tracemalloc.stop()
+        _snapshots.update(baseline=None, previous=None, latest=None)
+
+
+def take_snapshot():
+    """拍一张快照，第一张作为基线"""
+    with _lock:
+        if not tracemalloc.is_tracing():
+            return None
+        snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        _snapshots['previous'] = _snapshots['latest']
+        _snapshots['latest'] = snapshot
+        if _snapshots['baseline'] is None:
+            _snapshots['baseline'] = snapshot
+        return snapshot
+
+
+def _process_memory():
+    """当前与峰值 RSS（KB），没有 /proc 时只能取峰值"""
+    memory = {'rss_kb': None, 'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    memory['rss_kb'] = int(line.split()[1])
+                elif line.startswith('VmHWM:'):
+                    memory['peak_rss_kb'] = int(line.split()[1])
+    except OSError:
+        pass
+    return memory
+
+
+def _gc_stats():
+    return {
+        'counts': gc.get_count(),
+        'thresholds': gc.get_threshold(),
+        'generations': gc.get_stats(),
+        'frozen': gc.get_freeze_count(),
+        'garbage': len(gc.garbage),
+    }
+
+
+def _format_stat(stat, group_by):
+    entry = {
+        'location': [f'{frame.filename}:{frame.lineno}' for frame in stat.traceback] if group_by == 'traceback'
+        else f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}' if group_by == 'lineno'
+        else stat.traceback[0].filename,
+        'size_kb': round(stat.size / 1024, 1),
+        'count': stat.count,
+    }
+    if hasattr(stat, 'size_diff'):
+        entry['size_diff_kb'] = round(stat.size_diff / 1024, 1)
+        entry['count_diff'] = stat.count_diff
+    return entry
+
+
+def report(limit=20, group_by='lineno', compare_to='previous'):
+    """
+    生成诊断报告
+
+    compare_to 为 previous 时比较最近两张快照，为 baseline 时比较最新快照与开启跟踪后的第一张。
+    """
+    result = {
+        'pid': os.getpid(),
+        'memory': _process_memory(),
+        'gc': _gc_stats(),
+        'tracing': tracemalloc.is_tracing(),
+    }
+    if not result['tracing']:
+        return result
+    current, peak = tracemalloc.get_traced_memory()
+    result['traced_kb'] = {'current': round(current / 1024, 1), 'peak': round(peak / 1024, 1)}
+    latest, older = _snapshots['latest'], _snapshots[compare_to]
+    if latest is None:
+        return result
+    result['top'] = [_format_stat(stat, group_by) for stat in latest.statistics(group_by)[:limit]]
+    if older is not None and older is not latest:
+        result['growth'] = [
+            _format_stat(stat, group_by) for stat in latest.compare_to(older, group_by)[:limit]
+        ]
+    return result
+
+
+def _handle_signal():
+    if start():
+        logger.warning('Memory tracing started in worker %s', os.getpid())
+        take_snapshot()
+        return
+    take_snapshot()
+    logger.warning('Memory report for worker %s: %s', os.getpid(), json.dumps(report(), ensure_ascii=False))
+
+
+def install_signal_handler(signum=signal.SIGUSR2):
+    """
+    在 worker 中注册信号处理（gunicorn 主进程的 SIGUSR2 用于热升级，只能发给 worker）
+
+    快照与写日志放到线程中执行，信号处理函数本身不获取任何锁。
+    """
+    signal.signal(signum, lambda *args: threading.Thread(target=_handle_signal, daemon=True).start())
+
+
+@user_passes_test(lambda user: user.is_superuser)
+def memory_diagnostics(request):
+    """内存诊断接口（仅超级用户）"""
+    if request.method == 'POST':
+        action = request.POST.get('action')
+        if action == 'start':
+            start()
+            take_snapshot()
+        elif action == 'snapshot':
+            if take_snapshot() is None:
+                return JsonResponse({'success': False, 'message': '尚未开启内存跟踪'})
+        elif action == 'stop':
+            stop()
+        else:
+            return JsonResponse({'success': False, 'message': '无效的操作'})
+
+    group_by = request.GET.get('group_by', 'lineno')
+    if group_by not in GROUP_BY:
+        group_by = 'lineno'
+    compare_to = 'baseline' if request.GET.get('compare_to') == 'baseline' else 'previous'
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 200)
+    except ValueError:
+        limit = 20
+    return JsonResponse({'success': True, **report(limit, group_by, compare_to)})
@@ -0,0 +1,226 @@
+"""
+结构化请求日志
+
+- RequestLogMiddleware：为每个请求生成 request id，统计耗时与 SQL 次数 / 耗时，
+  请求结束时写一条 taskflowpro.request 日志（超过 LOG_SLOW_REQUEST_MS 记为 WARNING）
+- JsonFormatter：每条日志输出为一行 JSON，自动带上当前请求的 request id、用户与视图名
+- QueueFileHandler：在调用线程中格式化后放入队列，由后台线程写文件，请求线程不做磁盘 I/O
+- SamplingFilter：按 logger 对 WARNING 以下的高频日志抽样
+"""
+
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger('taskflowpro.request')
+
+_current_request = contextvars.ContextVar('current_request', default=None)
+# 当前请求的 SQL 统计；ASGI 下查询在 sync_to_async 的线程中执行，上下文变量会随之传递
+_sql_stats = contextvars.ContextVar('sql_stats', default=None)
+
+# LogRecord 自带的属性，其余属性视为通过 extra 传入的字段
+RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def current_request_context(request=None):
+    """当前请求的 request id、视图名与用户（用户只在请求已经加载过时才有）"""
+    request = request or _current_request.get()
+    if getattr(request, 'request_id', None) is None:
+        return {}
+    context = {'request_id': request.request_id}
+    resolver_match = getattr(request, 'resolver_match', None)
+    if resolver_match is not None:
+        context['view'] = resolver_match.view_name
+    # 不主动加载用户，避免为日志多查询会话与用户表
+    user = getattr(request, '_cached_user', None)
+    if user is not None and user.is_authenticated:
+        context['user_id'] = user.pk
+    return context
+
+
+class JsonFormatter(logging.Formatter):
+    """一条日志一行 JSON"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f'.{int(record.msecs):03d}',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'pid': record.process,
+        }
+        # django.request 的 4xx/5xx 日志在中间件返回之后才写，通过 extra 中的 request 取得上下文
+        entry.update(current_request_context(getattr(record, 'request', None)))
+        entry.update({key: value for key, value in vars(record).items() if key not in RESERVED_ATTRS})
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    按 logger 名称抽样，rates 如 {'taskflowpro.request': 0.1}，子 logger 继承父 logger 的比例
+
+    WARNING 及以上的日志始终保留；保留下来的抽样日志带有 sample_rate 字段，便于统计时换算。
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = dict(rates or {})
+
+    def _rate(self, name):
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition('.')[0]
+        return 1
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1:
+            return True
+        if random.random() >= rate:
+            return False
+        record.sample_rate = rate
+        return True
+
+
+class QueueFileHandler(QueueHandler):
+    """
+    经队列写文件的 handler
+
+    日志在调用线程中格式化（请求上下文只在该线程可见），写文件由 QueueListener 的后台线程完成。
+    gunicorn 预加载时 handler 在主进程中创建，fork 后后台线程不会被继承，
+    因此每个进程在第一次写日志时启动自己的 listener。
+    """
+
+    def __init__(self, filename, encoding='utf-8'):
+        super().__init__(queue.SimpleQueue())
+        self.target = WatchedFileHandler(filename, encoding=encoding, delay=True)
+        self._pid = None
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._listener_lock:
+            if self._pid == os.getpid():
+                return
+            self.queue = queue.SimpleQueue()
+            self._listener = QueueListener(self.queue, self.target)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        super().enqueue(record)
+
+    def close(self):
+        # 进程退出时由 logging.shutdown 调用，写完队列中剩余的日志
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+            self._pid = None
+        self.target.close()
+        super().close()
+
+
+def count_queries(execute, query, params, many, query_context):
+    """常驻在每个数据库连接上的 execute wrapper，只在请求处理中统计"""
+    sql = _sql_stats.get()
+    if sql is None:
+        return execute(query, params, many, query_context)
+    started = time.perf_counter()
+    try:
+        return execute(query, params, many, query_context)
+    finally:
+        sql['count'] += 1
+        sql['seconds'] += time.perf_counter() - started
+
+
+def install_query_counter(connection):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+@receiver(connection_created)
+def _connection_created(sender, connection, **kwargs):
+    # 连接按线程创建，ASGI 下执行查询的线程不是处理请求的事件循环线程，
+    # 因此在每个连接建立时安装，而不是在中间件里临时包裹当前线程的连接
+    install_query_counter(connection)
+
+
+class RequestLogMiddleware:
+    """请求日志：request id、用户、视图名、耗时与 SQL 统计（同时支持 WSGI 与 ASGI）"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # 本模块导入前已经建立的连接收不到 connection_created
+        for connection in connections.all(initialized_only=True):
+            install_query_counter(connection)
+
+    def _start(self, request):
+        request_id = request.headers.get('X-Request-ID', '')
+        if not (0 < len(request_id) <= 64 and request_id.replace('-', '').isalnum()):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+        sql = {'count': 0, 'seconds': 0.0}
+        return sql, (_current_request.set(request), _sql_stats.set(sql)), time.perf_counter()
+
+    def _finish(self, request, response, sql, started):
+        duration_ms = (time.perf_counter() - started) * 1000
+        level = logging.WARNING if duration_ms >= settings.LOG_SLOW_REQUEST_MS else logging.INFO
+        logger.log(level, '%s %s %s', request.method, request.path, response.status_code, extra={
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 1),
+            'sql_count': sql['count'],
+            'sql_ms': round(sql['seconds'] * 1000, 1),
+        })
+        response['X-Request-ID'] = request.request_id
+        return response
+
+    def _reset(self, tokens):
+        request_token, sql_token = tokens
+        _sql_stats.reset(sql_token)
+        _current_request.reset(request_token)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        sql, tokens, started = self._start(request)
+        try:
+            return self._finish(request, self.get_response(request), sql, started)
+        finally:
+            self._reset(tokens)
+
+    async def __acall__(self, request):
+        sql, tokens, started = self._start(request)
+        try:
+            return self._finish(request, await self.get_response(request), sql, started)
+        finally:
+            self._reset(tokens)
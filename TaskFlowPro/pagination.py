@@ -0,0 +1,53 @@
+"""
+大表分页
+
+管理后台的列表每次翻页都要 COUNT(*) 计算总页数，百万行的表在 PostgreSQL 上需要扫描整个索引。
+没有筛选条件时改用 pg_class.reltuples（ANALYZE 维护的估算行数），有筛选条件或行数较少时仍精确计数。
+默认管理器自带的条件（如任务与项目排除已标记删除的行）不算筛选条件：标记删除的行很快会被
+后台清理，估算值本来就是近似的。
+"""
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def _where_sql(queryset, using):
+    return queryset.query.get_compiler(using).compile(queryset.query.where)
+
+
+def is_unfiltered(queryset):
+    """查询条件与模型默认管理器的基础查询相同（注解与排序不影响）"""
+    if not queryset.query.where:
+        return True
+    # 基础条件中的子查询每次生成都是新对象，按编译后的 SQL 比较
+    try:
+        return _where_sql(queryset, queryset.db) == _where_sql(queryset.model._default_manager.all(), queryset.db)
+    except EmptyResultSet:
+        return False
+
+
+def estimated_row_count(model, using):
+    """PostgreSQL 统计信息中的表行数，其他数据库或尚未 ANALYZE 时返回 None"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """未筛选的大表使用估算总数，最后几页的页码可能不准确"""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if is_unfiltered(queryset):
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_MIN:
+                return estimate
+        return super().count
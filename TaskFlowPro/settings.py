@@ -42,10 +42,15 @@ INSTALLED_APPS = [
     'projects',
     'tasks',
     'comments',
+    'search',
+    'jobs',
 ]
 
 MIDDLEWARE = [
+    'TaskFlowPro.log.RequestLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'TaskFlowPro.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -68,11 +73,17 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'libraries': {
+                'assets': 'TaskFlowPro.assets',
+            },
         },
     },
 ]
 
 WSGI_APPLICATION = 'TaskFlowPro.wsgi.application'
+ASGI_APPLICATION = 'TaskFlowPro.asgi.application'
+# AJAX 接口使用异步视图（gunicorn 以 asgi 模式运行时自动开启）
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', '0') == '1'
 
 
 # Database
@@ -125,10 +136,46 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# 由 {% bundle %} 输出；生产环境在 collectstatic 时合并压缩为单个文件
+STATIC_BUNDLES = {
+    'css/bundle.min.css': [
+        'vendor/bootstrap/css/bootstrap.min.css',
+        'css/style.css',
+    ],
+    'js/bundle.min.js': [
+        'vendor/bootstrap/js/popper.min.js',
+        'vendor/bootstrap/js/bootstrap.min.js',
+        'vendor/jquery/jquery.min.js',
+        'vendor/jquery-ui/jquery-ui.min.js',
+        'js/main.js',
+        'js/autocomplete.js',
+    ],
+}
+STATIC_USE_BUNDLES = False
+
+# Dynamic responses
+# 动态页面 gzip / brotli 压缩（前面有 nginx 压缩时保持关闭）
+RESPONSE_COMPRESSION = os.getenv('RESPONSE_COMPRESSION', '0') == '1'
+# 任务与项目列表页流式渲染
+STREAM_LIST_PAGES = os.getenv('STREAM_LIST_PAGES', '0') == '1'
+STREAM_LIST_CHUNK_SIZE = int(os.getenv('STREAM_LIST_CHUNK_SIZE', '100'))
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# 头像缩略图尺寸（像素，按 2 倍屏生成）
+AVATAR_THUMBNAIL_SIZES = {'small': 80, 'large': 300}
+
+# 任务附件（不在 MEDIA_ROOT 下，只能通过权限检查后下载）
+ATTACHMENT_ROOT = BASE_DIR / 'private' / 'attachments'
+ATTACHMENT_MAX_SIZE = int(os.getenv('ATTACHMENT_MAX_SIZE', str(100 * 1024 * 1024)))
+ATTACHMENT_CHUNK_SIZE = int(os.getenv('ATTACHMENT_CHUNK_SIZE', str(4 * 1024 * 1024)))
+ATTACHMENT_STALE_HOURS = int(os.getenv('ATTACHMENT_STALE_HOURS', '24'))
+# 开启后下载由 nginx 通过 X-Accel-Redirect 发送；未部署 nginx 时关闭，由 Django 返回文件
+ATTACHMENT_X_ACCEL_REDIRECT = os.getenv('ATTACHMENT_X_ACCEL_REDIRECT', '0') == '1'
+ATTACHMENT_ACCEL_PREFIX = '/protected/attachments/'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -157,3 +204,74 @@ DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'no-reply@taskflowpro.local
 PASSWORD_RESET_CODE_EXPIRE_MINUTES = int(os.getenv('PASSWORD_RESET_CODE_EXPIRE_MINUTES', '10'))
 PASSWORD_RESET_RESEND_INTERVAL_SECONDS = int(os.getenv('PASSWORD_RESET_RESEND_INTERVAL_SECONDS', '60'))
 PASSWORD_RESET_MAX_PER_HOUR = int(os.getenv('PASSWORD_RESET_MAX_PER_HOUR', '5'))
+# 过期验证码保留的小时数（频率限制需要最近一小时的记录）
+PASSWORD_RESET_CODE_RETENTION_HOURS = int(os.getenv('PASSWORD_RESET_CODE_RETENTION_HOURS', '24'))
+
+# Task due dates
+TASK_DUE_SOON_DAYS = int(os.getenv('TASK_DUE_SOON_DAYS', '3'))
+TASK_BOARD_PAGE_SIZE = int(os.getenv('TASK_BOARD_PAGE_SIZE', '20'))
+TASK_BULK_UPDATE_MAX = int(os.getenv('TASK_BULK_UPDATE_MAX', '500'))
+# 任务列表筛选栏的分面计数
+TASK_FACET_CACHE_SECONDS = int(os.getenv('TASK_FACET_CACHE_SECONDS', '30'))
+TASK_FACET_TOP = int(os.getenv('TASK_FACET_TOP', '5'))
+
+# Comment threads
+COMMENT_PAGE_SIZE = int(os.getenv('COMMENT_PAGE_SIZE', '20'))
+COMMENT_REPLY_PAGE_SIZE = int(os.getenv('COMMENT_REPLY_PAGE_SIZE', '10'))
+COMMENT_REPLY_PREVIEW_DEPTH = int(os.getenv('COMMENT_REPLY_PREVIEW_DEPTH', '2'))
+COMMENT_REPLY_PREVIEW_COUNT = int(os.getenv('COMMENT_REPLY_PREVIEW_COUNT', '3'))
+COMMENT_THREAD_CACHE_SECONDS = int(os.getenv('COMMENT_THREAD_CACHE_SECONDS', '600'))
+
+# Cache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+DASHBOARD_STATS_CACHE_SECONDS = int(os.getenv('DASHBOARD_STATS_CACHE_SECONDS', '300'))
+
+# Background jobs
+# 开发环境默认直接在请求中执行，无需启动 worker
+JOBS_EAGER = os.getenv('JOBS_EAGER', '1' if DEBUG else '0') == '1'
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '5'))
+JOB_RETRY_BACKOFF_SECONDS = int(os.getenv('JOB_RETRY_BACKOFF_SECONDS', '10'))
+JOB_RETRY_BACKOFF_MAX_SECONDS = int(os.getenv('JOB_RETRY_BACKOFF_MAX_SECONDS', '3600'))
+JOB_LOCK_TIMEOUT_SECONDS = int(os.getenv('JOB_LOCK_TIMEOUT_SECONDS', '600'))
+JOB_WORKER_CONCURRENCY = int(os.getenv('JOB_WORKER_CONCURRENCY', '2'))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv('JOB_POLL_INTERVAL_SECONDS', '1'))
+# 已结束任务记录的保留天数（purge_jobs 定时清理），已放弃的任务保留更久供排查
+JOB_RETENTION_DAYS = int(os.getenv('JOB_RETENTION_DAYS', '7'))
+JOB_DEAD_RETENTION_DAYS = int(os.getenv('JOB_DEAD_RETENTION_DAYS', '30'))
+
+# Scheduled jobs（由 runscheduler 执行，cron 按 TIME_ZONE 本地时间计算）
+SCHEDULER_TICK_SECONDS = int(os.getenv('SCHEDULER_TICK_SECONDS', '30'))
+SCHEDULER_LOCK_SECONDS = int(os.getenv('SCHEDULER_LOCK_SECONDS', '3600'))
+SCHEDULED_JOBS = {
+    'purge_password_reset_codes': {'command': 'purge_password_reset_codes', 'cron': '30 3 * * *'},
+    'clearsessions': {'command': 'clearsessions', 'cron': '0 4 * * *'},
+    'rebuild_comment_counters': {'command': 'rebuild_comment_counters', 'cron': '30 4 * * 0'},
+    'send_overdue_digest': {'command': 'send_overdue_digest', 'cron': '0 * * * *'},
+    'purge_stale_attachments': {'command': 'purge_stale_attachments', 'cron': '0 5 * * *'},
+    'purge_jobs': {'command': 'purge_jobs', 'cron': '15 5 * * *'},
+}
+
+# Request logging（超过该耗时的请求记为 WARNING，不参与抽样）
+LOG_SLOW_REQUEST_MS = int(os.getenv('LOG_SLOW_REQUEST_MS', '1000'))
+
+# Memory diagnostics（tracemalloc 记录的调用栈深度，越大开销越高）
+MEMORY_DIAGNOSTICS_FRAMES = int(os.getenv('MEMORY_DIAGNOSTICS_FRAMES', '10'))
+
+# Full-text search
+SEARCH_RESULTS_PER_PAGE = int(os.getenv('SEARCH_RESULTS_PER_PAGE', '20'))
+
+# 负责人 / 项目选择框自动补全
+AUTOCOMPLETE_PAGE_SIZE = int(os.getenv('AUTOCOMPLETE_PAGE_SIZE', '20'))
+AUTOCOMPLETE_CACHE_SECONDS = int(os.getenv('AUTOCOMPLETE_CACHE_SECONDS', '60'))
+
+# 管理后台：未筛选的列表在 PostgreSQL 上超过该行数时用统计信息估算总数，不执行 COUNT(*)
+ADMIN_ESTIMATED_COUNT_MIN = int(os.getenv('ADMIN_ESTIMATED_COUNT_MIN', '100000'))
+
+# 项目 / 任务的后台分批删除：每批行数、批次间的停顿（让出 SQLite 写锁）与每次执行的时长上限
+DELETION_BATCH_SIZE = int(os.getenv('DELETION_BATCH_SIZE', '500'))
+DELETION_BATCH_PAUSE_MS = int(os.getenv('DELETION_BATCH_PAUSE_MS', '50'))
+DELETION_JOB_SECONDS = int(os.getenv('DELETION_JOB_SECONDS', '30'))
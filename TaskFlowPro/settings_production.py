@@ -29,6 +29,8 @@ ALLOWED_HOSTS = ['your-domain.com', 'your-server-ip', 'localhost']
 #         'PASSWORD': os.environ.get('DB_PASSWORD', ''),
 #         'HOST': os.environ.get('DB_HOST', 'localhost'),
 #         'PORT': os.environ.get('DB_PORT', '5432'),
+#         'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+#         'CONN_HEALTH_CHECKS': True,
 #     }
 # }
 
@@ -37,6 +39,18 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # worker 启动时预先建立连接并在请求之间复用（ASGI 模式下为 0）
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# Cache
+# 多个 Gunicorn worker 之间需要共享缓存（统计数据的失效依赖于此）
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / 'cache')),
     }
 }
 
@@ -49,6 +63,17 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# 合并、哈希文件名并预压缩（gzip / brotli），由 WhiteNoise 或 nginx 直接发送
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'TaskFlowPro.staticfiles.BundledManifestStaticFilesStorage',
+    },
+}
+STATIC_USE_BUNDLES = True
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -67,14 +92,31 @@ SECURE_HSTS_PRELOAD = True
 # CSRF_COOKIE_SECURE = True
 
 # Logging
+# JSON lines，经队列由后台线程写入文件；高频的请求日志可按比例抽样
+LOG_SAMPLE_RATES = {
+    'taskflowpro.request': float(os.environ.get('LOG_REQUEST_SAMPLE_RATE', '1')),
+}
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'TaskFlowPro.log.JsonFormatter',
+        },
+    },
+    'filters': {
+        'sampling': {
+            '()': 'TaskFlowPro.log.SamplingFilter',
+            'rates': LOG_SAMPLE_RATES,
+        },
+    },
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'class': 'TaskFlowPro.log.QueueFileHandler',
             'filename': BASE_DIR / 'logs' / 'django.log',
+            'formatter': 'json',
+            'filters': ['sampling'],
         },
     },
     'loggers': {
@@ -83,6 +125,16 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        'jobs': {
+            'handlers': ['file'],
+            'level': 'INFO',
+            'propagate': True,
+        },
+        'taskflowpro': {
+            'handlers': ['file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
@@ -93,4 +145,10 @@ EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '587'))
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
-DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@yourdomain.com') 
\ No newline at end of file
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@yourdomain.com')
+
+# Background jobs：生产环境由 runworker 进程执行
+JOBS_EAGER = os.environ.get('JOBS_EAGER', '0') == '1'
+
+# 任务附件由 nginx 内部 location 发送（见 taskflowpro_nginx.conf）
+ATTACHMENT_X_ACCEL_REDIRECT = os.environ.get('ATTACHMENT_X_ACCEL_REDIRECT', '1') == '1'
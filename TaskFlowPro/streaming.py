@@ -0,0 +1,48 @@
+"""
+大列表页的流式渲染
+
+页面模板在卡片位置输出占位标记，渲染后在标记处切开：先发送页头、导航与筛选表单，
+再从查询集迭代器逐个渲染卡片发送，最后发送页尾。浏览器不必等整页渲染完成
+就能开始解析、加载静态资源。STREAM_LIST_PAGES 关闭时按普通方式整页渲染。
+"""
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.shortcuts import render
+from django.template import RequestContext
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+STREAM_MARKER = '<!--stream-items-->'
+
+
+def render_list(request, template_name, context, name, queryset, item_template, item_name):
+    """
+    渲染列表页
+
+    模板中用 has_<name> 判断是否有数据，在 stream_marker 存在时输出它代替卡片循环，
+    卡片本身放在 item_template 中，以 item_name 为变量名渲染。
+    """
+    if not settings.STREAM_LIST_PAGES or not queryset.exists():
+        items = list(queryset)
+        context.update({name: items, f'has_{name}': bool(items)})
+        return render(request, template_name, context)
+
+    context.update({name: [], f'has_{name}': True, 'stream_marker': mark_safe(STREAM_MARKER)})
+    head, tail = render_to_string(template_name, context, request).split(STREAM_MARKER, 1)
+    item_template = get_template(item_template).template
+
+    def stream():
+        yield head
+        item_context = RequestContext(request)
+        # 只绑定一次模板，上下文处理器不会对每张卡片重复执行
+        with item_context.bind_template(item_template):
+            for item in queryset.iterator(chunk_size=settings.STREAM_LIST_CHUNK_SIZE):
+                with item_context.push({item_name: item}):
+                    yield item_template.render(item_context)
+        yield tail
+
+    response = StreamingHttpResponse(stream(), content_type='text/html; charset=utf-8')
+    # 关闭 nginx 对该响应的缓冲，否则仍要等整个响应结束才发给客户端
+    response['X-Accel-Buffering'] = 'no'
+    return response
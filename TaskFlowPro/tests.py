@@ -0,0 +1,119 @@
+import gzip
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.contrib.auth.models import User
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.db.models import Value
+from django.test import RequestFactory, TestCase, override_settings
+from projects.models import Project
+from tasks.models import Task
+
+from .compression import CompressionMiddleware
+from .log import RequestLogMiddleware
+from .pagination import EstimatedCountPaginator, is_unfiltered
+
+
+class RequestLogMiddlewareTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_sync_request_logged_with_sql_count(self):
+        def get_response(request):
+            User.objects.count()
+            return HttpResponse('ok')
+
+        middleware = RequestLogMiddleware(get_response)
+        self.assertFalse(iscoroutinefunction(middleware))
+        with self.assertLogs('taskflowpro.request', 'INFO') as logs:
+            response = middleware(self.factory.get('/tasks/', HTTP_X_REQUEST_ID='abc-123'))
+        self.assertEqual(response['X-Request-ID'], 'abc-123')
+        self.assertEqual(logs.records[0].sql_count, 1)
+
+    def test_async_request_counts_queries_from_sync_threads(self):
+        async def get_response(request):
+            await sync_to_async(User.objects.count)()
+            await sync_to_async(User.objects.count)()
+            return HttpResponse('ok')
+
+        middleware = RequestLogMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        with self.assertLogs('taskflowpro.request', 'INFO') as logs:
+            response = async_to_sync(middleware)(self.factory.get('/tasks/'))
+        self.assertEqual(len(response['X-Request-ID']), 32)
+        self.assertEqual(logs.records[0].status, 200)
+        self.assertEqual(logs.records[0].sql_count, 2)
+
+    def test_queries_outside_requests_not_counted(self):
+        with self.assertLogs('taskflowpro.request', 'INFO') as logs:
+            RequestLogMiddleware(lambda request: HttpResponse('ok'))(self.factory.get('/'))
+            User.objects.count()
+        self.assertEqual(logs.records[0].sql_count, 0)
+
+
+@override_settings(RESPONSE_COMPRESSION=True)
+class CompressionMiddlewareTests(TestCase):
+    data = {'tasks': [{'id': i, 'title': f'任务 {i}'} for i in range(50)]}
+
+    def setUp(self):
+        self.request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+
+    def test_sync_response_compressed(self):
+        middleware = CompressionMiddleware(lambda request: JsonResponse(self.data))
+        self.assertFalse(iscoroutinefunction(middleware))
+        response = middleware(self.request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content)), self.data)
+
+    def test_async_response_compressed(self):
+        async def get_response(request):
+            return JsonResponse(self.data)
+
+        middleware = CompressionMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = async_to_sync(middleware)(self.request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content)), self.data)
+
+    def test_async_streaming_response_compressed(self):
+        async def chunks():
+            for i in range(3):
+                yield f'第 {i} 块\n'.encode()
+
+        async def get_response(request):
+            return StreamingHttpResponse(chunks(), content_type='text/plain')
+
+        response = async_to_sync(CompressionMiddleware(get_response))(self.request)
+
+        async def read():
+            return b''.join([chunk async for chunk in response.streaming_content])
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(async_to_sync(read)()).decode(), '第 0 块\n第 1 块\n第 2 块\n')
+
+    def test_sync_streaming_response_compressed(self):
+        response = CompressionMiddleware(
+            lambda request: StreamingHttpResponse(iter([b'a' * 300, b'b' * 300]), content_type='text/plain')
+        )(self.request)
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b'a' * 300 + b'b' * 300)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def test_manager_base_filter_is_unfiltered(self):
+        # 任务与项目的默认管理器排除已标记删除的行，注解与排序也不算筛选
+        self.assertTrue(is_unfiltered(Task.objects.annotate(x=Value(1)).order_by('-id')))
+        self.assertTrue(is_unfiltered(Project.objects.all()))
+        self.assertTrue(is_unfiltered(User.objects.all()))
+
+    def test_filtered_querysets(self):
+        self.assertFalse(is_unfiltered(Task.objects.filter(status='todo')))
+        self.assertFalse(is_unfiltered(Project.objects.filter(name__icontains='a')))
+        self.assertFalse(is_unfiltered(Task._base_manager.filter(deleted_at__isnull=False)))
+        self.assertFalse(is_unfiltered(Task.objects.filter(pk__in=[])))
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_MIN=1000)
+    def test_estimate_used_only_when_unfiltered(self):
+        with mock.patch('TaskFlowPro.pagination.estimated_row_count', return_value=5000):
+            self.assertEqual(EstimatedCountPaginator(Task.objects.order_by('-id'), 20).count, 5000)
+            self.assertEqual(EstimatedCountPaginator(Task.objects.filter(status='todo').order_by('-id'), 20).count, 0)
@@ -18,6 +18,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from .diagnostics import memory_diagnostics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -25,6 +26,8 @@ urlpatterns = [
     path('projects/', include('projects.urls')),
     path('tasks/', include('tasks.urls')),
     path('comments/', include('comments.urls')),
+    path('search/', include('search.urls')),
+    path('diagnostics/memory/', memory_diagnostics, name='memory_diagnostics'),
     path('', include('projects.urls', namespace='projects')),  # 默认重定向到项目列表
 ]
 
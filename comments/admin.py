@@ -1,19 +1,81 @@
 from django.contrib import admin
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Length, Substr
+from search.models import SearchDocument
+from TaskFlowPro.pagination import EstimatedCountPaginator
 from .models import Comment, CommentLike
+from .thread_cache import invalidate_comment_thread
+
+
+def delete_comment_subtrees(queryset):
+    """
+    删除评论及其全部回复，每张表一条 DELETE
+
+    后代通过树路径前缀匹配（同一任务下路径以所选评论路径开头），不逐条加载对象、不逐条发送
+    post_delete 信号，信号负责的事情在这里集中处理：修正保留下来的父评论的回复数、
+    移除搜索索引、失效评论线程缓存。返回删除的评论数。
+    """
+    selected = queryset.order_by().values('pk')
+    ancestors = Comment.objects.filter(pk__in=selected).exclude(path='').filter(
+        task_id=OuterRef('task_id'), path=Substr(OuterRef('path'), 1, Length('path')),
+    )
+    # 先按任务缩小范围，(task, path) 索引内再做前缀匹配
+    subtree = Comment.objects.filter(task_id__in=queryset.order_by().values('task_id')).filter(
+        Q(pk__in=selected) | Exists(ancestors)
+    )
+    with transaction.atomic():
+        task_ids = set(subtree.order_by().values_list('task_id', flat=True).distinct())
+        parent_ids = set(
+            subtree.order_by().exclude(parent_id__in=subtree.values('pk')).exclude(parent_id=None)
+            .values_list('parent_id', flat=True).distinct()
+        )
+        # _raw_delete 直接执行 DELETE，不经过 Collector（Collector 会为了发送信号把全部对象读入内存）
+        SearchDocument.objects.filter(kind='comment', object_id__in=subtree.values('pk'))._raw_delete(SearchDocument.objects.db)
+        CommentLike.objects.filter(comment__in=subtree.values('pk'))._raw_delete(CommentLike.objects.db)
+        count = subtree._raw_delete(subtree.db)
+        replies = Comment.objects.filter(parent=OuterRef('pk')).order_by().values('parent').annotate(count=Count('id'))
+        Comment.objects.filter(pk__in=parent_ids).update(reply_count=Coalesce(Subquery(replies.values('count')), 0))
+        transaction.on_commit(lambda: [invalidate_comment_thread(task_id) for task_id in task_ids])
+    return count
+
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
-    list_display = ['author', 'task', 'short_content', 'created_at', 'parent', 'like_count']
-    list_filter = ['created_at', 'author']
+    list_display = ['author', 'task', 'short_content', 'created_at', 'parent_id', 'like_count', 'reply_count']
+    list_filter = ['created_at']
+    list_select_related = ['author', 'task']
     search_fields = ['content', 'author__username', 'task__title']
-    readonly_fields = ['created_at', 'updated_at']
-    
+    raw_id_fields = ['task', 'author', 'parent']
+    readonly_fields = ['created_at', 'updated_at', 'like_count', 'reply_count', 'path', 'depth']
+    ordering = ['-id']
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    actions = ['delete_comments']
+
+    def get_actions(self, request):
+        # 默认的 delete_selected 逐条收集并删除级联对象，大量评论时由 delete_comments 代替
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
     def short_content(self, obj):
         return obj.short_content
     short_content.short_description = '评论内容'
 
+    def delete_comments(self, request, queryset):
+        count = delete_comment_subtrees(queryset)
+        self.message_user(request, f'已删除 {count} 条评论（含回复）')
+    delete_comments.short_description = '删除所选评论及其回复'
+    delete_comments.allowed_permissions = ('delete',)
+
 @admin.register(CommentLike)
 class CommentLikeAdmin(admin.ModelAdmin):
     list_display = ['user', 'comment', 'created_at']
-    list_filter = ['created_at', 'user']
-    search_fields = ['user__username', 'comment__content']
+    list_filter = ['created_at']
+    list_select_related = ['user', 'comment__author', 'comment__task']
+    search_fields = ['user__username']
+    raw_id_fields = ['comment', 'user']
+    ordering = ['-id']
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
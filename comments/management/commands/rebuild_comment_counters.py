@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from comments.models import Comment, CommentLike
+
+
+class Command(BaseCommand):
+    help = '根据点赞与回复记录重新计算评论的点赞数与回复数'
+
+    def handle(self, *args, **options):
+        like_counts = Coalesce(Subquery(
+            CommentLike.objects.filter(comment=OuterRef('pk'))
+            .order_by()
+            .values('comment')
+            .annotate(total=Count('id'))
+            .values('total')
+        ), 0)
+        reply_counts = Coalesce(Subquery(
+            Comment.objects.filter(parent=OuterRef('pk'))
+            .order_by()
+            .values('parent')
+            .annotate(total=Count('id'))
+            .values('total')
+        ), 0)
+
+        likes_fixed = Comment.objects.exclude(like_count=like_counts).update(like_count=like_counts)
+        replies_fixed = Comment.objects.exclude(reply_count=reply_counts).update(reply_count=reply_counts)
+        self.stdout.write(self.style.SUCCESS(
+            f'已修正 {likes_fixed} 条评论的点赞数，{replies_fixed} 条评论的回复数'
+        ))
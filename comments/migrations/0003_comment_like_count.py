@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:11
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_like_counts(apps, schema_editor):
+    Comment = apps.get_model("comments", "Comment")
+    CommentLike = apps.get_model("comments", "CommentLike")
+    counts = (
+        CommentLike.objects.filter(comment=OuterRef("pk"))
+        .order_by()
+        .values("comment")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    Comment.objects.update(like_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("comments", "0002_alter_comment_options_comment_parent_commentlike"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="like_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="点赞数"),
+        ),
+        migrations.RunPython(backfill_like_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:12
+
+from django.db import migrations, models
+from django.db.models import CharField, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Concat, LPad
+
+
+def backfill_tree_paths(apps, schema_editor):
+    """逐层回填物化路径，每一层一条 UPDATE"""
+    Comment = apps.get_model("comments", "Comment")
+    segment = LPad(Cast("id", CharField()), 10, Value("0"))
+    Comment.objects.filter(parent__isnull=True).update(path=segment, depth=0)
+    depth = 0
+    while True:
+        parents = Comment.objects.filter(pk=OuterRef("parent_id"))
+        updated = (
+            Comment.objects.filter(path="", parent__depth=depth)
+            .exclude(parent__path="")
+            .update(
+                path=Concat(Subquery(parents.values("path")[:1]), segment),
+                depth=depth + 1,
+            )
+        )
+        if not updated:
+            break
+        depth += 1
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("comments", "0003_comment_like_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="depth",
+            field=models.PositiveSmallIntegerField(
+                default=0, editable=False, verbose_name="层级"
+            ),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="path",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                max_length=250,
+                verbose_name="树路径",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["task", "path"], name="comments_co_task_id_59bf7c_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_tree_paths, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,36 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 from tasks.models import Task
 
+# 物化路径：每一层是一个 10 位补零的评论ID，只含数字，
+# 因此按字符串排序即为深度优先顺序，子树是一段连续的范围
+PATH_STEP = 10
+MAX_DEPTH = 25
+
+def _path_upper_bound(path):
+    """子树范围的上界：把路径最后一段加一"""
+    return path[:-PATH_STEP] + f'{int(path[-PATH_STEP:]) + 1:0{PATH_STEP}d}'
+
+class CommentQuerySet(models.QuerySet):
+    """
+    评论查询集，基于物化路径的子树查询
+    """
+    def depth_first(self):
+        """按深度优先顺序排列，可直接按顺序渲染"""
+        return self.order_by('path')
+
+    def subtree_of(self, comment, include_self=True):
+        """comment 的整棵子树，一次 (task, path) 索引范围查询"""
+        lookup = 'path__gte' if include_self else 'path__gt'
+        return self.filter(**{
+            'task_id': comment.task_id,
+            lookup: comment.path,
+            'path__lt': _path_upper_bound(comment.path),
+        }).depth_first()
+
 class Comment(models.Model):
     """
     评论模型 - 允许用户对任务进行评论，支持多级回复
@@ -12,29 +41,61 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
     parent = models.ForeignKey('self', null=True, blank=True, related_name='replies', on_delete=models.CASCADE, verbose_name='父评论')
+    like_count = models.PositiveIntegerField(default=0, verbose_name='点赞数')
+    reply_count = models.PositiveIntegerField(default=0, verbose_name='回复数')
+    path = models.CharField(max_length=PATH_STEP * MAX_DEPTH, blank=True, default='', editable=False, verbose_name='树路径')
+    depth = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='层级')
+    
+    objects = CommentQuerySet.as_manager()
     
     class Meta:
         verbose_name = '评论'
         verbose_name_plural = '评论'
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['task', 'path']),
+            models.Index(fields=['task', 'depth', 'path']),
+            models.Index(fields=['parent', 'path']),
+        ]
     
     def __str__(self):
         return f"{self.author.username} 对 {self.task.title} 的评论"
     
+    def save(self, *args, **kwargs):
+        if not self.pk and self.parent_id and self.parent.depth >= MAX_DEPTH - 1:
+            # 超过最大层级的回复挂到被回复评论的父评论下
+            self.parent = self.parent.parent
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if not self.path:
+                # 路径依赖自身ID，插入后补写
+                parent = self.parent if self.parent_id else None
+                self.depth = parent.depth + 1 if parent else 0
+                self.path = (parent.path if parent else '') + f'{self.pk:0{PATH_STEP}d}'
+                Comment.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+                if parent:
+                    Comment.objects.filter(pk=parent.pk).update(reply_count=F('reply_count') + 1)
+    
+    def descendants(self):
+        """所有后代评论（深度优先）"""
+        return Comment.objects.subtree_of(self, include_self=False)
+    
     @property
     def short_content(self):
         if len(self.content) > 100:
             return self.content[:100] + '...'
         return self.content
     
-    @property
-    def like_count(self):
-        return self.likes.count()
-    
     @property
     def has_replies(self):
         return self.replies.exists()
 
+@receiver(post_delete, sender=Comment)
+def decrement_reply_count(sender, instance, **kwargs):
+    """删除回复时减少父评论的回复数（级联删除时父评论可能已不存在）"""
+    if instance.parent_id:
+        Comment.objects.filter(pk=instance.parent_id, reply_count__gt=0).update(reply_count=F('reply_count') - 1)
+
 class CommentLike(models.Model):
     comment = models.ForeignKey(Comment, on_delete=models.CASCADE, related_name='likes', verbose_name='评论')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='comment_likes', verbose_name='用户')
@@ -46,4 +107,38 @@ class CommentLike(models.Model):
         verbose_name_plural = '评论点赞'
     
     def __str__(self):
-        return f"{self.user.username} 点赞了 {self.comment.id}"
+        return f"{self.user.username} 点赞了 {self.comment_id}"
+    
+    @classmethod
+    def toggle(cls, comment_id, user, liked=None):
+        """
+        点赞或取消点赞，返回 (是否已点赞, 最新点赞数)
+
+        liked 为 None 时切换状态，为 True/False 时设置为指定状态（重复提交幂等）。
+        取消点赞经过 Django 的级联删除：先查出点赞行（post_delete 信号据此失效评论线程缓存）
+        再按主键删除；点赞是一条 INSERT，并发的重复点击由唯一约束兜底。
+        点赞数通过 F() 表达式原子增减后读取一次最新值，不重新 COUNT。
+        """
+        with transaction.atomic():
+            if liked is not True:
+                deleted, _ = cls.objects.filter(comment_id=comment_id, user=user).delete()
+                if deleted:
+                    return False, cls._adjust_like_count(comment_id, -1)
+                if liked is False:
+                    return False, cls._current_like_count(comment_id)
+            try:
+                with transaction.atomic():
+                    cls.objects.create(comment_id=comment_id, user=user)
+            except IntegrityError:
+                # 并发请求已经点过赞
+                return True, cls._current_like_count(comment_id)
+            return True, cls._adjust_like_count(comment_id, 1)
+    
+    @staticmethod
+    def _adjust_like_count(comment_id, delta):
+        Comment.objects.filter(pk=comment_id).update(like_count=F('like_count') + delta)
+        return CommentLike._current_like_count(comment_id)
+    
+    @staticmethod
+    def _current_like_count(comment_id):
+        return Comment.objects.values_list('like_count', flat=True).get(pk=comment_id)
@@ -1,3 +1,367 @@
-from django.test import TestCase
+import importlib
+import io
+import json
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.apps import apps
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from projects.models import Project
+from tasks.models import Task
+from search.models import SearchDocument
+from users.avatars import generate_thumbnails
+from .admin import delete_comment_subtrees
+from .models import Comment, CommentLike
+from .thread_cache import _thread_version
+from .views import comment_list, comment_list_async, like_comment, like_comment_async
+
+
+class CommentThreadAvatarTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        project = Project.objects.create(name='项目', owner=cls.author)
+        cls.task = Task.objects.create(title='任务', project=project, creator=cls.author, assignee=cls.author)
+        Comment.objects.create(task=cls.task, author=cls.author, content='评论')
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.client.force_login(self.author)
+
+    def avatar_url(self):
+        response = self.client.get(reverse('comments:comment_list', args=[self.task.pk]))
+        return response.json()['comments'][0]['avatar_url']
+
+    def test_thumbnail_generation_refreshes_cached_avatar_url(self):
+        self.assertEqual(self.avatar_url(), '')
+        buffer = io.BytesIO()
+        Image.new('RGB', (20, 20), 'red').save(buffer, 'PNG')
+        profile = self.author.profile
+        profile.avatar.save('avatar.png', ContentFile(buffer.getvalue()))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            digest = generate_thumbnails(profile)
+        self.assertIn(digest, self.avatar_url())
+
+
+class CommentLikeToggleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        cls.reader = User.objects.create_user('reader', password='pass')
+        project = Project.objects.create(name='项目', owner=cls.author)
+        task = Task.objects.create(title='任务', project=project, creator=cls.author, assignee=cls.author)
+        cls.comment = Comment.objects.create(task=task, author=cls.author, content='评论')
+
+    def test_toggle_switches_state(self):
+        self.assertEqual(CommentLike.toggle(self.comment.pk, self.reader), (True, 1))
+        self.assertEqual(CommentLike.toggle(self.comment.pk, self.reader), (False, 0))
+
+    def test_explicit_state_is_idempotent(self):
+        self.assertEqual(CommentLike.toggle(self.comment.pk, self.reader, liked=True), (True, 1))
+        # 已经点过赞：INSERT 触发唯一约束，点赞数不变
+        self.assertEqual(CommentLike.toggle(self.comment.pk, self.reader, liked=True), (True, 1))
+        self.assertEqual(CommentLike.toggle(self.comment.pk, self.reader, liked=False), (False, 0))
+        self.assertEqual(CommentLike.toggle(self.comment.pk, self.reader, liked=False), (False, 0))
+
+    def test_like_count_matches_rows(self):
+        for user, liked in ((self.reader, True), (self.author, None), (self.reader, True), (self.author, False),
+                            (self.reader, None), (self.author, True)):
+            CommentLike.toggle(self.comment.pk, user, liked)
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.like_count, CommentLike.objects.filter(comment=self.comment).count())
+        self.assertEqual(self.comment.like_count, 1)
+
+
+class DeleteCommentSubtreesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        project = Project.objects.create(name='项目', owner=cls.author)
+        cls.task = Task.objects.create(title='任务', project=project, creator=cls.author, assignee=cls.author)
+        cls.other_task = Task.objects.create(title='其他任务', project=project, creator=cls.author, assignee=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.root = self.reply(None, '根评论')
+        self.middle = self.reply(self.root, '中间')
+        self.leaf = self.reply(self.middle, '叶子')
+        self.sibling = self.reply(self.root, '兄弟')
+        # 另一任务中路径相同前缀的评论不受影响
+        self.other = Comment.objects.create(task=self.other_task, author=self.author, content='其他')
+        CommentLike.objects.create(comment=self.leaf, user=self.author)
+        CommentLike.objects.create(comment=self.sibling, user=self.author)
+
+    def reply(self, parent, content):
+        return Comment.objects.create(task=self.task, author=self.author, content=content, parent=parent)
+
+    def test_delete_mid_tree_comment(self):
+        self.assertEqual(Comment.objects.get(pk=self.root.pk).reply_count, 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            count = delete_comment_subtrees(Comment.objects.filter(pk=self.middle.pk))
+
+        self.assertEqual(count, 2)
+        self.assertEqual(
+            set(Comment.objects.values_list('pk', flat=True)), {self.root.pk, self.sibling.pk, self.other.pk},
+        )
+        self.assertEqual(Comment.objects.get(pk=self.root.pk).reply_count, 1)
+        self.assertEqual(list(CommentLike.objects.values_list('comment_id', flat=True)), [self.sibling.pk])
+        self.assertEqual(
+            set(SearchDocument.objects.filter(kind='comment').values_list('object_id', flat=True)),
+            {self.root.pk, self.sibling.pk, self.other.pk},
+        )
+
+    def test_delete_root_and_descendant_together(self):
+        count = delete_comment_subtrees(Comment.objects.filter(pk__in=[self.root.pk, self.leaf.pk]))
+        self.assertEqual(count, 4)
+        self.assertEqual(list(Comment.objects.values_list('pk', flat=True)), [self.other.pk])
+
+    def test_thread_cache_invalidated(self):
+        self.client.force_login(self.author)
+        url = reverse('comments:comment_list', args=[self.task.pk])
+        self.assertEqual(len(self.client.get(url).json()['comments']), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            delete_comment_subtrees(Comment.objects.filter(pk=self.root.pk))
+        self.assertEqual(self.client.get(url).json()['comments'], [])
+
+
+class CommentTreePathTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        project = Project.objects.create(name='项目', owner=cls.author)
+        cls.task = Task.objects.create(title='任务', project=project, creator=cls.author, assignee=cls.author)
+
+    def reply(self, parent, content='评论'):
+        return Comment.objects.create(task=self.task, author=self.author, content=content, parent=parent)
+
+    def test_path_and_depth_assigned_on_save(self):
+        root = self.reply(None)
+        child = self.reply(root)
+        grandchild = self.reply(child)
+        self.assertEqual((root.path, root.depth), (f'{root.pk:010d}', 0))
+        self.assertEqual((grandchild.path, grandchild.depth), (f'{root.pk:010d}{child.pk:010d}{grandchild.pk:010d}', 2))
+        self.assertEqual(Comment.objects.get(pk=root.pk).reply_count, 1)
+        # 编辑不改变路径
+        grandchild.content = '修改'
+        grandchild.save()
+        self.assertEqual(Comment.objects.get(pk=grandchild.pk).path, grandchild.path)
+
+    def test_reply_beyond_max_depth_attached_to_grandparent(self):
+        with mock.patch('comments.models.MAX_DEPTH', 3):
+            root = self.reply(None)
+            child = self.reply(root)
+            deepest = self.reply(child)
+            reply = self.reply(deepest)
+        self.assertEqual(reply.parent_id, child.pk)
+        self.assertEqual(reply.depth, 2)
+
+    def test_subtree_of(self):
+        root = self.reply(None)
+        first = self.reply(root)
+        first_child = self.reply(first)
+        second = self.reply(root)
+        other_root = self.reply(None)
+        self.assertEqual(list(Comment.objects.subtree_of(root)), [root, first, first_child, second])
+        self.assertEqual(list(first.descendants()), [first_child])
+        self.assertEqual(list(Comment.objects.subtree_of(other_root, include_self=False)), [])
+
+    def test_backfill_migration_on_nested_data(self):
+        root = self.reply(None)
+        child = self.reply(root)
+        grandchild = self.reply(child)
+        other = self.reply(None)
+        expected = dict(Comment.objects.values_list('pk', 'path'))
+        Comment.objects.update(path='', depth=0)
+
+        migration = importlib.import_module('comments.migrations.0004_comment_tree_path')
+        migration.backfill_tree_paths(apps, None)
+
+        self.assertEqual(dict(Comment.objects.values_list('pk', 'path')), expected)
+        self.assertEqual(
+            dict(Comment.objects.values_list('pk', 'depth')),
+            {root.pk: 0, child.pk: 1, grandchild.pk: 2, other.pk: 0},
+        )
+
+
+@override_settings(COMMENT_PAGE_SIZE=2, COMMENT_REPLY_PAGE_SIZE=2, COMMENT_REPLY_PREVIEW_COUNT=2,
+                   COMMENT_REPLY_PREVIEW_DEPTH=2)
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        project = Project.objects.create(name='项目', owner=cls.author)
+        cls.task = Task.objects.create(title='任务', project=project, creator=cls.author, assignee=cls.author)
+        cls.roots = [
+            Comment.objects.create(task=cls.task, author=cls.author, content=f'根评论 {index}') for index in range(5)
+        ]
+        first = cls.roots[0]
+        cls.replies = [
+            Comment.objects.create(task=cls.task, author=cls.author, content=f'回复 {index}', parent=first)
+            for index in range(3)
+        ]
+        cls.second_level = Comment.objects.create(task=cls.task, author=cls.author, content='二层', parent=cls.replies[0])
+        cls.third_level = Comment.objects.create(task=cls.task, author=cls.author, content='三层', parent=cls.second_level)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.author)
+
+    def roots_page(self, cursor=None):
+        params = {'cursor': cursor} if cursor is not None else {}
+        return self.client.get(reverse('comments:comment_list', args=[self.task.pk]), params).json()
+
+    def test_cursor_pages_cover_all_roots_once(self):
+        ids, cursor, pages = [], None, 0
+        while True:
+            page = self.roots_page(cursor)
+            pages += 1
+            ids.extend(comment['id'] for comment in page['comments'])
+            if not page['has_next']:
+                break
+            cursor = page['next_cursor']
+        self.assertEqual(pages, 3)
+        self.assertEqual(ids, [comment.pk for comment in self.roots])
+
+    def test_non_numeric_cursor_starts_from_beginning(self):
+        page = self.roots_page("0' OR 1=1")
+        self.assertEqual([comment['id'] for comment in page['comments']], [c.pk for c in self.roots[:2]])
+
+    def test_reply_previews_limited_per_parent_and_depth(self):
+        first = self.roots_page()['comments'][0]
+        self.assertEqual([reply['id'] for reply in first['replies']], [r.pk for r in self.replies[:2]])
+        second_level = first['replies'][0]['replies']
+        self.assertEqual([reply['id'] for reply in second_level], [self.second_level.pk])
+        # 预览只到第二层，第三层需要通过“更多回复”加载
+        self.assertEqual(second_level[0]['replies'], [])
+        self.assertEqual(second_level[0]['reply_count'], 1)
+
+    def test_more_replies_paginated(self):
+        url = reverse('comments:comment_replies', args=[self.roots[0].pk])
+        page = self.client.get(url).json()
+        self.assertTrue(page['has_next'])
+        rest = self.client.get(url, {'cursor': page['next_cursor']}).json()
+        self.assertEqual(
+            [reply['id'] for reply in page['replies'] + rest['replies']], [r.pk for r in self.replies],
+        )
+        self.assertFalse(rest['has_next'])
+
+
+class CommentThreadCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        cls.reader = User.objects.create_user('reader', password='pass')
+        project = Project.objects.create(name='项目', owner=cls.author)
+        cls.task = Task.objects.create(title='任务', project=project, creator=cls.author, assignee=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.comment = Comment.objects.create(task=self.task, author=self.author, content='评论')
+
+    def assertVersionBumped(self, change):
+        version = _thread_version(self.task.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        self.assertNotEqual(_thread_version(self.task.pk), version)
+
+    def test_new_comment_bumps_version(self):
+        self.assertVersionBumped(lambda: Comment.objects.create(task=self.task, author=self.reader, content='新评论'))
+
+    def test_like_bumps_version(self):
+        self.assertVersionBumped(lambda: CommentLike.toggle(self.comment.pk, self.reader))
+
+    def test_delete_bumps_version(self):
+        self.assertVersionBumped(self.comment.delete)
+
+    def test_viewer_fields_not_shared(self):
+        CommentLike.toggle(self.comment.pk, self.author)
+        url = reverse('comments:comment_list', args=[self.task.pk])
+        self.client.force_login(self.author)
+        [own] = self.client.get(url).json()['comments']
+        self.client.force_login(self.reader)
+        with self.assertNumQueries(4):
+            # 会话、用户、任务是否存在与点赞状态；评论内容来自共享缓存
+            [other] = self.client.get(url).json()['comments']
+        self.assertEqual((own['liked'], own['can_edit'], own['can_delete']), (True, True, True))
+        self.assertEqual((other['liked'], other['can_edit'], other['can_delete']), (False, False, False))
+        self.assertEqual(other['like_count'], 1)
+
+
+class AsyncCommentViewTests(TestCase):
+    """ASYNC_VIEWS 开启时使用的异步视图与同步版本返回相同的结果"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        cls.reader = User.objects.create_user('reader', password='pass')
+        project = Project.objects.create(name='项目', owner=cls.author)
+        cls.task = Task.objects.create(title='任务', project=project, creator=cls.author, assignee=cls.author)
+        cls.comment = Comment.objects.create(task=cls.task, author=cls.author, content='评论')
+        Comment.objects.create(task=cls.task, author=cls.reader, content='回复', parent=cls.comment)
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def responses(self, sync_view, async_view, user, *args, method='get', data=None):
+        """依次调用同步与异步视图，每次使用新的请求对象"""
+        responses = []
+        for view in (sync_view, async_to_sync(async_view)):
+            request = getattr(self.factory, method)('/', data or {})
+            request.user = user
+            responses.append(view(request, *args))
+        return responses
+
+    def assertSameJson(self, *args, **kwargs):
+        sync_response, async_response = self.responses(*args, **kwargs)
+        self.assertEqual(json.loads(sync_response.content), json.loads(async_response.content))
+        return json.loads(sync_response.content)
+
+    def test_comment_list(self):
+        CommentLike.toggle(self.comment.pk, self.reader)
+        for user in (self.author, self.reader):
+            data = self.assertSameJson(comment_list, comment_list_async, user, self.task.pk)
+            [root] = data['comments']
+            self.assertEqual(root['liked'], user == self.reader)
+            self.assertEqual(root['can_edit'], user == self.author)
+            self.assertEqual(len(root['replies']), 1)
+
+    def test_like_comment(self):
+        for liked, like_count in (('1', 1), ('0', 0)):
+            data = self.assertSameJson(like_comment, like_comment_async, self.reader, self.comment.pk,
+                                       method='post', data={'liked': liked})
+            self.assertEqual(data, {'success': True, 'liked': liked == '1', 'like_count': like_count})
+        sync_response, async_response = self.responses(like_comment, like_comment_async, self.reader, self.comment.pk)
+        self.assertEqual((sync_response.status_code, async_response.status_code), (405, 405))
+
+    def test_missing_objects(self):
+        for view in (comment_list, async_to_sync(comment_list_async)):
+            request = self.factory.get('/')
+            request.user = self.reader
+            with self.assertRaises(Http404):
+                view(request, self.task.pk + 100)
+        for view in (like_comment, async_to_sync(like_comment_async)):
+            request = self.factory.post('/', {'liked': '1'})
+            request.user = self.reader
+            with self.assertRaises(Http404):
+                view(request, self.comment.pk + 100)
+
+    def test_login_required(self):
+        for views, args in (((comment_list, comment_list_async), (self.task.pk,)),
+                            ((like_comment, like_comment_async), (self.comment.pk,))):
+            sync_response, async_response = self.responses(*views, AnonymousUser(), *args, method='post')
+            self.assertEqual(sync_response.status_code, 302)
+            self.assertEqual(sync_response['Location'], async_response['Location'])
+        self.assertFalse(CommentLike.objects.exists())
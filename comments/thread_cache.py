@@ -0,0 +1,70 @@
+"""
+评论线程缓存
+
+按任务缓存与访问者无关的评论分页数据（共享部分），访问者相关的
+liked / can_edit / can_delete 在读取后叠加。任务下的评论或点赞发生变化时
+更换该任务的缓存版本号，旧版本的缓存条目随之失效。
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Comment, CommentLike
+
+
+def _version_key(task_id):
+    return f'comment_thread_version:{task_id}'
+
+
+def _thread_version(task_id):
+    version = cache.get(_version_key(task_id))
+    if version is None:
+        # 版本号被淘汰后用新的时间戳，避免旧条目重新生效
+        cache.add(_version_key(task_id), time.time_ns(), None)
+        version = cache.get(_version_key(task_id))
+    return version
+
+
+def get_thread_page(task_id, page_key, build):
+    """读取缓存的共享分页数据，缺失时调用 build() 生成并写入缓存"""
+    key = f'comment_thread:{task_id}:{_thread_version(task_id)}:{page_key}'
+    return cache.get_or_set(key, build, settings.COMMENT_THREAD_CACHE_SECONDS)
+
+
+def invalidate_comment_thread(task_id):
+    cache.set(_version_key(task_id), time.time_ns(), None)
+
+
+def invalidate_author_threads(user_id):
+    """评论作者的头像地址变化：失效其发表过评论的全部任务的线程缓存"""
+    task_ids = Comment.objects.filter(author_id=user_id).order_by().values_list('task_id', flat=True).distinct()
+    version = time.time_ns()
+    cache.set_many({_version_key(task_id): version for task_id in task_ids}, None)
+
+
+def _invalidate_on_commit(task_id):
+    # 提交后再失效，避免并发请求把未提交的中间状态写回缓存
+    transaction.on_commit(lambda: invalidate_comment_thread(task_id))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, raw=False, **kwargs):
+    """评论新增、编辑或删除"""
+    if not raw:
+        _invalidate_on_commit(instance.task_id)
+
+
+@receiver(post_save, sender=CommentLike)
+@receiver(post_delete, sender=CommentLike)
+def comment_like_changed(sender, instance, raw=False, **kwargs):
+    """点赞变化会改变共享部分中的点赞数"""
+    if raw:
+        return
+    task_id = Comment.objects.filter(pk=instance.comment_id).values_list('task_id', flat=True).first()
+    if task_id:
+        _invalidate_on_commit(task_id)
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
@@ -7,7 +8,8 @@ urlpatterns = [
     path('add/<int:task_id>/', views.add_comment, name='add_comment'),
     path('edit/<int:comment_id>/', views.edit_comment, name='edit_comment'),
     path('delete/<int:comment_id>/', views.delete_comment, name='delete_comment'),
-    path('list/<int:task_id>/', views.comment_list, name='comment_list'),
-    path('like/<int:comment_id>/', views.like_comment, name='like_comment'),
+    path('list/<int:task_id>/', views.comment_list_async if settings.ASYNC_VIEWS else views.comment_list, name='comment_list'),
+    path('replies/<int:comment_id>/', views.comment_replies, name='comment_replies'),
+    path('like/<int:comment_id>/', views.like_comment_async if settings.ASYNC_VIEWS else views.like_comment, name='like_comment'),
     path('reply/<int:task_id>/<int:parent_id>/', views.reply_comment, name='reply_comment'),
 ] 
\ No newline at end of file
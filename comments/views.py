@@ -1,11 +1,17 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import JsonResponse, Http404, HttpResponseNotAllowed
 from django.views.decorators.http import require_POST
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from asgiref.sync import sync_to_async
 from .models import Comment, CommentLike
 from .forms import CommentForm
+from .thread_cache import get_thread_page
 from tasks.models import Task
+from TaskFlowPro.asyncviews import async_login_required
 
 @login_required
 def add_comment(request, task_id):
@@ -81,22 +87,38 @@ def delete_comment(request, comment_id):
     messages.success(request, '评论删除成功')
     return redirect('tasks:task_detail', pk=task_id)
 
+def _parse_liked(value):
+    """解析客户端期望的点赞状态，缺省时为切换"""
+    if value in ('1', 'true'):
+        return True
+    if value in ('0', 'false'):
+        return False
+    return None
+
 @login_required
 @require_POST
 def like_comment(request, comment_id):
     """
     点赞或取消点赞评论（AJAX）
     """
-    comment = get_object_or_404(Comment, id=comment_id)
-    user = request.user
-    liked = False
-    like_obj = CommentLike.objects.filter(comment=comment, user=user).first()
-    if like_obj:
-        like_obj.delete()
-    else:
-        CommentLike.objects.create(comment=comment, user=user)
-        liked = True
-    return JsonResponse({'success': True, 'liked': liked, 'like_count': comment.like_count})
+    comment = get_object_or_404(Comment.objects.only('id'), id=comment_id)
+    liked, like_count = CommentLike.toggle(comment.id, request.user, _parse_liked(request.POST.get('liked')))
+    return JsonResponse({'success': True, 'liked': liked, 'like_count': like_count})
+
+@async_login_required
+async def like_comment_async(request, comment_id):
+    """
+    点赞或取消点赞评论（异步版本，ASYNC_VIEWS 开启时使用）
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    try:
+        comment = await Comment.objects.only('id').aget(id=comment_id)
+    except Comment.DoesNotExist:
+        raise Http404('评论不存在')
+    # 点赞需要事务，异步 ORM 不支持，放到线程中执行
+    liked, like_count = await sync_to_async(CommentLike.toggle)(comment.id, request.user, _parse_liked(request.POST.get('liked')))
+    return JsonResponse({'success': True, 'liked': liked, 'like_count': like_count})
 
 @login_required
 def reply_comment(request, task_id, parent_id):
@@ -119,42 +141,147 @@ def reply_comment(request, task_id, parent_id):
         form = CommentForm()
     return render(request, 'comments/reply_comment.html', {'form': form, 'task': task, 'parent': parent})
 
-# 修改comment_list接口，递归返回嵌套评论结构
-def build_comment_tree(comments, user):
+def _serialize_comment(comment):
+    """与访问者无关的评论字段（可被所有访问者共享缓存）"""
+    return {
+        'id': comment.id,
+        'author_id': comment.author_id,
+        'author': comment.author.username,
+        'avatar_url': comment.author.profile.avatar_thumbnails['small']['webp'],
+        'avatar_fallback_url': comment.author.profile.avatar_thumbnails['small']['jpeg'],
+        'content': comment.content,
+        'created_at': comment.created_at.strftime('%Y-%m-%d %H:%M'),
+        'like_count': comment.like_count,
+        'reply_count': comment.reply_count,
+        'cursor': comment.path,
+        'replies': []
+    }
+
+def _load_reply_previews(parents):
+    """
+    逐层加载预览回复：每个父评论最多取 COMMENT_REPLY_PREVIEW_COUNT 条，
+    最多向下 COMMENT_REPLY_PREVIEW_DEPTH 层，每层一条窗口函数查询
+    """
+    previews = []
+    parent_ids = [comment.id for comment in parents]
+    for level in range(settings.COMMENT_REPLY_PREVIEW_DEPTH):
+        if not parent_ids:
+            break
+        level_comments = list(
+            Comment.objects.filter(parent_id__in=parent_ids)
+            .annotate(sibling_rank=Window(RowNumber(), partition_by=[F('parent_id')], order_by=F('path').asc()))
+            .filter(sibling_rank__lte=settings.COMMENT_REPLY_PREVIEW_COUNT)
+            .select_related('author__profile')
+            .order_by('path')
+        )
+        previews.extend(level_comments)
+        parent_ids = [comment.id for comment in level_comments if comment.reply_count]
+    return previews
+
+# 把一页评论及其预览回复组装为嵌套结构（共享部分）
+def build_comment_tree(comments):
+    comments = list(comments)
     tree = []
+    nodes = {}
     for comment in comments:
-        item = {
-            'id': comment.id,
-            'author': comment.author.username,
-            'content': comment.content,
-            'created_at': comment.created_at.strftime('%Y-%m-%d %H:%M'),
-            'like_count': comment.like_count,
-            'liked': comment.likes.filter(user=user).exists(),
-            'can_edit': comment.author == user,
-            'can_delete': comment.author == user,
-            'replies': build_comment_tree(comment.replies.all(), user)
-        }
-        tree.append(item)
+        nodes[comment.id] = _serialize_comment(comment)
+        tree.append(nodes[comment.id])
+    # 预览按路径排序，父评论一定先出现
+    for comment in sorted(_load_reply_previews(comments), key=lambda c: c.path):
+        nodes[comment.id] = _serialize_comment(comment)
+        nodes[comment.parent_id]['replies'].append(nodes[comment.id])
+    return tree
+
+def _walk_tree(tree):
+    for node in tree:
+        yield node
+        yield from _walk_tree(node['replies'])
+
+def _liked_queryset(nodes, user):
+    return CommentLike.objects.filter(user=user, comment_id__in=[node['id'] for node in nodes]).values_list('comment_id', flat=True)
+
+def _overlay(nodes, liked_ids, user):
+    for node in nodes:
+        node['liked'] = node['id'] in liked_ids
+        node['can_edit'] = node['author_id'] == user.id
+        node['can_delete'] = node['author_id'] == user.id
+
+def apply_viewer_overlay(tree, user):
+    """叠加访问者相关的字段：是否已点赞、能否编辑与删除"""
+    nodes = list(_walk_tree(tree))
+    _overlay(nodes, set(_liked_queryset(nodes, user)), user)
     return tree
+
+async def aapply_viewer_overlay(tree, user):
+    nodes = list(_walk_tree(tree))
+    _overlay(nodes, {comment_id async for comment_id in _liked_queryset(nodes, user)}, user)
+    return tree
+
+def _parse_cursor(request):
+    """游标是评论路径，只含数字"""
+    cursor = request.GET.get('cursor', '')
+    return cursor if cursor.isdigit() else ''
+
+def _page_after_cursor(queryset, cursor, page_size):
+    """按路径游标分页，多取一条用于判断是否还有下一页"""
+    if cursor:
+        queryset = queryset.filter(path__gt=cursor)
+    items = list(queryset.order_by('path')[:page_size + 1])
+    has_next = len(items) > page_size
+    items = items[:page_size]
+    return items, has_next, (items[-1].path if has_next else None)
+
+def _thread_page(queryset, cursor, page_size):
+    items, has_next, next_cursor = _page_after_cursor(queryset, cursor, page_size)
+    return {'tree': build_comment_tree(items), 'has_next': has_next, 'next_cursor': next_cursor}
     
 @login_required
 def comment_list(request, task_id):
     """
-    获取任务的评论树（用于AJAX请求）
+    获取任务的根评论（游标分页）及其预览回复（用于AJAX请求）
     """
-    task = get_object_or_404(Task, id=task_id)
-    root_comments = task.comments.filter(parent__isnull=True)
-    comment_tree = build_comment_tree(root_comments, request.user)
-    return JsonResponse({'comments': comment_tree})
+    task = get_object_or_404(Task.objects.only('id'), id=task_id)
+    cursor = _parse_cursor(request)
+    page = get_thread_page(task.id, f'roots:{cursor}', lambda: _thread_page(
+        task.comments.filter(depth=0).select_related('author__profile'), cursor, settings.COMMENT_PAGE_SIZE
+    ))
+    comment_tree = apply_viewer_overlay(page['tree'], request.user)
+    return JsonResponse({'comments': comment_tree, 'has_next': page['has_next'], 'next_cursor': page['next_cursor']})
+
+@async_login_required
+async def comment_list_async(request, task_id):
+    """
+    获取任务的根评论（异步版本，ASYNC_VIEWS 开启时使用）
+    """
+    try:
+        task = await Task.objects.only('id').aget(id=task_id)
+    except Task.DoesNotExist:
+        raise Http404('任务不存在')
+    cursor = _parse_cursor(request)
+    # 缓存后端是同步的，未命中时的分页查询也一并放到线程中执行
+    page = await sync_to_async(get_thread_page)(task.id, f'roots:{cursor}', lambda: _thread_page(
+        Comment.objects.filter(task_id=task.id, depth=0).select_related('author__profile'), cursor, settings.COMMENT_PAGE_SIZE
+    ))
+    comment_tree = await aapply_viewer_overlay(page['tree'], request.user)
+    return JsonResponse({'comments': comment_tree, 'has_next': page['has_next'], 'next_cursor': page['next_cursor']})
 
 @login_required
+def comment_replies(request, comment_id):
+    """
+    加载某条评论的更多回复（游标分页，用于AJAX请求）
+    """
+    comment = get_object_or_404(Comment.objects.only('id', 'task_id'), id=comment_id)
+    cursor = _parse_cursor(request)
+    page = get_thread_page(comment.task_id, f'replies:{comment.id}:{cursor}', lambda: _thread_page(
+        Comment.objects.filter(parent_id=comment.id).select_related('author__profile'), cursor, settings.COMMENT_REPLY_PAGE_SIZE
+    ))
+    reply_tree = apply_viewer_overlay(page['tree'], request.user)
+    return JsonResponse({'replies': reply_tree, 'has_next': page['has_next'], 'next_cursor': page['next_cursor']})
+
+@login_required
+@require_POST
 def comment_like(request, comment_id):
     """ 
-    点赞评论（AJAX） 
+    点赞评论（AJAX），与 like_comment 相同
     """
-    comment = get_object_or_404(Comment, id=comment_id)
-    user = request.user
-    liked = False
-    like_obj = CommentLike.objects.filter(comment=comment, user=user).first()
-    if like_obj:
-        like_obj.delete()
\ No newline at end of file
+    return like_comment(request, comment_id)
@@ -1,13 +1,28 @@
 # Gunicorn configuration file
 import multiprocessing
+import os
 
 # Server socket
 bind = "127.0.0.1:8000"
 backlog = 2048
 
 # Worker processes
-workers = multiprocessing.cpu_count() * 2 + 1
+# 运行模式（GUNICORN_PROFILE）：
+#   sync    每个进程同时处理一个请求（默认）
+#   gthread 每个进程使用线程池处理请求
+#   asgi    uvicorn worker 运行 TaskFlowPro.asgi，AJAX 接口使用异步视图
+profile = os.getenv("GUNICORN_PROFILE", "sync")
+wsgi_app = "TaskFlowPro.wsgi:application"
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
 worker_class = "sync"
+if profile == "gthread":
+    worker_class = "gthread"
+    threads = int(os.getenv("GUNICORN_THREADS", "4"))
+elif profile == "asgi":
+    wsgi_app = "TaskFlowPro.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+    # 请求在不同线程中访问数据库，持久连接无法复用
+    raw_env = ["ASYNC_VIEWS=1", "DB_CONN_MAX_AGE=0"]
 worker_connections = 1000
 timeout = 30
 keepalive = 2
@@ -16,6 +31,25 @@ keepalive = 2
 max_requests = 1000
 max_requests_jitter = 50
 
+# 主进程预先加载应用，worker fork 后共享已导入的模块、URL 与编译好的模板
+# 注意：预加载后 HUP 不会重新加载代码，发布新版本需要重启服务
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+
+def when_ready(server):
+    if preload_app:
+        from TaskFlowPro.warmup import warm_master
+        warm_master()
+
+
+def post_worker_init(worker):
+    from TaskFlowPro.diagnostics import install_signal_handler
+    from TaskFlowPro.warmup import warm_worker
+    warm_worker()
+    # kill -USR2 <worker pid>：开启内存跟踪 / 输出内存报告到日志
+    install_signal_handler()
+
+
 # Logging
 accesslog = "/var/log/gunicorn/access.log"
 errorlog = "/var/log/gunicorn/error.log"
@@ -0,0 +1,31 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Job, ScheduledJob, ScheduledRun
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'queue', 'status', 'attempts', 'run_at', 'duration_ms', 'created_at']
+    list_filter = ['status', 'queue', 'name']
+    search_fields = ['name', 'last_error']
+    readonly_fields = ['created_at', 'started_at', 'finished_at', 'duration_ms', 'locked_by', 'locked_at', 'last_error']
+    actions = ['requeue']
+
+    def requeue(self, request, queryset):
+        """把已放弃的任务重新排队"""
+        count = queryset.filter(status='dead').update(status='queued', attempts=0, run_at=timezone.now())
+        self.message_user(request, f'已重新排队 {count} 个任务')
+    requeue.short_description = '重新排队已放弃的任务'
+
+
+@admin.register(ScheduledJob)
+class ScheduledJobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'spec', 'next_run_at', 'last_run_at', 'locked_by', 'locked_until']
+    readonly_fields = ['spec', 'locked_by', 'locked_until', 'last_run_at']
+
+
+@admin.register(ScheduledRun)
+class ScheduledRunAdmin(admin.ModelAdmin):
+    list_display = ['name', 'node', 'started_at', 'duration_ms', 'success']
+    list_filter = ['success', 'name']
+    readonly_fields = ['name', 'node', 'started_at', 'finished_at', 'duration_ms', 'success', 'output']
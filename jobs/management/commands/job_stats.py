@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.utils import timezone
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = '输出后台任务的队列积压与执行耗时统计'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help='统计最近多少小时内结束的任务')
+
+    def handle(self, *args, **options):
+        counts = dict(Job.objects.order_by().values_list('status').annotate(count=Count('id')))
+        self.stdout.write('队列状态：' + '，'.join(
+            f'{label} {counts.get(value, 0)}' for value, label in Job.STATUS_CHOICES
+        ))
+
+        since = timezone.now() - timezone.timedelta(hours=options['hours'])
+        rows = Job.objects.duration_stats(since)
+        if not rows:
+            self.stdout.write(f'最近 {options["hours"]} 小时没有结束的任务')
+            return
+        self.stdout.write(f'{"任务":<50}{"次数":>8}{"放弃":>8}{"平均ms":>10}{"最大ms":>10}')
+        for row in rows:
+            self.stdout.write(
+                f'{row["name"]:<50}{row["total"]:>8}{row["dead"]:>8}{row["avg_ms"] or 0:>10.0f}{row["max_ms"] or 0:>10}'
+            )
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    """
+    分批删除已结束的后台任务记录
+
+    已完成的任务保留 JOB_RETENTION_DAYS 天，已放弃的任务保留 JOB_DEAD_RETENTION_DAYS 天供排查。
+    按 (status, finished_at) 索引取一批主键再删除，每批是一个独立的短事务。
+    """
+    help = '分批删除过期的已完成 / 已放弃后台任务'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批删除的数量')
+        parser.add_argument('--sleep', type=float, default=0.1, help='每批之间暂停的秒数')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        total = 0
+        for status, days in (('done', settings.JOB_RETENTION_DAYS), ('dead', settings.JOB_DEAD_RETENTION_DAYS)):
+            expired = Job.objects.filter(status=status, finished_at__lt=now - timezone.timedelta(days=days)).order_by('finished_at')
+            while True:
+                ids = list(expired.values_list('id', flat=True)[:options['batch_size']])
+                if not ids:
+                    break
+                deleted, _ = Job.objects.filter(id__in=ids).delete()
+                total += deleted
+                if len(ids) < options['batch_size']:
+                    break
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f'已删除后台任务 {total} 条'))
@@ -0,0 +1,53 @@
+import os
+import signal
+import socket
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+from jobs import scheduler
+
+
+class Command(BaseCommand):
+    """
+    定时任务调度进程
+
+    按 SCHEDULED_JOBS 的配置定期检查到期任务。可以在多个节点上同时运行，
+    每次到期只有一个节点执行（见 jobs.scheduler）。
+    """
+    help = '启动定时任务调度进程'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tick', type=float, default=settings.SCHEDULER_TICK_SECONDS, help='检查间隔（秒）')
+        parser.add_argument('--once', action='store_true', help='只检查一次后退出')
+
+    def handle(self, *args, **options):
+        self.stopping = threading.Event()
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        node = f'{socket.gethostname()}:{os.getpid()}'
+        configs = settings.SCHEDULED_JOBS
+        scheduler.sync_schedules(configs, timezone.now())
+        self.stdout.write(f'调度进程 {node} 启动，共 {len(configs)} 个定时任务')
+
+        while not self.stopping.is_set():
+            close_old_connections()
+            for name, config in configs.items():
+                if self.stopping.is_set():
+                    break
+                lock_seconds = config.get('timeout', settings.SCHEDULER_LOCK_SECONDS)
+                if not scheduler.claim(name, node, timezone.now(), lock_seconds):
+                    continue
+                record = scheduler.run(name, config, node)
+                status = self.style.SUCCESS('成功') if record.success else self.style.ERROR('失败')
+                self.stdout.write(f'{name} {status}，耗时 {record.duration_ms} ms')
+            if options['once']:
+                break
+            self.stopping.wait(options['tick'])
+        self.stdout.write('调度进程已退出')
+
+    def _stop(self, signum, frame):
+        self.stopping.set()
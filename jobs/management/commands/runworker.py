@@ -0,0 +1,109 @@
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from jobs.queue import claim, execute, recover_stale
+
+logger = logging.getLogger(__name__)
+
+# 数据库出错后的等待时间按连续失败次数翻倍，不超过该上限（秒）
+ERROR_BACKOFF_MAX_SECONDS = 60
+
+
+class Command(BaseCommand):
+    """
+    执行后台任务
+
+    每个线程独立领取并执行任务，收到 SIGTERM / SIGINT 后不再领取新任务，
+    等待执行中的任务完成后退出。主线程定期把超时未完成的任务重新排队。
+    """
+    help = '启动后台任务 worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queue', default='default', help='要处理的队列')
+        parser.add_argument('--concurrency', type=int, default=settings.JOB_WORKER_CONCURRENCY, help='并发线程数')
+        parser.add_argument('--poll-interval', type=float, default=settings.JOB_POLL_INTERVAL_SECONDS,
+                            help='队列为空时的轮询间隔（秒）')
+        parser.add_argument('--burst', action='store_true', help='队列清空后退出')
+
+    def handle(self, *args, **options):
+        self.stopping = threading.Event()
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        prefix = f'{socket.gethostname()}:{os.getpid()}'
+        threads = [
+            threading.Thread(
+                target=self._work,
+                args=(f'{prefix}:{index}', options['queue'], options['poll_interval'], options['burst']),
+                daemon=True,
+            )
+            for index in range(max(options['concurrency'], 1))
+        ]
+        self.stdout.write(f'worker {prefix} 启动，队列 {options["queue"]}，并发 {len(threads)}')
+        for thread in threads:
+            thread.start()
+
+        next_recovery = 0
+        while any(thread.is_alive() for thread in threads):
+            if time.monotonic() >= next_recovery:
+                try:
+                    requeued, dead = recover_stale(settings.JOB_LOCK_TIMEOUT_SECONDS)
+                except Exception:
+                    logger.exception('重新排队超时任务失败')
+                    connection.close()
+                    next_recovery = time.monotonic() + ERROR_BACKOFF_MAX_SECONDS
+                else:
+                    if requeued or dead:
+                        self.stdout.write(self.style.WARNING(f'超时任务：重新排队 {requeued} 个，放弃 {dead} 个'))
+                    next_recovery = time.monotonic() + settings.JOB_LOCK_TIMEOUT_SECONDS / 2
+            for thread in threads:
+                thread.join(timeout=1)
+        connection.close()
+        self.stdout.write('worker 已退出')
+
+    def _stop(self, signum, frame):
+        self.stdout.write('收到退出信号，等待执行中的任务完成...')
+        self.stopping.set()
+
+    def _work(self, worker_id, queue, poll_interval, burst):
+        failures = 0
+        try:
+            while not self.stopping.is_set():
+                try:
+                    worked = self._work_once(worker_id, queue)
+                    failures = 0
+                except Exception:
+                    # 数据库暂时不可用等错误不能让线程退出；执行到一半的任务由 recover_stale 重新排队
+                    failures += 1
+                    delay = min(max(poll_interval, 1) * 2 ** (failures - 1), ERROR_BACKOFF_MAX_SECONDS)
+                    logger.exception('worker %s 出错（连续 %s 次），%s 秒后重试', worker_id, failures, delay)
+                    self.stdout.write(self.style.ERROR(f'worker {worker_id} 出错，{delay} 秒后重试'))
+                    connection.close()
+                    self.stopping.wait(delay)
+                    continue
+                if not worked:
+                    if burst:
+                        return
+                    self.stopping.wait(poll_interval)
+        finally:
+            # 每个线程有自己的数据库连接
+            connection.close()
+
+    def _work_once(self, worker_id, queue):
+        """领取并执行一批任务，队列为空时返回 False"""
+        jobs = claim(worker_id, queue)
+        for job in jobs:
+            if execute(job):
+                self.stdout.write(f'{job} 完成，耗时 {job.duration_ms} ms')
+            else:
+                self.stdout.write(self.style.ERROR(
+                    f'{job} 失败（第 {job.attempts} 次，{job.get_status_display()}），耗时 {job.duration_ms} ms'
+                ))
+        return bool(jobs)
@@ -0,0 +1,101 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScheduledJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        max_length=100, unique=True, verbose_name="任务名称"
+                    ),
+                ),
+                ("spec", models.CharField(max_length=100, verbose_name="调度规则")),
+                ("next_run_at", models.DateTimeField(verbose_name="下次执行时间")),
+                (
+                    "locked_by",
+                    models.CharField(
+                        blank=True, max_length=100, verbose_name="执行节点"
+                    ),
+                ),
+                (
+                    "locked_until",
+                    models.DateTimeField(blank=True, null=True, verbose_name="锁定至"),
+                ),
+                (
+                    "last_run_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="上次执行时间"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "定时任务",
+                "verbose_name_plural": "定时任务",
+                "ordering": ["name"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ScheduledRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, verbose_name="任务名称")),
+                ("node", models.CharField(max_length=100, verbose_name="执行节点")),
+                ("started_at", models.DateTimeField(verbose_name="开始时间")),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="结束时间"
+                    ),
+                ),
+                (
+                    "duration_ms",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="耗时（毫秒）"
+                    ),
+                ),
+                (
+                    "success",
+                    models.BooleanField(default=False, verbose_name="是否成功"),
+                ),
+                ("output", models.TextField(blank=True, verbose_name="输出")),
+            ],
+            options={
+                "verbose_name": "定时任务执行记录",
+                "verbose_name_plural": "定时任务执行记录",
+                "ordering": ["-started_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["name", "-started_at"],
+                        name="jobs_schedu_name_1874da_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0002_scheduledjob_scheduledrun"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["status", "finished_at"], name="jobs_job_status_d700c4_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,114 @@
+from django.db import models
+from django.db.models import Avg, Count, Max, Q
+from django.utils import timezone
+
+
+class JobQuerySet(models.QuerySet):
+    def ready(self, queue, now):
+        """可以执行的任务：排队中且已到执行时间"""
+        return self.filter(queue=queue, status='queued', run_at__lte=now)
+
+    def duration_stats(self, since):
+        """按任务名称统计执行次数、失败次数与耗时"""
+        return (
+            self.filter(finished_at__gte=since)
+            .values('name')
+            .annotate(
+                total=Count('id'),
+                dead=Count('id', filter=Q(status='dead')),
+                avg_ms=Avg('duration_ms'),
+                max_ms=Max('duration_ms'),
+            )
+            .order_by('name')
+        )
+
+
+class Job(models.Model):
+    """
+    后台任务
+
+    由 jobs.queue.enqueue() 写入，runworker 命令领取并执行。
+    失败后按指数退避重试，超过最大次数后标记为已放弃（死信），保留错误信息供排查。
+    """
+    STATUS_CHOICES = (
+        ('queued', '排队中'),
+        ('running', '执行中'),
+        ('done', '已完成'),
+        ('dead', '已放弃'),
+    )
+
+    name = models.CharField(max_length=100, verbose_name='任务名称')
+    queue = models.CharField(max_length=50, default='default', verbose_name='队列')
+    payload = models.JSONField(default=dict, blank=True, verbose_name='参数')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued', verbose_name='状态')
+    attempts = models.PositiveIntegerField(default=0, verbose_name='已执行次数')
+    max_attempts = models.PositiveIntegerField(default=3, verbose_name='最大执行次数')
+    run_at = models.DateTimeField(default=timezone.now, verbose_name='计划执行时间')
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name='执行者')
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name='领取时间')
+    last_error = models.TextField(blank=True, verbose_name='最近错误')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='开始时间')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='结束时间')
+    duration_ms = models.PositiveIntegerField(null=True, blank=True, verbose_name='耗时（毫秒）')
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = '后台任务'
+        verbose_name_plural = '后台任务'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['queue', 'status', 'run_at']),
+            models.Index(fields=['status', 'locked_at']),
+            # purge_jobs 按结束时间清理
+            models.Index(fields=['status', 'finished_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk}"
+
+
+class ScheduledJob(models.Model):
+    """
+    定时任务的调度状态，同时作为多节点之间的锁
+
+    节点通过条件 UPDATE 抢占到期的行（next_run_at 已到且未被锁定），
+    只有更新成功的节点执行本次任务，其余节点跳过。
+    """
+    name = models.CharField(max_length=100, unique=True, verbose_name='任务名称')
+    spec = models.CharField(max_length=100, verbose_name='调度规则')
+    next_run_at = models.DateTimeField(verbose_name='下次执行时间')
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name='执行节点')
+    locked_until = models.DateTimeField(null=True, blank=True, verbose_name='锁定至')
+    last_run_at = models.DateTimeField(null=True, blank=True, verbose_name='上次执行时间')
+
+    class Meta:
+        verbose_name = '定时任务'
+        verbose_name_plural = '定时任务'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class ScheduledRun(models.Model):
+    """定时任务的执行记录"""
+    name = models.CharField(max_length=100, verbose_name='任务名称')
+    node = models.CharField(max_length=100, verbose_name='执行节点')
+    started_at = models.DateTimeField(verbose_name='开始时间')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='结束时间')
+    duration_ms = models.PositiveIntegerField(null=True, blank=True, verbose_name='耗时（毫秒）')
+    success = models.BooleanField(default=False, verbose_name='是否成功')
+    output = models.TextField(blank=True, verbose_name='输出')
+
+    class Meta:
+        verbose_name = '定时任务执行记录'
+        verbose_name_plural = '定时任务执行记录'
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['name', '-started_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} @ {self.started_at:%Y-%m-%d %H:%M}"
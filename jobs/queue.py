@@ -0,0 +1,128 @@
+"""
+数据库后台任务队列
+
+用 @job 注册任务函数，调用 func.delay(**kwargs) 入队，由 runworker 命令执行。
+PostgreSQL 上用 SELECT ... FOR UPDATE SKIP LOCKED 领取任务，多个 worker
+互不阻塞；SQLite 等不支持行锁的数据库用条件 UPDATE 抢占，只有把状态从
+排队中改为执行中的那个 worker 领取成功。
+"""
+
+import logging
+import time
+import traceback
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+
+
+def job(name=None, queue='default', max_attempts=None):
+    """注册后台任务，参数必须可以 JSON 序列化"""
+    def decorator(func):
+        job_name = name or f'{func.__module__}.{func.__name__}'
+        REGISTRY[job_name] = func
+        func.job_name = job_name
+        func.delay = lambda **kwargs: enqueue(job_name, kwargs, queue=queue, max_attempts=max_attempts)
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, queue='default', run_at=None, max_attempts=None):
+    """写入一个后台任务；JOBS_EAGER 开启时（开发环境）直接在当前进程执行"""
+    if name not in REGISTRY:
+        raise LookupError(f'未注册的后台任务：{name}')
+    payload = payload or {}
+    if settings.JOBS_EAGER:
+        REGISTRY[name](**payload)
+        return None
+    return Job.objects.create(
+        name=name,
+        queue=queue,
+        payload=payload,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+def claim(worker_id, queue='default', limit=1):
+    """领取最多 limit 个可执行的任务"""
+    now = timezone.now()
+    claimed = {
+        'status': 'running',
+        'locked_by': worker_id,
+        'locked_at': now,
+        'started_at': now,
+        'attempts': F('attempts') + 1,
+    }
+    candidates = Job.objects.ready(queue, now).order_by('run_at', 'id').values_list('id', flat=True)
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job_ids = list(candidates.select_for_update(skip_locked=True)[:limit])
+            Job.objects.filter(id__in=job_ids).update(**claimed)
+    else:
+        job_ids = [
+            job_id for job_id in candidates[:limit]
+            if Job.objects.filter(id=job_id, status='queued').update(**claimed)
+        ]
+    return list(Job.objects.filter(id__in=job_ids).order_by('run_at', 'id'))
+
+
+def retry_delay(attempts):
+    """指数退避：第 n 次失败后等待 base * 2^(n-1) 秒，不超过上限"""
+    delay = settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0)
+    return min(delay, settings.JOB_RETRY_BACKOFF_MAX_SECONDS)
+
+
+def execute(job):
+    """执行一个已领取的任务并记录结果，返回是否成功"""
+    started = time.monotonic()
+    try:
+        handler = REGISTRY.get(job.name)
+        if handler is None:
+            raise LookupError(f'未注册的后台任务：{job.name}')
+        handler(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = 'dead'
+            logger.error('后台任务 %s 已放弃（执行 %s 次）', job, job.attempts)
+        else:
+            job.status = 'queued'
+            job.run_at = timezone.now() + timezone.timedelta(seconds=retry_delay(job.attempts))
+            logger.warning('后台任务 %s 执行失败，%s 后重试', job, job.run_at)
+    else:
+        job.status = 'done'
+        job.last_error = ''
+
+    job.duration_ms = int((time.monotonic() - started) * 1000)
+    job.finished_at = timezone.now()
+    Job.objects.filter(pk=job.pk, status='running', locked_by=job.locked_by).update(
+        status=job.status,
+        run_at=job.run_at,
+        last_error=job.last_error,
+        finished_at=job.finished_at,
+        duration_ms=job.duration_ms,
+        locked_by='',
+        locked_at=None,
+    )
+    return job.status == 'done'
+
+
+def recover_stale(timeout_seconds):
+    """worker 异常退出后遗留的执行中任务：重新排队，次数用尽的直接放弃"""
+    stale = Job.objects.filter(
+        status='running',
+        locked_at__lt=timezone.now() - timezone.timedelta(seconds=timeout_seconds),
+    )
+    dead = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='dead', last_error='执行超时', locked_by='', locked_at=None, finished_at=timezone.now()
+    )
+    requeued = stale.update(status='queued', locked_by='', locked_at=None)
+    return requeued, dead
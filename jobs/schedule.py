@@ -0,0 +1,106 @@
+"""
+定时任务的调度规则
+
+支持两种写法：interval（固定间隔秒数）与 cron（五段式：分 时 日 月 周，
+按 TIME_ZONE 本地时间计算，支持 *、*/n、a-b、a-b/n 以及逗号分隔的列表）。
+"""
+
+from datetime import timedelta
+
+from django.utils import timezone
+
+CRON_FIELDS = (
+    ('minute', 0, 59),
+    ('hour', 0, 23),
+    ('day', 1, 31),
+    ('month', 1, 12),
+    ('weekday', 0, 7),
+)
+
+
+def _parse_field(text, low, high):
+    values = set()
+    for part in text.split(','):
+        step = 1
+        if '/' in part:
+            part, step = part.split('/', 1)
+            step = int(step)
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = (int(value) for value in part.split('-', 1))
+        else:
+            start = end = int(part)
+            if step != 1:
+                end = high
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f'cron 字段超出范围：{text}')
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    def __init__(self, expression):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f'cron 表达式应为 5 段：{expression}')
+        fields = {
+            name: _parse_field(part, low, high)
+            for part, (name, low, high) in zip(parts, CRON_FIELDS)
+        }
+        self.minutes = fields['minute']
+        self.hours = fields['hour']
+        self.days = fields['day']
+        self.months = fields['month']
+        # 周日可以写作 0 或 7
+        self.weekdays = {value % 7 for value in fields['weekday']}
+        # 日与周都有限制时满足其一即可（与 cron 一致）
+        self.day_restricted = parts[2] != '*'
+        self.weekday_restricted = parts[4] != '*'
+
+    def _day_matches(self, moment):
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, now):
+        moment = timezone.localtime(now).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 4)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return timezone.localtime(moment)
+        raise ValueError('cron 表达式没有可执行的时间')
+
+
+class IntervalSchedule:
+    def __init__(self, seconds):
+        if seconds <= 0:
+            raise ValueError('interval 必须为正数')
+        self.seconds = seconds
+
+    def next_after(self, now):
+        return now + timedelta(seconds=self.seconds)
+
+
+def parse_schedule(config):
+    """根据 SCHEDULED_JOBS 中的一项配置返回调度规则"""
+    if 'cron' in config:
+        return CronSchedule(config['cron'])
+    if 'interval' in config:
+        return IntervalSchedule(config['interval'])
+    raise ValueError('定时任务需要配置 cron 或 interval')
+
+
+def schedule_spec(config):
+    """调度规则的文本表示，配置变化时据此重新计算下次执行时间"""
+    return f"cron:{config['cron']}" if 'cron' in config else f"interval:{config['interval']}"
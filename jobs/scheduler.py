@@ -0,0 +1,66 @@
+"""
+定时任务调度
+
+SCHEDULED_JOBS 中的每一项对应 ScheduledJob 表中的一行。多个节点可以同时
+运行 runscheduler，到期时各节点用条件 UPDATE 抢占该行，抢到的节点执行任务、
+写入执行记录并计算下次执行时间；节点异常退出时锁在 locked_until 后自动失效。
+"""
+
+import io
+import time
+import traceback
+
+from django.core.management import call_command
+from django.db.models import Q
+from django.utils import timezone
+from .models import ScheduledJob, ScheduledRun
+from .schedule import parse_schedule, schedule_spec
+
+OUTPUT_LIMIT = 10000
+
+
+def sync_schedules(configs, now):
+    """确保每个定时任务都有调度行，调度规则变化时重新计算下次执行时间"""
+    for name, config in configs.items():
+        spec = schedule_spec(config)
+        next_run_at = parse_schedule(config).next_after(now)
+        state, created = ScheduledJob.objects.get_or_create(
+            name=name, defaults={'spec': spec, 'next_run_at': next_run_at}
+        )
+        if not created and state.spec != spec:
+            ScheduledJob.objects.filter(pk=state.pk).update(spec=spec, next_run_at=next_run_at)
+
+
+def claim(name, node, now, lock_seconds):
+    """抢占到期的定时任务，返回是否由本节点执行"""
+    return ScheduledJob.objects.filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now),
+        name=name,
+        next_run_at__lte=now,
+    ).update(locked_by=node, locked_until=now + timezone.timedelta(seconds=lock_seconds)) == 1
+
+
+def run(name, config, node):
+    """执行一个已抢占的定时任务，记录执行结果并释放锁"""
+    record = ScheduledRun.objects.create(name=name, node=node, started_at=timezone.now())
+    output = io.StringIO()
+    started = time.monotonic()
+    try:
+        call_command(config['command'], *config.get('args', ()), stdout=output, stderr=output,
+                     **config.get('options', {}))
+        record.success = True
+    except Exception:
+        output.write(traceback.format_exc())
+
+    record.duration_ms = int((time.monotonic() - started) * 1000)
+    record.finished_at = timezone.now()
+    record.output = output.getvalue()[-OUTPUT_LIMIT:]
+    record.save(update_fields=['success', 'duration_ms', 'finished_at', 'output'])
+
+    ScheduledJob.objects.filter(name=name, locked_by=node).update(
+        next_run_at=parse_schedule(config).next_after(record.finished_at),
+        last_run_at=record.started_at,
+        locked_by='',
+        locked_until=None,
+    )
+    return record
@@ -0,0 +1,193 @@
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .management.commands.runworker import Command as RunWorkerCommand
+from . import scheduler
+from .models import Job, ScheduledJob
+from .queue import REGISTRY, claim, execute, recover_stale
+from .schedule import CronSchedule
+
+
+def failing_job():
+    raise RuntimeError('失败')
+
+
+@override_settings(JOB_RETRY_BACKOFF_SECONDS=10, JOB_RETRY_BACKOFF_MAX_SECONDS=3600)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        REGISTRY['tests.noop'] = lambda **kwargs: None
+        REGISTRY['tests.failing'] = failing_job
+        self.addCleanup(REGISTRY.pop, 'tests.noop')
+        self.addCleanup(REGISTRY.pop, 'tests.failing')
+
+    def create_job(self, name='tests.noop', **kwargs):
+        return Job.objects.create(name=name, max_attempts=2, **kwargs)
+
+    def test_claim_takes_ready_jobs_once(self):
+        first = self.create_job()
+        second = self.create_job()
+        self.create_job(run_at=timezone.now() + timezone.timedelta(hours=1))
+        self.create_job(queue='other')
+
+        claimed = claim('worker:0', limit=5)
+        self.assertEqual([job.pk for job in claimed], [first.pk, second.pk])
+        self.assertTrue(all(job.status == 'running' and job.attempts == 1 and job.locked_by == 'worker:0' for job in claimed))
+        self.assertEqual(claim('worker:1', limit=5), [])
+
+    def test_failed_job_retried_with_backoff_then_dead(self):
+        job = self.create_job('tests.failing')
+        [job] = claim('worker:0')
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            self.assertFalse(execute(job))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+        self.assertGreater(job.run_at, timezone.now() + timezone.timedelta(seconds=5))
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        [job] = claim('worker:0')
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertFalse(execute(job))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'dead')
+        self.assertIn('RuntimeError', job.last_error)
+
+    def test_successful_job_done(self):
+        self.create_job(payload={'value': 1})
+        [job] = claim('worker:0')
+        self.assertTrue(execute(job))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), ('done', ''))
+
+    def test_recover_stale_requeues_or_gives_up(self):
+        locked_at = timezone.now() - timezone.timedelta(hours=1)
+        retry = self.create_job(status='running', attempts=1, locked_by='gone', locked_at=locked_at)
+        give_up = self.create_job(status='running', attempts=2, locked_by='gone', locked_at=locked_at)
+        self.create_job(status='running', attempts=1, locked_by='alive', locked_at=timezone.now())
+
+        self.assertEqual(recover_stale(600), (1, 1))
+        self.assertEqual(Job.objects.get(pk=retry.pk).status, 'queued')
+        self.assertEqual(Job.objects.get(pk=give_up.pk).status, 'dead')
+
+
+class RunWorkerTests(TestCase):
+    def test_database_error_does_not_stop_worker(self):
+        command = RunWorkerCommand(stdout=StringIO())
+        command.stopping = mock.Mock()
+        command.stopping.is_set.side_effect = [False, False, True]
+        with mock.patch('jobs.management.commands.runworker.claim', side_effect=[OperationalError('database is locked'), []]), \
+                self.assertLogs('jobs.management.commands.runworker', 'ERROR'):
+            command._work('test:0', 'default', 1, burst=False)
+        # 第一次出错后退避等待，第二次队列为空按轮询间隔等待
+        self.assertEqual([call.args[0] for call in command.stopping.wait.call_args_list], [1, 1])
+
+
+@override_settings(JOB_RETENTION_DAYS=7, JOB_DEAD_RETENTION_DAYS=30)
+class PurgeJobsTests(TestCase):
+    def create_job(self, status, days_ago):
+        finished_at = timezone.now() - timezone.timedelta(days=days_ago) if status in ('done', 'dead') else None
+        return Job.objects.create(name='test', status=status, finished_at=finished_at)
+
+    def test_purges_only_expired_finished_jobs(self):
+        old_done = self.create_job('done', 8)
+        recent_done = self.create_job('done', 1)
+        old_dead = self.create_job('dead', 31)
+        kept_dead = self.create_job('dead', 8)
+        queued = self.create_job('queued', 0)
+
+        call_command('purge_jobs', batch_size=1, sleep=0, stdout=StringIO())
+
+        remaining = set(Job.objects.values_list('pk', flat=True))
+        self.assertEqual(remaining, {recent_done.pk, kept_dead.pk, queued.pk})
+        self.assertNotIn(old_done.pk, remaining)
+        self.assertNotIn(old_dead.pk, remaining)
+
+
+def local(*args):
+    return timezone.make_aware(datetime(*args))
+
+
+class CronScheduleTests(TestCase):
+    def assertNext(self, expression, now, expected):
+        self.assertEqual(CronSchedule(expression).next_after(now), expected)
+
+    def test_step_fields(self):
+        self.assertNext('*/15 * * * *', local(2026, 10, 19, 10, 7), local(2026, 10, 19, 10, 15))
+        self.assertNext('*/15 * * * *', local(2026, 10, 19, 10, 45, 30), local(2026, 10, 19, 11, 0))
+        # 单个起点加步长表示从起点到上限
+        self.assertNext('5/20 * * * *', local(2026, 10, 19, 10, 26), local(2026, 10, 19, 10, 45))
+
+    def test_range_and_list_fields(self):
+        self.assertNext('0 9-17/4 * * *', local(2026, 10, 19, 14, 0), local(2026, 10, 19, 17, 0))
+        self.assertNext('0 9-17/4 * * *', local(2026, 10, 19, 17, 0), local(2026, 10, 20, 9, 0))
+        # 恰好在执行时间上时取下一次
+        self.assertNext('30 8,20 * * *', local(2026, 10, 19, 8, 30), local(2026, 10, 19, 20, 30))
+        self.assertNext('0 9 * * 1-5', local(2026, 10, 23, 18, 0), local(2026, 10, 26, 9, 0))
+
+    def test_sunday_as_seven(self):
+        self.assertNext('0 0 * * 7', local(2026, 10, 19, 0, 0), local(2026, 10, 25, 0, 0))
+        self.assertNext('0 0 * * 0', local(2026, 10, 19, 0, 0), local(2026, 10, 25, 0, 0))
+
+    def test_day_or_weekday(self):
+        # 日与周都有限制时满足其一即可：20 日（周二）或周五
+        self.assertNext('0 0 20 * 5', local(2026, 10, 19, 12, 0), local(2026, 10, 20, 0, 0))
+        self.assertNext('0 0 20 * 5', local(2026, 10, 20, 0, 0), local(2026, 10, 23, 0, 0))
+        # 只限制其一时按该字段匹配
+        self.assertNext('0 0 20 * *', local(2026, 10, 20, 0, 0), local(2026, 11, 20, 0, 0))
+
+    def test_february_29(self):
+        self.assertNext('0 0 29 2 *', local(2026, 3, 1, 0, 0), local(2028, 2, 29, 0, 0))
+
+    def test_local_time(self):
+        # UTC 01:30 即本地 09:30，当天的 9 点已过
+        now = datetime(2026, 10, 19, 1, 30, tzinfo=timezone.utc)
+        self.assertEqual(CronSchedule('0 9 * * *').next_after(now), local(2026, 10, 20, 9, 0))
+
+    def test_invalid_expressions(self):
+        for expression in ('* * * *', '60 * * * *', '* * 0 * *', '5-1 * * * *', '*/0 * * * *'):
+            with self.subTest(expression=expression), self.assertRaises(ValueError):
+                CronSchedule(expression)
+
+
+class SchedulerClaimTests(TestCase):
+    config = {'command': 'purge_jobs', 'cron': '0 3 * * *'}
+
+    def setUp(self):
+        self.now = local(2026, 10, 19, 3, 0)
+        ScheduledJob.objects.create(name='purge_jobs', spec='cron:0 3 * * *', next_run_at=self.now)
+
+    def test_due_run_claimed_once_across_nodes(self):
+        self.assertTrue(scheduler.claim('purge_jobs', 'node-a', self.now, 600))
+        self.assertFalse(scheduler.claim('purge_jobs', 'node-b', self.now, 600))
+        self.assertFalse(scheduler.claim('purge_jobs', 'node-b', self.now + timedelta(seconds=5), 600))
+
+        with mock.patch('jobs.scheduler.call_command'):
+            record = scheduler.run('purge_jobs', self.config, 'node-a')
+        self.assertTrue(record.success)
+        state = ScheduledJob.objects.get(name='purge_jobs')
+        self.assertEqual((state.locked_by, state.locked_until), ('', None))
+        self.assertGreater(state.next_run_at, self.now)
+
+        # 本次已执行，下一次到期前两个节点都抢不到；到期后仍只有一个节点抢到
+        self.assertFalse(scheduler.claim('purge_jobs', 'node-b', self.now + timedelta(seconds=30), 600))
+        self.assertTrue(scheduler.claim('purge_jobs', 'node-b', state.next_run_at, 600))
+        self.assertFalse(scheduler.claim('purge_jobs', 'node-a', state.next_run_at, 600))
+
+    def test_not_due_not_claimed(self):
+        self.assertFalse(scheduler.claim('purge_jobs', 'node-a', self.now - timedelta(seconds=1), 600))
+
+    def test_expired_lock_reclaimable(self):
+        self.assertTrue(scheduler.claim('purge_jobs', 'node-a', self.now, 60))
+        self.assertFalse(scheduler.claim('purge_jobs', 'node-b', self.now + timedelta(seconds=59), 60))
+        self.assertTrue(scheduler.claim('purge_jobs', 'node-b', self.now + timedelta(seconds=61), 60))
+        self.assertEqual(ScheduledJob.objects.get(name='purge_jobs').locked_by, 'node-b')
+
+        # 原节点结束时锁已不属于它，不会覆盖新节点的状态
+        with mock.patch('jobs.scheduler.call_command'):
+            scheduler.run('purge_jobs', self.config, 'node-a')
+        self.assertEqual(ScheduledJob.objects.get(name='purge_jobs').locked_by, 'node-b')
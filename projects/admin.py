@@ -1,3 +1,74 @@
 from django.contrib import admin
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from search.autocomplete import invalidate_autocomplete
+from tasks.admin import BackgroundDeletionAdmin
+from tasks.models import Task, TaskQuerySet
+from TaskFlowPro.pagination import EstimatedCountPaginator
+from users.stats import invalidate_dashboard_stats
+from .models import Project
 
-# Register your models here.
+
+def _task_count(**filters):
+    tasks = Task.objects.filter(project=OuterRef('pk'), **filters).order_by().values('project').annotate(count=Count('id'))
+    return Coalesce(Subquery(tasks.values('count')), 0)
+
+
+@admin.register(Project)
+class ProjectAdmin(BackgroundDeletionAdmin):
+    list_display = ['name', 'owner', 'is_active', 'member_count', 'task_count', 'open_task_count', 'created_at']
+    list_filter = ['is_active']
+    list_select_related = ['owner']
+    search_fields = ['name']
+    autocomplete_fields = ['owner', 'members']
+    readonly_fields = ['created_at', 'updated_at']
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    actions = ['archive', 'restore']
+
+    def get_queryset(self, request):
+        # 各计数都是只针对当前页项目的相关子查询，走 (project, status, ...) 索引
+        members = Project.members.through.objects.filter(project=OuterRef('pk')).order_by().values('project').annotate(count=Count('id'))
+        return super().get_queryset(request).annotate(
+            _member_count=Coalesce(Subquery(members.values('count')), 0),
+            _task_count=_task_count(),
+            _open_task_count=_task_count(status__in=TaskQuerySet.OPEN_STATUSES),
+        )
+
+    def member_count(self, obj):
+        return obj._member_count
+    member_count.short_description = '成员数'
+
+    def task_count(self, obj):
+        return obj._task_count
+    task_count.short_description = '任务数'
+
+    def open_task_count(self, obj):
+        return obj._open_task_count
+    open_task_count.short_description = '未完成任务'
+
+    def _set_active(self, request, queryset, is_active):
+        """一条 UPDATE 修改激活状态，并失效成员的统计与选择框缓存（QuerySet.update 不触发 post_save）"""
+        changed = queryset.filter(~Q(is_active=is_active))
+        with transaction.atomic():
+            member_ids = set(
+                Project.members.through.objects.filter(project__in=changed.values('pk'))
+                .values_list('user_id', flat=True).distinct()
+            )
+            count = changed.update(is_active=is_active, updated_at=timezone.now())
+            if count:
+                transaction.on_commit(lambda: invalidate_dashboard_stats(member_ids))
+                invalidate_autocomplete()
+        return count
+
+    def archive(self, request, queryset):
+        count = self._set_active(request, queryset, False)
+        self.message_user(request, f'已归档 {count} 个项目')
+    archive.short_description = '归档所选项目'
+
+    def restore(self, request, queryset):
+        count = self._set_active(request, queryset, True)
+        self.message_user(request, f'已恢复 {count} 个项目')
+    restore.short_description = '恢复所选项目'
@@ -2,6 +2,26 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+class ProjectQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """用户可选择的激活项目：管理员可见全部，其他人只可见自己参与的项目"""
+        projects = self.filter(is_active=True)
+        if user.profile.is_admin:
+            return projects
+        return projects.filter(members=user)
+
+    def member_users(self):
+        """这些项目的成员（去重）"""
+        return User.objects.filter(projects__in=self.values('id')).distinct()
+
+
+class ProjectManager(models.Manager.from_queryset(ProjectQuerySet)):
+    """默认不返回已标记删除、等待后台清理的项目"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at=None)
+
+
 class Project(models.Model):
     """
     项目模型
@@ -13,6 +33,9 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
     is_active = models.BooleanField(default=True, verbose_name='是否激活')
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True, verbose_name='删除时间')
+
+    objects = ProjectManager()
     
     class Meta:
         verbose_name = '项目'
@@ -1,3 +1,69 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from tasks.models import Deletion, Task
+from .models import Project
 
-# Create your tests here.
+
+class ProjectTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='pass')
+        cls.member = User.objects.create_user('member', password='pass')
+        cls.outsider = User.objects.create_user('outsider', password='pass')
+        cls.project = Project.objects.create(name='成员项目', owner=cls.owner)
+        cls.project.members.add(cls.owner, cls.member)
+        cls.other_project = Project.objects.create(name='其他项目', owner=cls.outsider)
+        cls.other_project.members.add(cls.outsider)
+
+    def detail(self, project=None, **headers):
+        return self.client.get(reverse('projects:project_detail', args=[(project or self.project).pk]), **headers)
+
+
+class ProjectPermissionTests(ProjectTestMixin, TestCase):
+    def test_list_shows_member_projects_only(self):
+        self.client.force_login(self.member)
+        content = self.client.get(reverse('projects:project_list')).content.decode()
+        self.assertIn('成员项目', content)
+        self.assertNotIn('其他项目', content)
+
+    def test_detail_requires_membership(self):
+        self.client.force_login(self.member)
+        self.assertEqual(self.detail().status_code, 200)
+        self.assertEqual(self.detail(self.other_project).status_code, 404)
+
+    def test_admin_sees_all_projects(self):
+        self.outsider.profile.role = 'admin'
+        self.outsider.profile.save()
+        self.client.force_login(self.outsider)
+        self.assertEqual(self.detail().status_code, 200)
+
+    @override_settings(JOBS_EAGER=False)
+    def test_only_owner_can_delete(self):
+        self.client.force_login(self.member)
+        self.assertEqual(self.client.post(reverse('projects:project_delete', args=[self.project.pk])).status_code, 403)
+        self.assertFalse(Deletion.objects.exists())
+
+        self.client.force_login(self.owner)
+        self.client.post(reverse('projects:project_delete', args=[self.project.pk]))
+        self.assertTrue(Deletion.objects.filter(target='project', object_id=self.project.pk).exists())
+        self.assertEqual(self.detail().status_code, 404)
+
+
+class ProjectDetailConditionalGetTests(ProjectTestMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(self.member)
+
+    def test_unchanged_project_returns_304(self):
+        etag = self.detail()['ETag']
+        self.assertEqual(self.detail(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_task_change_changes_etag(self):
+        etag = self.detail()['ETag']
+        Task.objects.create(title='新任务', project=self.project, creator=self.owner, assignee=self.member)
+        self.assertEqual(self.detail(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_member_change_changes_etag(self):
+        etag = self.detail()['ETag']
+        self.project.members.remove(self.owner)
+        self.assertEqual(self.detail(HTTP_IF_NONE_MATCH=etag).status_code, 200)
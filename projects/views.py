@@ -4,8 +4,12 @@ from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib import messages
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
+from django.db.models import Count, Max
 from .models import Project
 from .forms import ProjectForm
+from tasks.deletion import schedule_deletion
+from TaskFlowPro.conditional import ConditionalGetMixin
+from TaskFlowPro.streaming import render_list
 
 class ProjectListView(LoginRequiredMixin, ListView):
     """
@@ -27,6 +31,11 @@ class ProjectListView(LoginRequiredMixin, ListView):
                 members=user
             ).distinct()
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['has_projects'] = bool(context['projects'])
+        return context
+
 @login_required
 def project_list_view(request):
     """
@@ -42,12 +51,11 @@ def project_list_view(request):
         ).distinct()
     
     context = {
-        'projects': projects,
         'user': user,
     }
-    return render(request, 'projects/project_list.html', context)
+    return render_list(request, 'projects/project_list.html', context, 'projects', projects, 'projects/_project_card.html', 'project')
 
-class ProjectDetailView(LoginRequiredMixin, DetailView):
+class ProjectDetailView(LoginRequiredMixin, ConditionalGetMixin, DetailView):
     """
     项目详情视图
     """
@@ -55,6 +63,21 @@ class ProjectDetailView(LoginRequiredMixin, DetailView):
     template_name = 'projects/project_detail.html'
     context_object_name = 'project'
     
+    def get_validator_parts(self):
+        """项目本身、成员列表以及项目任务的数量与最后更新时间"""
+        project = self.object
+        member_ids = sorted(project.members.values_list('id', flat=True))
+        tasks = project.tasks.aggregate(count=Count('id'), latest=Max('updated_at'))
+        self._tasks_latest = tasks['latest']
+        return [
+            project.pk, project.updated_at.isoformat(), project.owner_id,
+            ','.join(map(str, member_ids)),
+            tasks['count'], tasks['latest'],
+        ]
+    
+    def get_last_modified(self):
+        return max(filter(None, [self.object.updated_at, self._tasks_latest]))
+    
     def get_queryset(self):
         """确保用户有权限查看项目"""
         user = self.request.user
@@ -117,10 +140,12 @@ class ProjectDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         user = self.request.user
         return user.profile.is_admin or project.owner == user
     
-    def delete(self, request, *args, **kwargs):
-        """软删除项目"""
-        project = self.get_object()
-        project.is_active = False
-        project.save()
-        messages.success(request, '项目删除成功！')
+    def form_valid(self, form):
+        """
+        标记删除后立即返回，项目下的任务与评论由后台任务分批删除
+
+        （Django 4 起 DeleteView 的 POST 走 form_valid，不再调用 delete()）
+        """
+        schedule_deletion(self.object, self.request.user)
+        messages.success(self.request, '项目删除成功！')
         return redirect(self.success_url)
@@ -0,0 +1,90 @@
+"""
+负责人与项目选择框的自动补全
+
+按前缀搜索（用户名 / 项目名），结果按访问者权限过滤并分页，
+每个访问者的结果短时间缓存。用户、项目或成员关系变化时更换全局版本号，旧缓存随之失效。
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from projects.models import Project
+from users.models import UserProfile
+
+VERSION_KEY = 'autocomplete_version'
+
+
+def assignable_users(user, project_id=None):
+    """
+    可以被指派为负责人的用户
+
+    管理员可选择所有激活用户，其他人只能选择自己参与项目的成员；
+    指定 project_id 时只返回该项目（须对访问者可见）的成员。
+    """
+    if project_id:
+        return Project.objects.visible_to(user).filter(id=project_id).member_users()
+    if user.profile.is_admin:
+        return User.objects.filter(is_active=True)
+    return Project.objects.visible_to(user).member_users()
+
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _search(queryset, field, query, page):
+    """按前缀搜索并分页，多取一条用于判断是否还有下一页"""
+    page_size = settings.AUTOCOMPLETE_PAGE_SIZE
+    if query:
+        queryset = queryset.filter(**{f'{field}__istartswith': query})
+    offset = (page - 1) * page_size
+    rows = list(queryset.order_by(field, 'id').values_list('id', field)[offset:offset + page_size + 1])
+    return {
+        'results': [{'id': pk, 'text': text} for pk, text in rows[:page_size]],
+        'has_more': len(rows) > page_size,
+    }
+
+
+def autocomplete(kind, user, query, page=1, project_id=None):
+    """kind 为 users 或 projects，返回 {'results': [{'id', 'text'}], 'has_more'}"""
+    digest = hashlib.md5(f'{query}\0{project_id or ""}'.encode()).hexdigest()
+    key = f'autocomplete:{_version()}:{kind}:{user.pk}:{page}:{digest}'
+
+    def build():
+        if kind == 'users':
+            return _search(assignable_users(user, project_id), 'username', query, page)
+        return _search(Project.objects.visible_to(user), 'name', query, page)
+
+    return cache.get_or_set(key, build, settings.AUTOCOMPLETE_CACHE_SECONDS)
+
+
+def invalidate_autocomplete():
+    transaction.on_commit(lambda: cache.set(VERSION_KEY, time.time_ns(), None))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def autocomplete_source_changed(sender, raw=False, update_fields=None, **kwargs):
+    """用户名、激活状态、角色或项目变化（登录时只更新 last_login，不影响结果）"""
+    if raw or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    invalidate_autocomplete()
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def autocomplete_members_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_autocomplete()
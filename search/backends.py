@@ -0,0 +1,136 @@
+from django.db import connection
+from django.db.models import Q
+from django.urls import reverse
+from tasks.models import Task
+from comments.models import Comment
+from .models import SearchDocument
+from .utils import parse_query, query_words, highlight
+
+
+def visible_task_ids_sql(user):
+    """返回用户可见任务ID的子查询 SQL，管理员返回 None 表示不限制"""
+    if user.profile.is_admin:
+        return None, ()
+    # 去掉默认排序：visible_to 带 DISTINCT，排序字段会被加进子查询的 SELECT 列表
+    return Task.objects.visible_to(user).order_by().values('id').query.sql_with_params()
+
+
+def sqlite_match_expression(terms):
+    """把解析后的关键词转换为 FTS5 MATCH 表达式（词与词之间为 AND）"""
+    parts = []
+    for tokens, prefix in terms:
+        phrase = '"%s"' % ' '.join(tokens)
+        parts.append(phrase + '*' if prefix else phrase)
+    return ' '.join(parts)
+
+
+def postgresql_tsquery(terms):
+    """把解析后的关键词转换为 to_tsquery 表达式，中文短语用 <-> 保证相邻"""
+    parts = []
+    for tokens, prefix in terms:
+        lexemes = ["'%s'" % token for token in tokens]
+        if prefix:
+            lexemes[-1] += ':*'
+        parts.append('(%s)' % ' <-> '.join(lexemes))
+    return ' & '.join(parts)
+
+
+def _fallback_rows(terms, user, limit, offset):
+    """
+    其他数据库后端没有全文索引：在文档表上逐个关键词做 icontains 匹配（词与词之间为 AND），
+    没有相关度，按更新时间倒序
+    """
+    documents = SearchDocument.objects.all()
+    if not user.profile.is_admin:
+        documents = documents.filter(task_id__in=Task.objects.visible_to(user).order_by().values('id'))
+    # 前缀词同样按子串匹配
+    for tokens, _ in terms:
+        phrase = ' '.join(tokens)
+        documents = documents.filter(Q(title__icontains=phrase) | Q(body__icontains=phrase))
+    rows = documents.order_by('-updated_at', '-id').values_list('kind', 'object_id', 'task_id')
+    return list(rows[offset:offset + limit])
+
+
+def _ranked_rows(terms, user, limit, offset):
+    perm_sql, perm_params = visible_task_ids_sql(user)
+    perm_clause = f'AND d.task_id IN ({perm_sql})' if perm_sql else ''
+
+    if connection.vendor == 'sqlite':
+        sql = f"""
+            SELECT d.kind, d.object_id, d.task_id
+            FROM search_fts
+            JOIN search_searchdocument d ON d.id = search_fts.rowid
+            WHERE search_fts MATCH %s {perm_clause}
+            ORDER BY bm25(search_fts, 10.0, 1.0)
+            LIMIT %s OFFSET %s
+        """
+        params = [sqlite_match_expression(terms), *perm_params, limit, offset]
+    elif connection.vendor == 'postgresql':
+        sql = f"""
+            SELECT d.kind, d.object_id, d.task_id
+            FROM search_searchdocument d, to_tsquery('simple', %s) query
+            WHERE d.search_vector @@ query {perm_clause}
+            ORDER BY ts_rank(d.search_vector, query) DESC
+            LIMIT %s OFFSET %s
+        """
+        params = [postgresql_tsquery(terms), *perm_params, limit, offset]
+    else:
+        return _fallback_rows(terms, user, limit, offset)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def search(user, query, limit=20, offset=0):
+    """
+    搜索用户有权限查看的任务与评论
+
+    返回按相关度排序的结果列表，每项包含类型、对象、所属任务、
+    跳转链接以及高亮后的标题与摘要。
+    """
+    terms = parse_query(query)
+    if not terms:
+        return []
+
+    rows = _ranked_rows(terms, user, limit, offset)
+    task_ids = {task_id for kind, object_id, task_id in rows}
+    comment_ids = [object_id for kind, object_id, task_id in rows if kind == 'comment']
+    tasks = Task.objects.select_related('project').in_bulk(task_ids)
+    comments = Comment.objects.select_related('author').in_bulk(comment_ids)
+
+    words = query_words(query)
+    results = []
+    for kind, object_id, task_id in rows:
+        task = tasks.get(task_id)
+        if task is None:
+            continue
+        url = reverse('tasks:task_detail', kwargs={'pk': task_id})
+        if kind == 'task':
+            results.append({
+                'kind': kind,
+                'object': task,
+                'task': task,
+                'url': url,
+                'title': highlight(task.title, words, width=100),
+                'snippet': highlight(task.description, words),
+            })
+        elif object_id in comments:
+            comment = comments[object_id]
+            results.append({
+                'kind': kind,
+                'object': comment,
+                'task': task,
+                'url': url,
+                'title': highlight(task.title, words, width=100),
+                'snippet': highlight(comment.content, words),
+            })
+    return results
+
+
+def rebuild_backend_index():
+    """在文档表整体重写之后重建数据库端索引"""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO search_fts(search_fts) VALUES ('rebuild')")
+            cursor.execute("INSERT INTO search_fts(search_fts) VALUES ('optimize')")
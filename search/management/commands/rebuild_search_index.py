@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from tasks.models import Task
+from comments.models import Comment
+from search.models import SearchDocument
+from search.backends import rebuild_backend_index
+
+
+class Command(BaseCommand):
+    help = '重建任务与评论的全文搜索索引'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批写入的文档数量')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        with transaction.atomic():
+            SearchDocument.objects.all().delete()
+
+            tasks = Task.objects.only('id', 'title', 'description').order_by().iterator(chunk_size=batch_size)
+            task_total = self._bulk_index(map(SearchDocument.from_task, tasks), batch_size)
+
+            comments = Comment.objects.only('id', 'task_id', 'content').order_by().iterator(chunk_size=batch_size)
+            comment_total = self._bulk_index(map(SearchDocument.from_comment, comments), batch_size)
+
+            rebuild_backend_index()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'索引重建完成：任务 {task_total} 条，评论 {comment_total} 条'
+        ))
+
+    def _bulk_index(self, documents, batch_size):
+        total = 0
+        batch = []
+        for document in documents:
+            batch.append(document)
+            if len(batch) >= batch_size:
+                SearchDocument.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            SearchDocument.objects.bulk_create(batch)
+            total += len(batch)
+        return total
@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# 自动补全按用户名前缀搜索（username__istartswith）。auth_user.username 上已有的唯一索引
+# 无法用于不区分大小写的 LIKE 前缀匹配，这里补充对应的表达式 / 排序规则索引。
+SQLITE_FORWARD = [
+    # SQLite 的 LIKE 默认不区分大小写，只有 NOCASE 排序规则的索引才能用于前缀匹配
+    "CREATE INDEX IF NOT EXISTS auth_user_username_nocase_idx ON auth_user (username COLLATE NOCASE)",
+]
+
+SQLITE_BACKWARD = [
+    "DROP INDEX IF EXISTS auth_user_username_nocase_idx",
+]
+
+POSTGRESQL_FORWARD = [
+    # istartswith 生成 UPPER(username) LIKE UPPER(%s)，需要 pattern_ops 的表达式索引
+    "CREATE INDEX IF NOT EXISTS auth_user_username_upper_like_idx ON auth_user (UPPER(username) varchar_pattern_ops)",
+]
+
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX IF EXISTS auth_user_username_upper_like_idx",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("search", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRESQL_FORWARD}),
+            _run({"sqlite": SQLITE_BACKWARD, "postgresql": POSTGRESQL_BACKWARD}),
+        ),
+    ]
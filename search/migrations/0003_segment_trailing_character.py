@@ -0,0 +1,40 @@
+from django.db import migrations
+
+from search.utils import segment
+
+
+def resegment(apps, schema_editor):
+    """按新的分词规则（中文片段末尾补上最后一个字）重写已有文档，触发器 / 生成列随之更新"""
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    Task = apps.get_model('tasks', 'Task')
+    Comment = apps.get_model('comments', 'Comment')
+    sources = (
+        ('task', Task, lambda task: (segment(task.title), segment(task.description))),
+        ('comment', Comment, lambda comment: ('', segment(comment.content))),
+    )
+    for kind, model, build in sources:
+        documents = SearchDocument.objects.filter(kind=kind).order_by('pk')
+        last_pk = 0
+        while True:
+            batch = list(documents.filter(pk__gt=last_pk)[:1000])
+            if not batch:
+                break
+            objects = model._base_manager.in_bulk([document.object_id for document in batch])
+            for document in batch:
+                if document.object_id in objects:
+                    document.title, document.body = build(objects[document.object_id])
+            SearchDocument.objects.bulk_update(batch, ['title', 'body'])
+            last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0002_username_prefix_index"),
+        ("tasks", "0006_deleted_at_index"),
+        ("comments", "0005_comment_reply_count"),
+    ]
+
+    operations = [
+        migrations.RunPython(resegment, migrations.RunPython.noop),
+    ]
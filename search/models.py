@@ -0,0 +1,82 @@
+from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from tasks.models import Task
+from comments.models import Comment
+from .utils import segment
+
+
+class SearchDocument(models.Model):
+    """
+    全文索引文档
+
+    保存任务与评论分词后的文本，SQLite 上由 FTS5 外部内容表 search_fts
+    通过触发器同步，PostgreSQL 上由生成列 search_vector 及其 GIN 索引提供检索。
+    注意：SQLite 重建本表（如修改字段）会丢失触发器，需要在迁移中重新创建。
+    """
+    KIND_CHOICES = (
+        ('task', '任务'),
+        ('comment', '评论'),
+    )
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name='类型')
+    object_id = models.BigIntegerField(verbose_name='对象ID')
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='search_documents', verbose_name='所属任务')
+    title = models.TextField(blank=True, verbose_name='标题分词')
+    body = models.TextField(blank=True, verbose_name='正文分词')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        verbose_name = '搜索文档'
+        verbose_name_plural = '搜索文档'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='search_document_unique_object'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.object_id}"
+
+    @classmethod
+    def from_task(cls, task):
+        return cls(kind='task', object_id=task.pk, task_id=task.pk,
+                   title=segment(task.title), body=segment(task.description))
+
+    @classmethod
+    def from_comment(cls, comment):
+        return cls(kind='comment', object_id=comment.pk, task_id=comment.task_id,
+                   title='', body=segment(comment.content))
+
+    @classmethod
+    def index(cls, document):
+        """写入或更新一条索引文档"""
+        cls.objects.update_or_create(
+            kind=document.kind,
+            object_id=document.object_id,
+            defaults={'task_id': document.task_id, 'title': document.title, 'body': document.body},
+        )
+
+
+def _touches(update_fields, fields):
+    return update_fields is None or bool(set(update_fields) & set(fields))
+
+
+@receiver(post_save, sender=Task)
+def index_task(sender, instance, raw=False, update_fields=None, **kwargs):
+    """任务标题或描述变化时更新索引"""
+    if raw or not _touches(update_fields, ('title', 'description')):
+        return
+    SearchDocument.index(SearchDocument.from_task(instance))
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, raw=False, update_fields=None, **kwargs):
+    """评论内容变化时更新索引"""
+    if raw or not _touches(update_fields, ('content',)):
+        return
+    SearchDocument.index(SearchDocument.from_comment(instance))
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    """删除评论时移除索引（任务的索引随任务级联删除）"""
+    SearchDocument.objects.filter(kind='comment', object_id=instance.pk).delete()
@@ -0,0 +1,164 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from comments.models import Comment
+from projects.models import Project
+from tasks.models import Task
+from .autocomplete import VERSION_KEY, autocomplete
+from .backends import search
+from .utils import segment
+
+
+class SearchPermissionTests(TestCase):
+    """搜索结果按任务可见范围过滤"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='pass')
+        cls.member = User.objects.create_user('member', password='pass')
+        cls.outsider = User.objects.create_user('outsider', password='pass')
+        project = Project.objects.create(name='发布计划', owner=cls.owner)
+        project.members.add(cls.member)
+        other = Project.objects.create(name='内部项目', owner=cls.owner)
+        cls.task = Task.objects.create(title='数据库迁移', project=project, creator=cls.owner, assignee=cls.owner)
+        cls.hidden = Task.objects.create(title='数据库备份', project=other, creator=cls.owner, assignee=cls.owner)
+        Comment.objects.create(task=cls.task, author=cls.owner, content='迁移脚本已经准备好')
+
+    def test_member_sees_only_visible_tasks(self):
+        results = search(self.member, '数据库')
+        self.assertEqual([result['task'] for result in results], [self.task])
+
+    def test_member_finds_comments(self):
+        results = search(self.member, '迁移脚本')
+        self.assertEqual([result['kind'] for result in results], ['comment'])
+
+    def test_outsider_sees_nothing(self):
+        self.assertEqual(search(self.outsider, '数据库'), [])
+
+    def test_search_view_for_non_admin(self):
+        self.client.force_login(self.member)
+        response = self.client.get(reverse('search:search'), {'q': '数据库'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['task'] for result in response.context['results']], [self.task])
+
+    def test_other_vendors_fall_back_to_icontains(self):
+        with mock.patch('search.backends.connection', vendor='mysql'):
+            self.assertEqual([result['task'] for result in search(self.member, '数据库')], [self.task])
+            self.assertEqual([result['kind'] for result in search(self.member, '迁移脚本')], ['comment'])
+            self.assertEqual(search(self.outsider, '数据库'), [])
+            self.assertEqual({result['task'] for result in search(self.owner, '数据库')}, {self.task, self.hidden})
+            self.assertEqual(search(self.member, '数据库 备份'), [])
+
+
+class ChineseSegmentTests(TestCase):
+    """单个汉字出现在片段开头、中间或末尾都能搜到"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='pass')
+        cls.admin.profile.role = 'admin'
+        cls.admin.profile.save()
+        project = Project.objects.create(name='项目', owner=cls.admin)
+        cls.task = Task.objects.create(title='负责人', project=project, creator=cls.admin, assignee=cls.admin)
+
+    def test_segment_appends_trailing_character(self):
+        self.assertEqual(segment('负责人 ok'), '负责 责人 人 ok')
+        self.assertEqual(segment('人'), '人')
+
+    def test_single_character_in_any_position(self):
+        for query in ('负', '责', '人'):
+            with self.subTest(query=query):
+                self.assertEqual([result['task'] for result in search(self.admin, query)], [self.task])
+
+    def test_phrase_still_requires_adjacent_characters(self):
+        self.assertEqual([result['task'] for result in search(self.admin, '责人')], [self.task])
+        self.assertEqual(search(self.admin, '负人'), [])
+
+
+class AutocompleteTests(TestCase):
+    """负责人 / 项目自动补全的权限范围、前缀匹配与缓存失效"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice', password='pass')
+        cls.alan = User.objects.create_user('Alan', password='pass')
+        cls.sal = User.objects.create_user('sal', password='pass')
+        cls.albert = User.objects.create_user('albert', password='pass')
+        cls.admin = User.objects.create_user('boss', password='pass')
+        cls.admin.profile.role = 'admin'
+        cls.admin.profile.save()
+        cls.project = Project.objects.create(name='Alpha 项目', owner=cls.alice)
+        cls.project.members.add(cls.alice, cls.alan, cls.sal)
+        # albert 所在的项目与 alice 无关
+        cls.other = Project.objects.create(name='Alpine 项目', owner=cls.albert)
+        cls.other.members.add(cls.albert)
+
+    def setUp(self):
+        cache.clear()
+
+    def texts(self, kind, user, query='', **kwargs):
+        return [row['text'] for row in autocomplete(kind, user, query, **kwargs)['results']]
+
+    def test_non_admin_sees_members_of_own_projects(self):
+        self.assertEqual(self.texts('users', self.alice), ['Alan', 'alice', 'sal'])
+        self.assertEqual(self.texts('users', self.alice, project_id=self.other.pk), [])
+        self.assertEqual(self.texts('projects', self.alice), ['Alpha 项目'])
+
+    def test_admin_sees_all_active_users(self):
+        User.objects.filter(pk=self.sal.pk).update(is_active=False)
+        self.assertEqual(self.texts('users', self.admin), ['Alan', 'albert', 'alice', 'boss'])
+        self.assertEqual(self.texts('users', self.admin, project_id=self.other.pk), ['albert'])
+
+    def test_prefix_match(self):
+        self.assertEqual(self.texts('users', self.alice, 'al'), ['Alan', 'alice'])
+        self.assertEqual(self.texts('users', self.alice, 'AL'), ['Alan', 'alice'])
+        self.assertEqual(self.texts('users', self.admin, 'al'), ['Alan', 'albert', 'alice'])
+        self.assertEqual(self.texts('projects', self.albert, 'alp'), ['Alpine 项目'])
+        self.assertEqual(self.texts('projects', self.albert, '项目'), [])
+
+    def test_view_requires_login_and_scopes_results(self):
+        url = reverse('search:user_autocomplete')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(self.albert)
+        data = self.client.get(url, {'q': 'a'}).json()
+        self.assertEqual([row['text'] for row in data['results']], ['albert'])
+        self.assertFalse(data['has_more'])
+
+    def assertInvalidated(self, change):
+        version = cache.get(VERSION_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        self.assertNotEqual(cache.get(VERSION_KEY), version)
+
+    def test_user_save_invalidates(self):
+        self.assertEqual(self.texts('users', self.alice, 'sa'), ['sal'])
+        self.sal.username = 'sam'
+        self.assertInvalidated(self.sal.save)
+        self.assertEqual(self.texts('users', self.alice, 'sa'), ['sam'])
+
+    def test_profile_save_invalidates(self):
+        self.assertEqual(self.texts('users', self.alice, 'alb'), [])
+        self.alice.profile.role = 'admin'
+        self.assertInvalidated(self.alice.profile.save)
+        self.assertEqual(self.texts('users', self.alice, 'alb'), ['albert'])
+
+    def test_project_save_invalidates(self):
+        self.assertEqual(self.texts('projects', self.alice, 'alp'), ['Alpha 项目'])
+        self.project.name = 'Beta 项目'
+        self.assertInvalidated(self.project.save)
+        self.assertEqual(self.texts('projects', self.alice, 'alp'), [])
+
+    def test_member_change_invalidates(self):
+        self.assertEqual(self.texts('users', self.alice, 'alb'), [])
+        self.assertInvalidated(lambda: self.project.members.add(self.albert))
+        self.assertEqual(self.texts('users', self.alice, 'alb'), ['albert'])
+
+    def test_login_does_not_invalidate(self):
+        self.texts('users', self.alice)
+        version = cache.get(VERSION_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.login(username='alice', password='pass')
+        self.assertEqual(cache.get(VERSION_KEY), version)
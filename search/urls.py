@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+
+app_name = 'search'
+
+urlpatterns = [
+    path('', views.search_view, name='search'),
+    path('autocomplete/users/', views.user_autocomplete, name='user_autocomplete'),
+    path('autocomplete/projects/', views.project_autocomplete, name='project_autocomplete'),
+]
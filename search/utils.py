@@ -0,0 +1,100 @@
+import re
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+# 中日韩统一表意文字（含扩展A区与兼容区）
+CJK_RANGES = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+CJK_RUN_RE = re.compile(f'[{CJK_RANGES}]+|[^{CJK_RANGES}]+')
+CJK_CHAR_RE = re.compile(f'[{CJK_RANGES}]')
+WORD_RE = re.compile(r'[^\W_]+')
+
+# 单次查询最多使用的词数，避免构造过长的 MATCH 表达式
+MAX_QUERY_TERMS = 8
+
+
+def _split_runs(text):
+    """把文本拆成中文片段与非中文片段，统一小写"""
+    for word in WORD_RE.findall(text.lower()):
+        for run in CJK_RUN_RE.findall(word):
+            yield run
+
+
+def _bigrams(run):
+    if len(run) == 1:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def segment(text):
+    """
+    生成索引用的分词文本
+
+    SQLite 的 unicode61 与 PostgreSQL 的 simple 配置都不会切分中文，
+    因此中文按重叠二元组切分，并在末尾补上最后一个字（“任务管理” -> “任务 务管 管理 理”）：
+    单字查询按前缀匹配二元组，只有补上的末字才能命中位于片段末尾的字。
+    其余单词原样保留，词与词之间用空格分隔。
+    """
+    tokens = []
+    for run in _split_runs(text or ''):
+        if CJK_CHAR_RE.match(run):
+            tokens.extend(_bigrams(run))
+            if len(run) > 1:
+                tokens.append(run[-1])
+        else:
+            tokens.append(run)
+    return ' '.join(tokens)
+
+
+def parse_query(query):
+    """
+    解析搜索关键词
+
+    返回 (tokens, prefix) 列表：中文片段是一个由二元组组成的短语，
+    单个汉字与英文单词按前缀匹配。
+    """
+    terms = []
+    for run in _split_runs(query or ''):
+        if CJK_CHAR_RE.match(run):
+            terms.append((_bigrams(run), len(run) == 1))
+        else:
+            terms.append(([run], True))
+        if len(terms) >= MAX_QUERY_TERMS:
+            break
+    return terms
+
+
+def query_words(query):
+    """返回用于高亮的原始关键词"""
+    return list(dict.fromkeys(_split_runs(query or '')))[:MAX_QUERY_TERMS]
+
+
+def highlight(text, words, width=60):
+    """
+    截取包含关键词的片段并用 <mark> 标记命中位置
+
+    文本会先转义，返回值可以直接在模板中输出。
+    """
+    text = text or ''
+    if not words:
+        return escape(text[:width * 2])
+
+    pattern = re.compile('|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True)), re.IGNORECASE)
+    first = pattern.search(text)
+    start = max(first.start() - width, 0) if first else 0
+    end = min(start + width * 2, len(text))
+    fragment = text[start:end]
+
+    parts = []
+    cursor = 0
+    for match in pattern.finditer(fragment):
+        parts.append(escape(fragment[cursor:match.start()]))
+        parts.append('<mark>%s</mark>' % escape(match.group()))
+        cursor = match.end()
+    parts.append(escape(fragment[cursor:]))
+
+    html = ''.join(parts)
+    if start > 0:
+        html = '…' + html
+    if end < len(text):
+        html += '…'
+    return mark_safe(html)
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import render
+from .autocomplete import autocomplete
+from .backends import search
+
+
+@login_required
+def search_view(request):
+    """
+    全文搜索任务与评论
+    """
+    query = request.GET.get('q', '').strip()
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+
+    per_page = settings.SEARCH_RESULTS_PER_PAGE
+    results = []
+    has_next = False
+    if query:
+        # 多取一条用于判断是否还有下一页
+        results = search(request.user, query, limit=per_page + 1, offset=(page - 1) * per_page)
+        has_next = len(results) > per_page
+        results = results[:per_page]
+
+    context = {
+        'query': query,
+        'results': results,
+        'page': page,
+        'has_previous': page > 1,
+        'has_next': has_next,
+    }
+    return render(request, 'search/search_results.html', context)
+
+
+def _autocomplete_response(request, kind):
+    query = request.GET.get('q', '').strip()[:100]
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    project_id = request.GET.get('project', '')
+    project_id = int(project_id) if project_id.isdigit() else None
+    return JsonResponse(autocomplete(kind, request.user, query, page, project_id))
+
+
+@login_required
+def user_autocomplete(request):
+    """
+    负责人选择框：按用户名前缀搜索可指派的用户（可用 project 参数限定为项目成员）
+    """
+    return _autocomplete_response(request, 'users')
+
+
+@login_required
+def project_autocomplete(request):
+    """
+    项目选择框：按名称前缀搜索可见的项目
+    """
+    return _autocomplete_response(request, 'projects')
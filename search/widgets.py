@@ -0,0 +1,45 @@
+from django import forms
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    按需加载选项的下拉框
+
+    只渲染当前选中的选项，其余选项由 static/js/autocomplete.js 调用 url_name 对应的
+    自动补全接口搜索。forward 为另一个字段的 id，其值作为 project 参数一并发送。
+    表单校验仍使用字段的 queryset，权限范围不变。
+    """
+
+    def __init__(self, url_name, forward=None, attrs=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+        self.forward = forward
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocomplete-url'] = reverse(self.url_name)
+        if self.forward:
+            context['widget']['attrs']['data-autocomplete-forward'] = self.forward
+        return context
+
+    def _selected_choices(self, value):
+        field = self.choices.field
+        choices = [('', field.empty_label)] if field.empty_label is not None else []
+        selected = [v for v in value if v not in (None, '')]
+        if selected:
+            try:
+                instances = list(field.queryset.filter(pk__in=selected))
+            except (ValueError, ValidationError):
+                instances = []
+            choices += [(field.prepare_value(obj), field.label_from_instance(obj)) for obj in instances]
+        return choices
+
+    def optgroups(self, name, value, attrs=None):
+        choices = self.choices
+        self.choices = self._selected_choices(value)
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = choices
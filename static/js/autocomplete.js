@@ -0,0 +1,62 @@
+// 按需加载选项的下拉框（search.widgets.AutocompleteSelect）
+// 原 select 隐藏后仍用于提交，前面插入输入框，输入时调用自动补全接口搜索
+
+$(document).ready(function () {
+    $('select[data-autocomplete-url]').each(function () {
+        var $select = $(this);
+        var $selected = $select.find('option:selected');
+        var $input = $('<input type="text" class="form-control" autocomplete="off" placeholder="输入以搜索">')
+            .val($selected.val() ? $selected.text() : '');
+
+        $select.hide().before($input);
+
+        $input.autocomplete({
+            minLength: 0,
+            delay: 200,
+            source: function (request, response) {
+                var params = { q: request.term };
+                var forward = $select.data('autocomplete-forward');
+                if (forward && $('#' + forward).val()) {
+                    params.project = $('#' + forward).val();
+                }
+                $.getJSON($select.data('autocomplete-url'), params, function (data) {
+                    var items = $.map(data.results, function (item) {
+                        return { label: item.text, value: item.text, id: item.id };
+                    });
+                    if (data.has_more) {
+                        items.push({ label: '继续输入以缩小范围…', value: '', disabled: true });
+                    }
+                    response(items);
+                }).fail(function () {
+                    response([]);
+                });
+            },
+            select: function (event, ui) {
+                if (ui.item.disabled) {
+                    event.preventDefault();
+                    return;
+                }
+                if (!$select.find('option[value="' + ui.item.id + '"]').length) {
+                    $select.append(new Option(ui.item.label, ui.item.id));
+                }
+                $select.val(String(ui.item.id)).trigger('change');
+            },
+            change: function () {
+                // 清空输入框即清除选择
+                if (!$input.val()) {
+                    $select.val('').trigger('change');
+                }
+            }
+        }).on('focus', function () {
+            $(this).autocomplete('search', '');
+        });
+
+        $input.autocomplete('instance')._renderItem = function (ul, item) {
+            var $li = $('<li>').append($('<div>').text(item.label));
+            if (item.disabled) {
+                $li.addClass('ui-state-disabled');
+            }
+            return $li.appendTo(ul);
+        };
+    });
+});
@@ -1,3 +1,117 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from comments.models import Comment
+from TaskFlowPro.pagination import EstimatedCountPaginator
+from users.stats import invalidate_dashboard_stats, task_user_ids
+from .deletion import purge_deletion, remaining_rows, schedule_deletion
+from .models import Deletion, Task
 
-# Register your models here.
+
+class TaskActionForm(ActionForm):
+    """批量操作的参数：修改状态时选择新状态，重新分配时填写负责人用户名"""
+    status = forms.ChoiceField(choices=[('', '新状态')] + list(Task.STATUS_CHOICES), required=False)
+    assignee = forms.CharField(required=False, widget=forms.TextInput(attrs={'placeholder': '负责人用户名'}))
+
+
+def _invalidate_after_commit(user_ids):
+    transaction.on_commit(lambda: invalidate_dashboard_stats(user_ids))
+
+
+class BackgroundDeletionAdmin(admin.ModelAdmin):
+    """删除时只标记并交给后台分批清理，确认页也不收集级联对象"""
+
+    def get_deleted_objects(self, objs, request):
+        perms_needed = set() if self.has_delete_permission(request) else {self.opts.verbose_name}
+        objs = list(objs)
+        return [str(obj) for obj in objs], {self.opts.verbose_name_plural: len(objs)}, perms_needed, []
+
+    def delete_model(self, request, obj):
+        schedule_deletion(obj, request.user)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            schedule_deletion(obj, request.user)
+
+
+@admin.register(Task)
+class TaskAdmin(BackgroundDeletionAdmin):
+    list_display = ['title', 'project', 'assignee', 'creator', 'status', 'priority', 'due_date', 'comment_count', 'updated_at']
+    list_filter = ['status', 'priority']
+    list_select_related = ['project', 'assignee', 'creator']
+    search_fields = ['title']
+    autocomplete_fields = ['project', 'assignee', 'creator']
+    readonly_fields = ['created_at', 'updated_at', 'overdue_notified_at']
+    # 按主键倒序分页可以直接走主键索引；不显示未筛选时的总数，省去一次全表 COUNT
+    ordering = ['-id']
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    action_form = TaskActionForm
+    actions = ['change_status', 'reassign']
+
+    def get_queryset(self, request):
+        # 只对当前页的任务执行相关子查询，不 JOIN 评论表再 GROUP BY
+        comments = Comment.objects.filter(task=OuterRef('pk')).order_by().values('task').annotate(count=Count('id'))
+        return super().get_queryset(request).annotate(_comment_count=Coalesce(Subquery(comments.values('count')), 0))
+
+    def comment_count(self, obj):
+        return obj._comment_count
+    comment_count.short_description = '评论数'
+
+    def change_status(self, request, queryset):
+        """一条 UPDATE 修改状态，状态未变化的任务不更新"""
+        status = request.POST.get('status')
+        if status not in dict(Task.STATUS_CHOICES):
+            self.message_user(request, '请选择新状态', messages.ERROR)
+            return
+        changed = queryset.exclude(status=status)
+        with transaction.atomic():
+            user_ids = task_user_ids(changed)
+            count = changed.update(status=status, updated_at=timezone.now())
+            _invalidate_after_commit(user_ids)
+        self.message_user(request, f'已将 {count} 个任务修改为“{dict(Task.STATUS_CHOICES)[status]}”')
+    change_status.short_description = '修改所选任务的状态'
+
+    def reassign(self, request, queryset):
+        """一条 UPDATE 重新分配负责人，原负责人与新负责人的统计都会失效"""
+        assignee = User.objects.filter(username=request.POST.get('assignee', '').strip(), is_active=True).first()
+        if assignee is None:
+            self.message_user(request, '请填写有效的负责人用户名', messages.ERROR)
+            return
+        changed = queryset.exclude(assignee=assignee)
+        with transaction.atomic():
+            user_ids = task_user_ids(changed) | {assignee.pk}
+            count = changed.update(assignee=assignee, updated_at=timezone.now())
+            _invalidate_after_commit(user_ids)
+        self.message_user(request, f'已将 {count} 个任务分配给 {assignee.username}')
+    reassign.short_description = '重新分配所选任务的负责人'
+
+
+@admin.register(Deletion)
+class DeletionAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'target', 'object_id', 'status', 'progress', 'requested_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'target']
+    list_select_related = ['requested_by']
+    readonly_fields = ['target', 'object_id', 'label', 'requested_by', 'status', 'progress', 'remaining',
+                       'created_at', 'updated_at', 'finished_at']
+    actions = ['resume']
+
+    def has_add_permission(self, request):
+        return False
+
+    def remaining(self, obj):
+        return remaining_rows(obj) if obj.status != 'done' else {}
+    remaining.short_description = '剩余行数'
+
+    def resume(self, request, queryset):
+        """后台任务被放弃（重试次数用尽）后重新执行，已删除的部分不会重复处理"""
+        deletions = list(queryset.exclude(status='done'))
+        for deletion in deletions:
+            purge_deletion.delay(deletion_id=deletion.pk)
+        self.message_user(request, f'已重新安排 {len(deletions)} 个删除任务')
+    resume.short_description = '继续执行所选删除'
@@ -0,0 +1,85 @@
+"""
+任务附件的分块写入与下载
+
+上传的每一块直接从请求流按 64KB 读取并写入文件，不在内存中缓存整块或整个文件；
+同一附件同时只允许一个请求写入（文件锁），偏移量必须等于已接收字节数，
+客户端中断后可以查询偏移量继续上传。
+"""
+
+import fcntl
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+from .models import TaskAttachment
+
+READ_SIZE = 64 * 1024
+
+
+class UploadConflict(Exception):
+    """分块与服务器状态不一致，received 为服务器已接收的字节数"""
+
+    def __init__(self, message, received):
+        super().__init__(message)
+        self.received = received
+
+
+def append_chunk(attachment, offset, stream, length):
+    """把 stream 中 length 字节写入附件的 offset 处，返回新的已接收字节数"""
+    path = attachment.file_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o640)
+    with os.fdopen(fd, 'r+b') as output:
+        try:
+            fcntl.flock(output, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadConflict('该附件正在由其他请求上传', attachment.received)
+
+        received = TaskAttachment.objects.values_list('received', flat=True).get(pk=attachment.pk)
+        if offset != received:
+            raise UploadConflict('偏移量与已上传的数据不一致', received)
+        if offset + length > attachment.size:
+            raise UploadConflict('数据超出文件大小', received)
+
+        # 丢弃上次中断时写入但未记录的数据
+        output.seek(offset)
+        output.truncate()
+        written = 0
+        while written < length:
+            piece = stream.read(min(READ_SIZE, length - written))
+            if not piece:
+                break
+            output.write(piece)
+            written += len(piece)
+        output.flush()
+
+        # 在持有文件锁时推进偏移量，锁释放前其他请求无法写入
+        received = offset + written
+        updated = TaskAttachment.objects.filter(pk=attachment.pk, received=offset).update(
+            received=received,
+            status='complete' if received == attachment.size else 'uploading',
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            received = TaskAttachment.objects.values_list('received', flat=True).get(pk=attachment.pk)
+            raise UploadConflict('偏移量与已上传的数据不一致', received)
+    return received
+
+
+def attachment_response(attachment):
+    """
+    下载响应：ATTACHMENT_X_ACCEL_REDIRECT 开启时只返回响应头，由 nginx 从内部
+    location 发送文件（sendfile，不经过 worker）；关闭时由 Django 流式返回文件
+    """
+    content_type = attachment.content_type or 'application/octet-stream'
+    if settings.ATTACHMENT_X_ACCEL_REDIRECT:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(settings.ATTACHMENT_ACCEL_PREFIX + attachment.relative_path)
+    else:
+        response = FileResponse(open(attachment.file_path, 'rb'), content_type=content_type)
+    response['Content-Disposition'] = content_disposition_header(True, attachment.filename)
+    response['X-Content-Type-Options'] = 'nosniff'
+    return response
@@ -0,0 +1,114 @@
+"""
+项目与任务的后台删除
+
+直接 delete() 一个大项目时，Django 的 Collector 会把全部任务、评论与点赞读入内存，
+在一个长事务里逐表删除，SQLite 整个过程中持有写锁。这里改为两步：
+
+1. schedule_deletion()：标记 deleted_at，默认管理器立即不再返回该对象，并记录一条 Deletion
+2. purge_deletion 后台任务：按依赖顺序（点赞 → 评论 → 搜索索引 → 附件 → 任务）分批删除，
+   每批一个短事务并在批次间停顿；超过 DELETION_JOB_SECONDS 后重新入队，下次从剩余数据继续
+"""
+
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from comments.models import Comment, CommentLike
+from jobs.queue import job
+from projects.models import Project
+from search.autocomplete import invalidate_autocomplete
+from search.models import SearchDocument
+from users.stats import invalidate_dashboard_stats, task_user_ids
+from .models import Deletion, Task, TaskAttachment
+
+
+def schedule_deletion(obj, user=None):
+    """标记项目或任务已删除并安排后台清理，重复调用返回同一条删除记录"""
+    target = 'project' if isinstance(obj, Project) else 'task'
+    tasks = Task._base_manager.filter(**{'project_id' if target == 'project' else 'pk': obj.pk})
+    with transaction.atomic():
+        user_ids = task_user_ids(tasks)
+        if target == 'project':
+            user_ids.update(Project.members.through.objects.filter(project_id=obj.pk).values_list('user_id', flat=True))
+        type(obj)._base_manager.filter(pk=obj.pk, deleted_at=None).update(deleted_at=timezone.now())
+        deletion, created = Deletion.objects.get_or_create(
+            target=target, object_id=obj.pk, defaults={'label': str(obj)[:200], 'requested_by': user},
+        )
+        # 标记后这些任务已从列表与统计中消失，此时失效缓存，不必等后台删除完成
+        transaction.on_commit(lambda: invalidate_dashboard_stats(user_ids))
+        if target == 'project':
+            transaction.on_commit(invalidate_autocomplete)
+        if created:
+            transaction.on_commit(lambda: purge_deletion.delay(deletion_id=deletion.pk))
+    return deletion
+
+
+def _tasks(deletion):
+    if deletion.target == 'project':
+        return Task._base_manager.filter(project_id=deletion.object_id)
+    return Task._base_manager.filter(pk=deletion.object_id)
+
+
+def deletion_steps(deletion):
+    """
+    (名称, 查询集, 排序, 是否逐条删除)，先删引用方再删被引用方
+
+    评论按层级从深到浅删除，回复总是先于父评论删除，每批提交时外键都成立。
+    附件逐条删除以触发 post_delete 删除文件，其余直接执行 DELETE。
+    """
+    tasks = _tasks(deletion)
+    comments = Comment.objects.filter(task__in=tasks.values('pk'))
+    return [
+        ('comment_likes', CommentLike.objects.filter(comment__in=comments.values('pk')), 'pk', False),
+        ('comments', comments, '-depth', False),
+        ('search_documents', SearchDocument.objects.filter(task__in=tasks.values('pk')), 'pk', False),
+        ('attachments', TaskAttachment.objects.filter(task__in=tasks.values('pk')), 'pk', True),
+        ('tasks', tasks, 'pk', False),
+    ]
+
+
+def remaining_rows(deletion):
+    """各类剩余行数（逐表 COUNT，只在查看进度时调用）"""
+    return {name: queryset.count() for name, queryset, order, one_by_one in deletion_steps(deletion)}
+
+
+def _delete_batch(deletion, name, queryset, order, one_by_one):
+    ids = list(queryset.order_by(order).values_list('pk', flat=True)[:settings.DELETION_BATCH_SIZE])
+    if not ids:
+        return 0
+    batch = queryset.model._base_manager.filter(pk__in=ids)
+    with transaction.atomic():
+        if one_by_one:
+            batch.delete()
+        else:
+            # 依赖的行已在前面的步骤删除，不需要 Collector 再逐表检查
+            batch._raw_delete(batch.db)
+        deletion.progress[name] = deletion.progress.get(name, 0) + len(ids)
+        Deletion.objects.filter(pk=deletion.pk).update(progress=deletion.progress, updated_at=timezone.now())
+    return len(ids)
+
+
+def run_deletion(deletion, seconds=None):
+    """分批删除，全部完成返回 True；超出时间返回 False，之后再次调用会继续"""
+    deadline = time.monotonic() + (seconds or settings.DELETION_JOB_SECONDS)
+    Deletion.objects.filter(pk=deletion.pk, status='pending').update(status='running')
+    for name, queryset, order, one_by_one in deletion_steps(deletion):
+        while _delete_batch(deletion, name, queryset, order, one_by_one):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(settings.DELETION_BATCH_PAUSE_MS / 1000)
+    with transaction.atomic():
+        if deletion.target == 'project':
+            # 任务已清空，剩下项目本身与成员关系
+            Project._base_manager.filter(pk=deletion.object_id).delete()
+        Deletion.objects.filter(pk=deletion.pk).update(status='done', finished_at=timezone.now())
+    return True
+
+
+@job()
+def purge_deletion(deletion_id):
+    """后台删除；超出单次执行时间时重新入队，不长时间占用 worker"""
+    deletion = Deletion.objects.filter(pk=deletion_id).exclude(status='done').first()
+    if deletion is not None and not run_deletion(deletion):
+        purge_deletion.delay(deletion_id=deletion_id)
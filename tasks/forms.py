@@ -2,6 +2,8 @@ from django import forms
 from .models import Task
 from projects.models import Project
 from django.contrib.auth.models import User
+from search.autocomplete import assignable_users
+from search.widgets import AutocompleteSelect
 
 class TaskForm(forms.ModelForm):
     """
@@ -20,10 +22,11 @@ class TaskForm(forms.ModelForm):
                 'rows': 4,
                 'placeholder': '请输入任务描述'
             }),
-            'project': forms.Select(attrs={
+            # 选项由自动补全接口按需加载，页面只渲染当前选中的一项
+            'project': AutocompleteSelect('search:project_autocomplete', attrs={
                 'class': 'form-control'
             }),
-            'assignee': forms.Select(attrs={
+            'assignee': AutocompleteSelect('search:user_autocomplete', forward='id_project', attrs={
                 'class': 'form-control'
             }),
             'priority': forms.Select(attrs={
@@ -43,24 +46,17 @@ class TaskForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         
         if user:
-            # 根据用户权限过滤项目
-            if user.profile.is_admin:
-                self.fields['project'].queryset = Project.objects.filter(is_active=True)
-                # 管理员可选择所有激活用户为负责人
-                self.fields['assignee'].queryset = User.objects.filter(is_active=True)
-            else:
-                self.fields['project'].queryset = Project.objects.filter(
-                    is_active=True,
-                    members=user
-                )
-                # 只显示与该用户相关项目的成员为负责人
-                member_ids = Project.objects.filter(
-                    is_active=True,
-                    members=user
-                ).values_list('members', flat=True)
-                self.fields['assignee'].queryset = User.objects.filter(id__in=member_ids).distinct()
+            # 根据用户权限过滤项目与负责人（管理员可选择全部激活项目与用户）
+            self.fields['project'].queryset = Project.objects.visible_to(user)
+            self.fields['assignee'].queryset = assignable_users(user)
             # 设置负责人默认值为当前用户
             self.fields['assignee'].initial = user
+    
+    def save(self, commit=True):
+        # 截止日期变更后重新参与逾期提醒
+        if 'due_date' in self.changed_data:
+            self.instance.overdue_notified_at = None
+        return super().save(commit)
 
 class TaskFilterForm(forms.Form):
     """
@@ -68,6 +64,11 @@ class TaskFilterForm(forms.Form):
     """
     STATUS_CHOICES = [('', '全部状态')] + list(Task.STATUS_CHOICES)
     PRIORITY_CHOICES = [('', '全部优先级')] + list(Task.PRIORITY_CHOICES)
+    DUE_CHOICES = [
+        ('', '全部期限'),
+        ('overdue', '已逾期'),
+        ('due_soon', '即将到期'),
+    ]
     
     status = forms.ChoiceField(
         choices=STATUS_CHOICES,
@@ -79,15 +80,22 @@ class TaskFilterForm(forms.Form):
         required=False,
         widget=forms.Select(attrs={'class': 'form-control'})
     )
+    due = forms.ChoiceField(
+        choices=DUE_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
     project = forms.ModelChoiceField(
         queryset=Project.objects.filter(is_active=True),
         required=False,
-        widget=forms.Select(attrs={'class': 'form-control'})
+        empty_label='全部项目',
+        widget=AutocompleteSelect('search:project_autocomplete', attrs={'class': 'form-control'})
     )
     assignee = forms.ModelChoiceField(
-        queryset=None,
+        queryset=User.objects.none(),
         required=False,
-        widget=forms.Select(attrs={'class': 'form-control'})
+        empty_label='全部负责人',
+        widget=AutocompleteSelect('search:user_autocomplete', attrs={'class': 'form-control'})
     )
     
     def __init__(self, *args, **kwargs):
@@ -95,14 +103,38 @@ class TaskFilterForm(forms.Form):
         super().__init__(*args, **kwargs)
         
         if user:
-            # 根据用户权限设置项目选项
-            if user.profile.is_admin:
-                self.fields['project'].queryset = Project.objects.filter(is_active=True)
-            else:
-                self.fields['project'].queryset = Project.objects.filter(
-                    is_active=True,
-                    members=user
-                )
-            
-            # 设置负责人选项
-            self.fields['assignee'].queryset = user.projects.all().distinct().values_list('members', flat=True) 
\ No newline at end of file
+            # 根据用户权限设置项目与负责人选项
+            self.fields['project'].queryset = Project.objects.visible_to(user)
+            self.fields['assignee'].queryset = assignable_users(user)
+
+    def apply_facets(self, facets, query):
+        """
+        在选项后显示分面计数，并为项目与负责人生成数量最多的快捷筛选链接
+
+        query 为当前请求的 GET 参数，链接在其基础上替换对应维度并回到第一页。
+        """
+        for name in ('status', 'priority', 'due'):
+            field = self.fields[name]
+            counts, total = facets[name]['counts'], facets[name]['total']
+            field.choices = [
+                (value, f'{label} ({total if value == "" else counts.get(value, 0)})')
+                for value, label in field.choices
+            ]
+        self.facet_links = {}
+        for name in ('project', 'assignee'):
+            field = self.fields[name]
+            counts = facets[name]['counts']
+            field.empty_label = f'{field.empty_label} ({facets[name]["total"]})'
+            field.label_from_instance = lambda obj, counts=counts: f'{obj} ({counts.get(obj.pk, 0)})'
+            links = []
+            for value, label, count in facets[name]['top']:
+                params = query.copy()
+                params[name] = value
+                params.pop('page', None)
+                links.append({
+                    'label': label,
+                    'count': count,
+                    'query': params.urlencode(),
+                    'active': str(value) == str(query.get(name, '')),
+                })
+            self.facet_links[name] = links
@@ -0,0 +1,2 @@
+# 后台删除任务定义在 deletion 模块中，runworker 启动时通过本模块注册
+from .deletion import purge_deletion  # noqa: F401
@@ -0,0 +1,213 @@
+import http.client
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.crypto import get_random_string
+from django.utils.module_loading import import_string
+from comments.models import Comment
+from projects.models import Project
+from tasks.models import Task
+
+PROFILES = ('sync', 'gthread', 'asgi')
+BENCH_USERNAME = 'benchmark_user'
+BENCH_PROJECT = '压测项目'
+TASK_COUNT = 20
+COMMENT_COUNT = 30
+
+
+@contextmanager
+def gunicorn_server(profile, port, workers, threads=4, **env):
+    """按 gunicorn.conf.py 的指定模式启动 gunicorn，退出时停止"""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE, GUNICORN_PROFILE=profile,
+               GUNICORN_WORKERS=str(workers), GUNICORN_THREADS=str(threads), **env)
+    with tempfile.TemporaryDirectory() as pid_dir:
+        process = subprocess.Popen([
+            sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py',
+            '--bind', f'127.0.0.1:{port}', '--pid', os.path.join(pid_dir, 'gunicorn.pid'),
+            '--access-logfile', os.devnull, '--error-logfile', '-', '--log-level', 'warning',
+            '--max-requests', '0',
+        ], cwd=settings.BASE_DIR, env=env)
+        try:
+            wait_for_port(port, process)
+            yield process
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+def wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError('gunicorn 启动失败')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise CommandError('等待 gunicorn 启动超时')
+
+
+class Command(BaseCommand):
+    help = '用相同的混合请求分别压测 gunicorn 的 sync、gthread 与 asgi 模式'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', default=','.join(PROFILES), help='逗号分隔，可选 sync,gthread,asgi')
+        parser.add_argument('--duration', type=float, default=15, help='每种模式压测的秒数')
+        parser.add_argument('--warmup', type=float, default=2, help='正式计数前的预热秒数')
+        parser.add_argument('--concurrency', type=int, default=32, help='并发客户端连接数')
+        parser.add_argument('--workers', type=int, default=2, help='gunicorn 进程数')
+        parser.add_argument('--threads', type=int, default=4, help='gthread 模式每个进程的线程数')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--allow-writes', action='store_true',
+                            help='DEBUG 关闭时也允许运行（会在当前数据库中写入压测数据）')
+        parser.add_argument('--keep-fixtures', action='store_true', help='结束后保留压测用户与数据，下次运行时复用')
+
+    def handle(self, *args, **options):
+        profiles = [profile.strip() for profile in options['profiles'].split(',') if profile.strip()]
+        unknown = set(profiles) - set(PROFILES)
+        if unknown:
+            raise CommandError(f'未知的模式：{", ".join(sorted(unknown))}')
+        if not (settings.DEBUG or options['allow_writes']):
+            raise CommandError(
+                '压测会创建管理员用户、项目、任务与评论并持续写入数据库，默认只在 DEBUG 环境运行；'
+                '确认当前数据库可以写入压测数据时加 --allow-writes'
+            )
+
+        user, task_ids, comment_ids = self._fixtures()
+        session, headers = self._auth_headers(user)
+        try:
+            self._benchmark(profiles, options, headers, task_ids, comment_ids)
+        finally:
+            session.delete()
+            if not options['keep_fixtures']:
+                self._cleanup(user)
+                self.stdout.write('已删除压测用户与数据')
+
+    def _benchmark(self, profiles, options, headers, task_ids, comment_ids):
+        self.stdout.write(
+            f'并发 {options["concurrency"]}，每种模式 {options["duration"]:.0f} 秒，'
+            f'请求混合：评论列表 50% / 点赞 20% / 更新状态 20% / 排序 10%'
+        )
+        self.stdout.write(f'{"模式":<10}{"请求数":>10}{"错误":>8}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}')
+        for profile in profiles:
+            with gunicorn_server(profile, options['port'], options['workers'], options['threads']):
+                result = self._run(options, headers, task_ids, comment_ids)
+            latencies = sorted(result['latencies'])
+            quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0] * 99
+            self.stdout.write(
+                f'{profile:<10}{len(latencies):>10}{result["errors"]:>8}'
+                f'{len(latencies) / options["duration"]:>10.1f}'
+                f'{quantiles[49] * 1000:>10.1f}{quantiles[94] * 1000:>10.1f}{quantiles[98] * 1000:>10.1f}'
+            )
+
+    def _fixtures(self):
+        """准备压测用户、项目、任务与评论（--keep-fixtures 保留的数据重复运行时复用）"""
+        user, created = User.objects.get_or_create(username=BENCH_USERNAME)
+        if created:
+            user.set_unusable_password()
+            user.save()
+        # 排序接口需要管理员权限
+        user.profile.role = 'admin'
+        user.profile.save()
+        project, _ = Project.objects.get_or_create(name=BENCH_PROJECT, owner=user)
+        project.members.add(user)
+        existing = project.tasks.count()
+        for index in range(existing, TASK_COUNT):
+            Task.objects.create(title=f'压测任务 {index + 1}', project=project, creator=user, assignee=user)
+        task_ids = list(project.tasks.order_by('id').values_list('id', flat=True)[:TASK_COUNT])
+        first_task = Task.objects.get(id=task_ids[0])
+        for index in range(first_task.comments.count(), COMMENT_COUNT):
+            Comment.objects.create(task=first_task, author=user, content=f'压测评论 {index + 1}')
+        comment_ids = list(first_task.comments.values_list('id', flat=True))
+        return user, task_ids, comment_ids
+
+    def _cleanup(self, user):
+        """删除压测用户，其项目、任务、评论与点赞随之级联删除"""
+        User.objects.filter(pk=user.pk).delete()
+
+    def _auth_headers(self, user):
+        """直接创建登录会话与 CSRF cookie，避免压测登录流程"""
+        session = import_string(settings.SESSION_ENGINE + '.SessionStore')()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        csrf_token = get_random_string(32)
+        return session, {
+            'Cookie': f'{settings.SESSION_COOKIE_NAME}={session.session_key}; {settings.CSRF_COOKIE_NAME}={csrf_token}',
+            'X-CSRFToken': csrf_token,
+            'X-Requested-With': 'XMLHttpRequest',
+        }
+
+    def _requests(self, task_ids, comment_ids):
+        """按权重生成混合请求 (method, path, body)"""
+        task_id = task_ids[0]
+        order = list(task_ids)
+        while True:
+            roll = random.random()
+            if roll < 0.5:
+                yield 'GET', f'/comments/list/{task_id}/', None
+            elif roll < 0.7:
+                yield 'POST', f'/comments/like/{random.choice(comment_ids)}/', {}
+            elif roll < 0.9:
+                status = random.choice(('pending', 'in_progress', 'completed'))
+                yield 'POST', f'/tasks/{random.choice(task_ids)}/status/', {'status': status}
+            else:
+                random.shuffle(order)
+                yield 'POST', '/tasks/order/', {'task_ids[]': order}
+
+    def _run(self, options, headers, task_ids, comment_ids):
+        started = time.monotonic()
+        measure_from = started + options['warmup']
+        stop_at = measure_from + options['duration']
+        lock = threading.Lock()
+        result = {'latencies': [], 'errors': 0}
+
+        def client():
+            connection = http.client.HTTPConnection('127.0.0.1', options['port'], timeout=30)
+            latencies, errors = [], 0
+            for method, path, data in self._requests(task_ids, comment_ids):
+                now = time.monotonic()
+                if now >= stop_at:
+                    break
+                request_headers = dict(headers)
+                body = None
+                if data is not None:
+                    body = urlencode(data, doseq=True)
+                    request_headers['Content-Type'] = 'application/x-www-form-urlencoded'
+                try:
+                    connection.request(method, path, body=body, headers=request_headers)
+                    response = connection.getresponse()
+                    response.read()
+                    failed = response.status >= 400
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    failed = True
+                if now >= measure_from:
+                    latencies.append(time.monotonic() - now)
+                    errors += failed
+            connection.close()
+            with lock:
+                result['latencies'].extend(latencies)
+                result['errors'] += errors
+
+        threads = [threading.Thread(target=client) for _ in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return result
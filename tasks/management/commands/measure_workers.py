@@ -0,0 +1,90 @@
+import http.client
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from .benchmark_server import PROFILES, gunicorn_server
+
+MEMORY_FIELDS = ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty')
+
+
+def child_pids(parent_pid):
+    pids = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # comm 字段可能含空格，从最后一个括号之后解析
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == parent_pid:
+            pids.append(int(entry))
+    return pids
+
+
+def memory_usage(pid):
+    """读取进程的 RSS / PSS / USS（KB）"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in MEMORY_FIELDS:
+                values[name] = int(rest.split()[0])
+    return {
+        'rss': values['Rss'],
+        'pss': values['Pss'],
+        'uss': values['Private_Clean'] + values['Private_Dirty'],
+    }
+
+
+class Command(BaseCommand):
+    help = '对比 gunicorn 预加载开启与关闭时的冷启动时间与每个 worker 的内存占用'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', default='sync', choices=PROFILES)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--requests', type=int, default=200, help='测量内存前发送的请求数')
+        parser.add_argument('--path', default='/users/login/', help='用于预热的页面')
+        parser.add_argument('--port', type=int, default=8766)
+
+    def handle(self, *args, **options):
+        if not os.path.exists('/proc/self/smaps_rollup'):
+            raise CommandError('需要 Linux 4.14 以上的 /proc/<pid>/smaps_rollup')
+        self.stdout.write(
+            f'{"预加载":<8}{"冷启动ms":>10}{"worker RSS MB":>15}{"PSS MB":>10}{"USS MB":>10}{"总 PSS MB":>12}'
+        )
+        for preload in ('0', '1'):
+            started = time.monotonic()
+            with gunicorn_server(options['profile'], options['port'], options['workers'], GUNICORN_PRELOAD=preload) as process:
+                self._get(options)
+                cold_start = time.monotonic() - started
+                for _ in range(options['requests']):
+                    self._get(options)
+                workers = [memory_usage(pid) for pid in child_pids(process.pid)]
+                master = memory_usage(process.pid)
+            if not workers:
+                raise CommandError('没有找到 worker 进程')
+            average = {key: sum(usage[key] for usage in workers) / len(workers) / 1024 for key in ('rss', 'pss', 'uss')}
+            total_pss = (master['pss'] + sum(usage['pss'] for usage in workers)) / 1024
+            self.stdout.write(
+                f'{"开启" if preload == "1" else "关闭":<8}{cold_start * 1000:>10.0f}'
+                f'{average["rss"]:>15.1f}{average["pss"]:>10.1f}{average["uss"]:>10.1f}{total_pss:>12.1f}'
+            )
+
+    def _get(self, options, timeout=30):
+        """请求页面，worker 尚未就绪时重试"""
+        deadline = time.monotonic() + timeout
+        while True:
+            connection = http.client.HTTPConnection('127.0.0.1', options['port'], timeout=timeout)
+            try:
+                connection.request('GET', options['path'])
+                connection.getresponse().read()
+                return
+            except (OSError, http.client.HTTPException):
+                if time.monotonic() > deadline:
+                    raise CommandError('请求超时')
+                time.sleep(0.05)
+            finally:
+                connection.close()
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from tasks.models import TaskAttachment
+
+
+class Command(BaseCommand):
+    help = '删除长时间未完成的附件上传及其临时文件'
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timezone.timedelta(hours=settings.ATTACHMENT_STALE_HOURS)
+        stale = TaskAttachment.objects.filter(status='uploading', updated_at__lt=cutoff)
+        # 逐条删除，post_delete 信号会删除对应文件
+        count = 0
+        for attachment in stale.iterator():
+            attachment.delete()
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'已删除未完成的上传 {count} 个'))
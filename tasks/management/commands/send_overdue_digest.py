@@ -0,0 +1,55 @@
+from itertools import groupby
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    """
+    发送逾期任务汇总邮件
+
+    一次索引扫描找出尚未提醒过的逾期任务，按负责人合并为一封邮件，
+    所有邮件复用同一个 SMTP 连接发送。建议通过定时任务每小时执行一次。
+    """
+    help = '按负责人汇总发送新逾期任务提醒'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='只输出将要发送的汇总，不发送也不标记')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        tasks = (
+            Task.objects.overdue(now)
+            .filter(overdue_notified_at__isnull=True)
+            .select_related('assignee', 'project')
+            .only('id', 'title', 'due_date', 'assignee__username', 'assignee__email', 'project__name')
+            .order_by('assignee_id', 'due_date')
+        )
+
+        messages = []
+        notified_ids = []
+        for assignee, items in groupby(tasks, key=lambda task: task.assignee):
+            items = list(items)
+            notified_ids.extend(task.id for task in items)
+            if not assignee.email:
+                continue
+            lines = [
+                f'- [{task.project.name}] {task.title}（截止：{timezone.localtime(task.due_date):%Y-%m-%d %H:%M}）'
+                for task in items
+            ]
+            messages.append((
+                f'TaskFlowPro 逾期任务提醒（{len(items)} 项）',
+                f'{assignee.username}，您好：\n\n以下任务已超过截止日期：\n' + '\n'.join(lines),
+                settings.DEFAULT_FROM_EMAIL,
+                [assignee.email],
+            ))
+
+        if options['dry_run']:
+            self.stdout.write(f'逾期任务 {len(notified_ids)} 项，待发送邮件 {len(messages)} 封（未发送）')
+            return
+
+        sent = send_mass_mail(messages, fail_silently=False) if messages else 0
+        Task.objects.filter(id__in=notified_ids).update(overdue_notified_at=now)
+        self.stdout.write(self.style.SUCCESS(f'已提醒逾期任务 {len(notified_ids)} 项，发送邮件 {sent} 封'))
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="overdue_notified_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="逾期提醒时间"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["status", "due_date"], name="tasks_task_status_0eabcf_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("tasks", "0003_task_board_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskAttachment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "upload_id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        unique=True,
+                        verbose_name="上传编号",
+                    ),
+                ),
+                ("filename", models.CharField(max_length=255, verbose_name="文件名")),
+                (
+                    "content_type",
+                    models.CharField(
+                        blank=True, max_length=100, verbose_name="文件类型"
+                    ),
+                ),
+                ("size", models.BigIntegerField(verbose_name="文件大小")),
+                (
+                    "received",
+                    models.BigIntegerField(default=0, verbose_name="已接收字节数"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("uploading", "上传中"), ("complete", "已完成")],
+                        default="uploading",
+                        max_length=10,
+                        verbose_name="状态",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="创建时间"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="更新时间"),
+                ),
+                (
+                    "task",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="attachments",
+                        to="tasks.task",
+                        verbose_name="任务",
+                    ),
+                ),
+                (
+                    "uploaded_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="task_attachments",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="上传者",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "任务附件",
+                "verbose_name_plural": "任务附件",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["task", "status", "-created_at"],
+                        name="tasks_taska_task_id_cb2481_idx",
+                    ),
+                    models.Index(
+                        fields=["status", "updated_at"],
+                        name="tasks_taska_status_888252_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
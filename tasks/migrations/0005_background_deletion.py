@@ -0,0 +1,105 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("tasks", "0004_task_attachment"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="deleted_at",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="删除时间"
+            ),
+        ),
+        migrations.CreateModel(
+            name="Deletion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "target",
+                    models.CharField(
+                        choices=[("project", "项目"), ("task", "任务")],
+                        max_length=10,
+                        verbose_name="删除对象",
+                    ),
+                ),
+                ("object_id", models.BigIntegerField(verbose_name="对象ID")),
+                (
+                    "label",
+                    models.CharField(blank=True, max_length=200, verbose_name="名称"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "等待中"),
+                            ("running", "删除中"),
+                            ("done", "已完成"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                        verbose_name="状态",
+                    ),
+                ),
+                (
+                    "progress",
+                    models.JSONField(
+                        blank=True, default=dict, verbose_name="已删除行数"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="创建时间"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="更新时间"),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="完成时间"
+                    ),
+                ),
+                (
+                    "requested_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="操作人",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "后台删除",
+                "verbose_name_plural": "后台删除",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="deletion",
+            constraint=models.UniqueConstraint(
+                fields=("target", "object_id"), name="deletion_unique_object"
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0005_background_deletion"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="task",
+            name="deleted_at",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                null=True,
+                verbose_name="删除时间",
+            ),
+        ),
+    ]
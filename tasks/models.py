@@ -1,8 +1,70 @@
+import uuid
+from pathlib import Path
+
 from django.db import models
+from django.db.models import Case, When, Value, Q
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.utils import timezone
 from projects.models import Project
 
+class TaskQuerySet(models.QuerySet):
+    """
+    任务查询集，逾期与即将到期的判断在数据库中完成
+    """
+    OPEN_STATUSES = ('pending', 'in_progress')
+
+    def visible_to(self, user):
+        """用户可见的任务：管理员可见全部，其他人可见所在项目及自己负责/创建的任务"""
+        if user.profile.is_admin:
+            return self
+        return self.filter(
+            Q(project__members=user) | Q(assignee=user) | Q(creator=user)
+        ).distinct()
+
+    def open(self):
+        """未完成的任务（按状态枚举以便使用 (status, due_date) 索引）"""
+        return self.filter(status__in=self.OPEN_STATUSES)
+
+    def overdue(self, now=None):
+        """已逾期：未完成且截止日期早于当前时间"""
+        now = now or timezone.now()
+        return self.open().filter(due_date__lt=now)
+
+    def due_soon(self, now=None, days=None):
+        """即将到期：未完成且在未来若干天内截止"""
+        now = now or timezone.now()
+        days = settings.TASK_DUE_SOON_DAYS if days is None else days
+        return self.open().filter(due_date__gte=now, due_date__lt=now + timezone.timedelta(days=days))
+
+    def with_due_state(self, now=None, days=None):
+        """标注 due_state：overdue / due_soon / normal / none"""
+        now = now or timezone.now()
+        days = settings.TASK_DUE_SOON_DAYS if days is None else days
+        is_open = Q(status__in=self.OPEN_STATUSES)
+        return self.annotate(due_state=Case(
+            When(due_date__isnull=True, then=Value('none')),
+            When(is_open & Q(due_date__lt=now), then=Value('overdue')),
+            When(is_open & Q(due_date__lt=now + timezone.timedelta(days=days)), then=Value('due_soon')),
+            default=Value('normal'),
+            output_field=models.CharField(),
+        ))
+
+class TaskManager(models.Manager.from_queryset(TaskQuerySet)):
+    """
+    默认不返回已标记删除的任务以及已标记删除项目下的任务
+
+    标记删除的项目很少，用 NOT IN 子查询排除，不 JOIN 项目表（避免 select_for_update 同时锁住项目行）。
+    后台清理通过 _base_manager 访问这些任务。
+    """
+
+    def get_queryset(self):
+        deleted_projects = Project._base_manager.filter(deleted_at__isnull=False).values('id')
+        return super().get_queryset().filter(deleted_at=None).exclude(project_id__in=deleted_projects)
+
+
 class Task(models.Model):
     """
     任务模型
@@ -30,18 +92,28 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
     order = models.IntegerField(default=0, verbose_name='排序')
+    overdue_notified_at = models.DateTimeField(null=True, blank=True, verbose_name='逾期提醒时间')
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True, verbose_name='删除时间')
+    
+    objects = TaskManager()
     
     class Meta:
         verbose_name = '任务'
         verbose_name_plural = '任务'
         ordering = ['order', '-created_at']
+        indexes = [
+            models.Index(fields=['status', 'due_date']),
+            models.Index(fields=['project', 'status', 'order', '-created_at']),
+        ]
     
     def __str__(self):
         return self.title
     
     @property
     def is_overdue(self):
-        """检查任务是否逾期"""
+        """检查任务是否逾期（优先使用 with_due_state 的数据库标注）"""
+        if hasattr(self, 'due_state'):
+            return self.due_state == 'overdue'
         if self.due_date and self.status != 'completed':
             return timezone.now() > self.due_date
         return False
@@ -53,3 +125,99 @@ class Task(models.Model):
             delta = self.due_date - timezone.now()
             return delta.days
         return None
+
+
+class TaskAttachment(models.Model):
+    """
+    任务附件
+
+    文件保存在 ATTACHMENT_ROOT（不在公开的 MEDIA_ROOT 下），分块上传：
+    先创建记录得到 upload_id，再按偏移量逐块追加，received 等于 size 时上传完成。
+    下载时在 Django 中检查权限，再交给 nginx 通过 X-Accel-Redirect 发送文件。
+    """
+    STATUS_CHOICES = (
+        ('uploading', '上传中'),
+        ('complete', '已完成'),
+    )
+
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='attachments', verbose_name='任务')
+    uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_attachments', verbose_name='上传者')
+    upload_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False, verbose_name='上传编号')
+    filename = models.CharField(max_length=255, verbose_name='文件名')
+    content_type = models.CharField(max_length=100, blank=True, verbose_name='文件类型')
+    size = models.BigIntegerField(verbose_name='文件大小')
+    received = models.BigIntegerField(default=0, verbose_name='已接收字节数')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='uploading', verbose_name='状态')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        verbose_name = '任务附件'
+        verbose_name_plural = '任务附件'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['task', 'status', '-created_at']),
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return self.filename
+
+    @property
+    def relative_path(self):
+        """相对 ATTACHMENT_ROOT 的存储路径，按任务分目录"""
+        return f'{self.task_id}/{self.upload_id.hex}'
+
+    @property
+    def file_path(self):
+        return Path(settings.ATTACHMENT_ROOT) / self.relative_path
+
+    @property
+    def is_complete(self):
+        return self.status == 'complete'
+
+
+@receiver(post_delete, sender=TaskAttachment)
+def remove_attachment_file(sender, instance, **kwargs):
+    """删除附件记录（包括随任务级联删除）时删除文件"""
+    instance.file_path.unlink(missing_ok=True)
+
+
+class Deletion(models.Model):
+    """
+    后台删除记录
+
+    项目或任务先标记 deleted_at（默认管理器随即不再返回），再由后台任务按依赖顺序分批删除
+    评论点赞、评论、搜索索引、附件与任务，每批一个短事务。progress 记录各类已删除的行数，
+    中断后重新执行会从剩余的数据继续。
+    """
+    TARGET_CHOICES = (
+        ('project', '项目'),
+        ('task', '任务'),
+    )
+    STATUS_CHOICES = (
+        ('pending', '等待中'),
+        ('running', '删除中'),
+        ('done', '已完成'),
+    )
+
+    target = models.CharField(max_length=10, choices=TARGET_CHOICES, verbose_name='删除对象')
+    object_id = models.BigIntegerField(verbose_name='对象ID')
+    label = models.CharField(max_length=200, blank=True, verbose_name='名称')
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name='操作人')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name='状态')
+    progress = models.JSONField(default=dict, blank=True, verbose_name='已删除行数')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='完成时间')
+
+    class Meta:
+        verbose_name = '后台删除'
+        verbose_name_plural = '后台删除'
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['target', 'object_id'], name='deletion_unique_object'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_target_display()} {self.label or self.object_id}"
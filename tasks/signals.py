@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# 批量更新任务状态后发送（QuerySet.update 不会触发 post_save）
+# 参数：task_ids 实际被修改的任务ID列表，status 新状态，project_ids 涉及的项目ID集合
+tasks_status_changed = Signal()
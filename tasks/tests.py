@@ -1,3 +1,496 @@
-from django.test import TestCase
+import fcntl
+import json
+import shutil
+import tempfile
 
-# Create your tests here.
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser, User
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from comments.models import Comment, CommentLike
+from projects.models import Project
+from search.autocomplete import VERSION_KEY
+from users.stats import get_dashboard_stats
+from .deletion import run_deletion, schedule_deletion
+from .facets import compute_task_facets, get_task_facets
+from .models import Deletion, Task, TaskAttachment
+from .signals import tasks_status_changed
+from .views import update_task_order, update_task_order_async, update_task_status, update_task_status_async
+
+
+class BoardTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='pass')
+        cls.member = User.objects.create_user('member', password='pass')
+        cls.outsider = User.objects.create_user('outsider', password='pass')
+        cls.project = Project.objects.create(name='看板项目', owner=cls.owner)
+        cls.project.members.add(cls.owner, cls.member)
+
+    def create_task(self, title, **kwargs):
+        kwargs.setdefault('creator', self.owner)
+        kwargs.setdefault('assignee', self.owner)
+        return Task.objects.create(title=title, project=self.project, **kwargs)
+
+    def column(self, status='pending'):
+        return list(
+            Task.objects.filter(project=self.project, status=status)
+            .order_by('order', '-created_at').values_list('title', flat=True)
+        )
+
+
+class MoveBoardTaskTests(BoardTestMixin, TestCase):
+    url = reverse('tasks:move_board_task')
+
+    def move(self, user, task, status, ordered):
+        self.client.force_login(user)
+        return self.client.post(self.url, {
+            'task_id': task.pk,
+            'status': status,
+            'task_ids[]': [t.pk for t in ordered],
+        }).json()
+
+    def test_move_keeps_unloaded_tasks_in_place(self):
+        # 列中所有任务 order 相同，按创建时间倒序：e d c b a
+        tasks = {title: self.create_task(title) for title in 'abcde'}
+        moving = self.create_task('x', status='completed')
+        # 只加载了前两个任务，把 x 放在 e 与 d 之间
+        result = self.move(self.owner, moving, 'pending', [tasks['e'], moving, tasks['d']])
+        self.assertTrue(result['success'])
+        self.assertEqual(self.column(), ['e', 'x', 'd', 'c', 'b', 'a'])
+
+    def test_move_to_head_and_end_of_loaded_range(self):
+        tasks = {title: self.create_task(title) for title in 'abc'}
+        self.move(self.owner, tasks['a'], 'pending', [tasks['a'], tasks['c'], tasks['b']])
+        self.assertEqual(self.column(), ['a', 'c', 'b'])
+        self.move(self.owner, tasks['c'], 'pending', [tasks['a'], tasks['b'], tasks['c']])
+        self.assertEqual(self.column(), ['a', 'b', 'c'])
+
+    def test_other_tasks_keep_gaps_without_rewrite(self):
+        first = self.create_task('first', order=10)
+        last = self.create_task('last', order=20)
+        moving = self.create_task('x', status='completed')
+        self.move(self.owner, moving, 'pending', [first, moving, last])
+        self.assertEqual(self.column(), ['first', 'x', 'last'])
+        self.assertEqual(Task.objects.get(pk=last.pk).order, 20)
+
+    def test_outsider_cannot_move_into_board(self):
+        task = self.create_task('a', assignee=self.outsider, creator=self.outsider)
+        self.client.force_login(self.outsider)
+        response = self.client.post(self.url, {'task_id': task.pk, 'status': 'completed', 'task_ids[]': [task.pk]})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Task.objects.get(pk=task.pk).status, 'pending')
+
+    def test_member_needs_edit_permission_on_moved_task(self):
+        task = self.create_task('a')
+        result = self.move(self.member, task, 'completed', [task])
+        self.assertFalse(result['success'])
+        self.assertEqual(Task.objects.get(pk=task.pk).status, 'pending')
+
+    def test_rejects_tasks_from_other_columns(self):
+        other_project = Project.objects.create(name='其他项目', owner=self.owner)
+        foreign = Task.objects.create(title='foreign', project=other_project, creator=self.owner, assignee=self.owner)
+        task = self.create_task('a')
+        result = self.move(self.owner, task, 'pending', [foreign, task])
+        self.assertFalse(result['success'])
+
+
+class AttachmentUploadTests(BoardTestMixin, TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings_override = override_settings(ATTACHMENT_ROOT=self.root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.task = self.create_task('附件任务')
+        self.client.force_login(self.owner)
+        response = self.client.post(
+            reverse('tasks:create_attachment', kwargs={'pk': self.task.pk}), {'filename': 'a.txt', 'size': 10}
+        )
+        self.attachment = TaskAttachment.objects.get(upload_id=response.json()['upload_id'])
+        self.url = reverse('tasks:upload_attachment_chunk', kwargs={'upload_id': self.attachment.upload_id})
+
+    def upload(self, offset, data):
+        return self.client.post(self.url, data=data, content_type='application/octet-stream', HTTP_X_UPLOAD_OFFSET=str(offset))
+
+    def test_chunks_are_appended_at_offsets(self):
+        self.assertEqual(self.upload(0, b'hello').json()['offset'], 5)
+        result = self.upload(5, b'world').json()
+        self.assertEqual((result['offset'], result['complete']), (10, True))
+        self.attachment.refresh_from_db()
+        self.assertEqual(self.attachment.file_path.read_bytes(), b'helloworld')
+        self.assertEqual(self.attachment.status, 'complete')
+
+    def test_wrong_offset_returns_server_offset(self):
+        self.upload(0, b'hello')
+        response = self.upload(3, b'xxxxx')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 5)
+        # 按服务器返回的偏移量续传
+        self.assertEqual(self.upload(5, b'world').json()['offset'], 10)
+        self.assertEqual(self.attachment.file_path.read_bytes(), b'helloworld')
+
+    def test_resend_of_recorded_chunk_is_rejected(self):
+        self.upload(0, b'hello')
+        self.assertEqual(self.upload(0, b'HELLO').status_code, 409)
+        self.assertEqual(self.attachment.file_path.read_bytes(), b'hello')
+
+    def test_concurrent_writer_is_rejected(self):
+        self.attachment.file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.attachment.file_path, 'ab') as other:
+            fcntl.flock(other, fcntl.LOCK_EX)
+            response = self.upload(0, b'hello')
+        self.assertEqual(response.status_code, 409)
+        self.attachment.refresh_from_db()
+        self.assertEqual(self.attachment.received, 0)
+
+    def test_chunk_beyond_size_is_rejected(self):
+        self.assertEqual(self.upload(0, b'0123456789abc').status_code, 409)
+
+
+class TaskDetailConditionalGetTests(BoardTestMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(self.owner)
+
+    def get(self, task, **headers):
+        return self.client.get(reverse('tasks:task_detail', kwargs={'pk': task.pk}), **headers)
+
+    def test_unchanged_task_returns_304(self):
+        task = self.create_task('a')
+        etag = self.get(task)['ETag']
+        self.assertEqual(self.get(task, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_edit_changes_etag(self):
+        task = self.create_task('a')
+        etag = self.get(task)['ETag']
+        task.title = 'b'
+        task.save()
+        self.assertEqual(self.get(task, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_new_comment_changes_etag(self):
+        task = self.create_task('a')
+        etag = self.get(task)['ETag']
+        task.comments.create(author=self.owner, content='新评论')
+        self.assertEqual(self.get(task, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_days_until_due_changes_etag(self):
+        now = timezone.now()
+        task = self.create_task('a', due_date=now + timedelta(days=10, hours=1))
+        response = self.get(task)
+        self.assertNotIn('Last-Modified', response)
+        with mock.patch('django.utils.timezone.now', return_value=now + timedelta(days=1)):
+            self.assertEqual(self.get(task, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_other_users_cannot_see_task(self):
+        task = self.create_task('a')
+        self.client.force_login(self.outsider)
+        self.assertEqual(self.get(task).status_code, 404)
+
+
+class BenchmarkServerCommandTests(TestCase):
+    def test_refuses_without_debug_or_allow_writes(self):
+        with self.assertRaisesMessage(CommandError, '--allow-writes'):
+            call_command('benchmark_server', stdout=StringIO())
+        self.assertFalse(User.objects.filter(username='benchmark_user').exists())
+
+    @override_settings(DEBUG=True)
+    def test_fixtures_removed_after_run(self):
+        other = User.objects.create_user('other', password='pass')
+        # 同名的其他用户的项目不会被复用或删除
+        kept = Project.objects.create(name='压测项目', owner=other)
+        with mock.patch(
+            'tasks.management.commands.benchmark_server.Command._benchmark'
+        ) as benchmark:
+            call_command('benchmark_server', stdout=StringIO())
+        task_ids = benchmark.call_args.args[3]
+        self.assertEqual(len(task_ids), 20)
+        self.assertFalse(User.objects.filter(username='benchmark_user').exists())
+        self.assertFalse(Task._base_manager.filter(pk__in=task_ids).exists())
+        self.assertFalse(Comment.objects.filter(task_id__in=task_ids).exists())
+        self.assertTrue(Project.objects.filter(pk=kept.pk).exists())
+
+
+@override_settings(JOBS_EAGER=False, DELETION_BATCH_SIZE=2, DELETION_BATCH_PAUSE_MS=0)
+class BackgroundDeletionTests(BoardTestMixin, TestCase):
+    def setUp(self):
+        self.tasks = [self.create_task(f'任务 {index}') for index in range(3)]
+        for task in self.tasks:
+            root = Comment.objects.create(task=task, author=self.owner, content='评论')
+            reply = Comment.objects.create(task=task, author=self.member, content='回复', parent=root)
+            Comment.objects.create(task=task, author=self.owner, content='回复的回复', parent=reply)
+            CommentLike.objects.create(comment=root, user=self.member)
+
+    def test_schedule_hides_project_and_tasks_immediately(self):
+        deletion = schedule_deletion(self.project, self.owner)
+        self.assertEqual(schedule_deletion(self.project, self.owner), deletion)
+        self.assertFalse(Project.objects.filter(pk=self.project.pk).exists())
+        self.assertFalse(Task.objects.filter(project=self.project).exists())
+        self.assertEqual(Task._base_manager.filter(project=self.project).count(), 3)
+
+    def test_autocomplete_invalidated_after_commit(self):
+        cache.set(VERSION_KEY, 1, None)
+        with self.captureOnCommitCallbacks() as callbacks:
+            schedule_deletion(self.project, self.owner)
+            self.assertEqual(cache.get(VERSION_KEY), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            for callback in callbacks:
+                callback()
+        self.assertNotEqual(cache.get(VERSION_KEY), 1)
+
+    def test_run_deletion_removes_everything_in_batches(self):
+        deletion = schedule_deletion(self.project, self.owner)
+        self.assertTrue(run_deletion(deletion))
+        deletion.refresh_from_db()
+        self.assertEqual(deletion.status, 'done')
+        self.assertEqual(deletion.progress, {'comment_likes': 3, 'comments': 9, 'search_documents': 12, 'tasks': 3})
+        self.assertFalse(Project._base_manager.filter(pk=self.project.pk).exists())
+        self.assertFalse(Task._base_manager.filter(pk__in=[task.pk for task in self.tasks]).exists())
+        self.assertFalse(Comment.objects.filter(task_id__in=[task.pk for task in self.tasks]).exists())
+
+    def test_run_deletion_resumes_after_time_limit(self):
+        deletion = schedule_deletion(self.tasks[0], self.owner)
+        with mock.patch('tasks.deletion.time.monotonic', side_effect=[0, *range(100, 200)]):
+            self.assertFalse(run_deletion(deletion))
+        self.assertEqual(Deletion.objects.get(pk=deletion.pk).status, 'running')
+        self.assertTrue(run_deletion(deletion))
+        self.assertFalse(Task._base_manager.filter(pk=self.tasks[0].pk).exists())
+        self.assertEqual(Comment.objects.filter(task=self.tasks[1]).count(), 3)
+
+    def test_outsider_cannot_delete_task(self):
+        self.client.force_login(self.outsider)
+        self.client.post(reverse('tasks:task_delete', args=[self.tasks[0].pk]))
+        self.assertFalse(Deletion.objects.exists())
+        self.assertTrue(Task.objects.filter(pk=self.tasks[0].pk).exists())
+
+
+class TaskFacetTests(BoardTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.create_task('a', status='pending', priority='high')
+        self.create_task('b', status='pending', priority='low', assignee=self.member)
+        self.create_task('c', status='completed', priority='high')
+        other = Project.objects.create(name='其他项目', owner=self.outsider)
+        Task.objects.create(title='d', project=other, creator=self.outsider, assignee=self.outsider, status='pending')
+
+    def test_counts_scoped_to_visible_tasks(self):
+        facets = compute_task_facets(self.member, {})
+        self.assertEqual(facets['status']['counts'], {'pending': 2, 'completed': 1})
+        self.assertEqual(facets['project']['top'], [(self.project.pk, '看板项目', 3)])
+        self.assertEqual(compute_task_facets(self.outsider, {})['status']['total'], 1)
+
+    def test_each_dimension_counted_under_other_filters(self):
+        facets = get_task_facets(self.member, {'status': 'pending', 'priority': 'high'})
+        # 状态维度只应用优先级筛选，优先级维度只应用状态筛选
+        self.assertEqual(facets['status']['counts'], {'pending': 1, 'completed': 1})
+        self.assertEqual(facets['priority']['counts'], {'high': 1, 'low': 1})
+        # 其余维度同时应用两个筛选
+        self.assertEqual(facets['assignee']['counts'], {self.owner.pk: 1})
+
+    def test_admin_sees_all_projects(self):
+        self.owner.profile.role = 'admin'
+        self.owner.profile.save()
+        self.assertEqual(compute_task_facets(self.owner, {})['status']['counts'], {'pending': 3, 'completed': 1})
+
+
+class BulkUpdateTaskStatusTests(BoardTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.mine = self.create_task('我的', assignee=self.member)
+        self.done = self.create_task('已完成', creator=self.member, status='completed')
+        self.forbidden = self.create_task('别人的')
+        self.client.force_login(self.member)
+
+    def post(self, status, task_ids):
+        return self.client.post(reverse('tasks:bulk_update_task_status'), {'status': status, 'task_ids[]': task_ids})
+
+    def test_per_task_results(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post('completed', [self.mine.pk, self.done.pk, self.forbidden.pk, 999999])
+        data = response.json()
+        self.assertEqual(data['updated'], 1)
+        self.assertEqual(data['results'], {
+            str(self.mine.pk): 'updated',
+            str(self.done.pk): 'unchanged',
+            str(self.forbidden.pk): 'forbidden',
+            '999999': 'not_found',
+        })
+        self.assertEqual(Task.objects.get(pk=self.mine.pk).status, 'completed')
+        self.assertEqual(Task.objects.get(pk=self.forbidden.pk).status, 'pending')
+
+    def test_single_update_statement(self):
+        other = self.create_task('另一个', creator=self.member)
+        with CaptureQueriesContext(connection) as queries:
+            self.post('in_progress', [self.mine.pk, other.pk])
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "tasks_task"')]
+        self.assertEqual(len(updates), 1)
+
+    def test_signal_on_commit_invalidates_stats(self):
+        self.assertEqual(get_dashboard_stats(self.member)['assigned']['pending'], 1)
+        received = []
+        tasks_status_changed.connect(lambda **kwargs: received.append(kwargs['task_ids']), weak=False, dispatch_uid='test')
+        self.addCleanup(tasks_status_changed.disconnect, dispatch_uid='test')
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.post('completed', [self.mine.pk])
+        self.assertEqual(received, [])
+        for callback in callbacks:
+            callback()
+        self.assertEqual(received, [[self.mine.pk]])
+        self.assertEqual(get_dashboard_stats(self.member)['assigned']['pending'], 0)
+
+    def test_invalid_input(self):
+        self.assertFalse(self.post('archived', [self.mine.pk]).json()['success'])
+        self.assertFalse(self.post('completed', ['x']).json()['success'])
+        self.assertFalse(self.post('completed', []).json()['success'])
+
+
+class DueStateTests(BoardTestMixin, TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+
+    def due(self, offset, status='pending'):
+        return self.create_task(str(offset), due_date=self.now + offset, status=status)
+
+    def test_boundaries(self):
+        just_overdue = self.due(-timedelta(seconds=1))
+        due_now = self.due(timedelta(0))
+        last_soon = self.due(timedelta(days=3, seconds=-1))
+        not_soon = self.due(timedelta(days=3))
+        completed = self.due(-timedelta(days=1), status='completed')
+        no_due = self.create_task('无截止日期')
+
+        tasks = Task.objects.all()
+        self.assertEqual(list(tasks.overdue(self.now)), [just_overdue])
+        self.assertEqual(set(tasks.due_soon(self.now, days=3)), {due_now, last_soon})
+        states = dict(tasks.with_due_state(self.now, days=3).values_list('pk', 'due_state'))
+        self.assertEqual(states, {
+            just_overdue.pk: 'overdue', due_now.pk: 'due_soon', last_soon.pk: 'due_soon',
+            not_soon.pk: 'normal', completed.pk: 'normal', no_due.pk: 'none',
+        })
+
+
+class SendOverdueDigestTests(BoardTestMixin, TestCase):
+    def setUp(self):
+        self.owner.email = 'owner@example.com'
+        self.owner.save()
+        self.member.email = 'member@example.com'
+        self.member.save()
+        past = timezone.now() - timedelta(hours=1)
+        self.overdue = [
+            self.create_task('一', due_date=past),
+            self.create_task('二', due_date=past),
+            self.create_task('三', due_date=past, assignee=self.member),
+        ]
+        self.future = self.create_task('未到期', due_date=timezone.now() + timedelta(days=1))
+
+    def test_one_mail_per_assignee_and_marks_tasks(self):
+        call_command('send_overdue_digest', stdout=StringIO())
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['member@example.com', 'owner@example.com'])
+        owner_mail = next(message for message in mail.outbox if message.to == ['owner@example.com'])
+        self.assertIn('一', owner_mail.body)
+        self.assertIn('二', owner_mail.body)
+        self.assertEqual(Task.objects.filter(overdue_notified_at__isnull=False).count(), 3)
+        self.assertIsNone(Task.objects.get(pk=self.future.pk).overdue_notified_at)
+
+    def test_second_run_sends_nothing(self):
+        call_command('send_overdue_digest', stdout=StringIO())
+        mail.outbox.clear()
+        call_command('send_overdue_digest', stdout=StringIO())
+        self.assertEqual(mail.outbox, [])
+
+    def test_dry_run_does_not_mark(self):
+        call_command('send_overdue_digest', dry_run=True, stdout=StringIO())
+        self.assertEqual(mail.outbox, [])
+        self.assertFalse(Task.objects.filter(overdue_notified_at__isnull=False).exists())
+
+
+class AsyncTaskViewTests(BoardTestMixin, TestCase):
+    """ASYNC_VIEWS 开启时使用的异步视图与同步版本返回相同的结果"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.admin = User.objects.create_user('admin', password='pass')
+        self.admin.profile.role = 'admin'
+        self.admin.profile.save()
+        self.task = self.create_task('任务', assignee=self.member)
+
+    def responses(self, sync_view, async_view, user, *args, method='post', data=None):
+        """依次调用同步与异步视图，每次使用新的请求对象"""
+        responses = []
+        for view in (sync_view, async_to_sync(async_view)):
+            request = getattr(self.factory, method)('/', data or {})
+            request.user = user
+            responses.append(view(request, *args))
+        return responses
+
+    def assertSameJson(self, sync_view, async_view, user, *args, **kwargs):
+        sync_response, async_response = self.responses(sync_view, async_view, user, *args, **kwargs)
+        self.assertEqual(json.loads(sync_response.content), json.loads(async_response.content))
+        return json.loads(sync_response.content)
+
+    def test_status_update(self):
+        for user in (self.owner, self.member, self.admin):
+            data = self.assertSameJson(update_task_status, update_task_status_async, user, self.task.pk,
+                                       data={'status': 'completed'})
+            self.assertEqual(data, {'success': True, 'message': '状态更新成功', 'status': '已完成'})
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 'completed')
+
+    def test_status_update_rejected(self):
+        data = self.assertSameJson(update_task_status, update_task_status_async, self.outsider, self.task.pk,
+                                   data={'status': 'completed'})
+        self.assertEqual(data, {'success': False, 'message': '权限不足'})
+        data = self.assertSameJson(update_task_status, update_task_status_async, self.owner, self.task.pk,
+                                   data={'status': 'unknown'})
+        self.assertEqual(data['message'], '无效的状态值')
+        data = self.assertSameJson(update_task_status, update_task_status_async, self.owner, self.task.pk,
+                                   method='get')
+        self.assertEqual(data['message'], '请求方法不允许')
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 'pending')
+
+    def test_status_update_missing_task(self):
+        for view in (update_task_status, async_to_sync(update_task_status_async)):
+            request = self.factory.post('/', {'status': 'completed'})
+            request.user = self.owner
+            with self.assertRaises(Http404):
+                view(request, self.task.pk + 100)
+
+    def test_login_required(self):
+        sync_response, async_response = self.responses(update_task_status, update_task_status_async,
+                                                       AnonymousUser(), self.task.pk)
+        self.assertEqual(sync_response.status_code, 302)
+        self.assertEqual(sync_response['Location'], async_response['Location'])
+        sync_response, async_response = self.responses(update_task_order, update_task_order_async, AnonymousUser())
+        self.assertEqual((sync_response.status_code, async_response.status_code), (302, 302))
+
+    def test_order_update(self):
+        tasks = [self.task, self.create_task('第二个'), self.create_task('第三个')]
+        for ordered in (tasks[::-1], tasks):
+            data = self.assertSameJson(update_task_order, update_task_order_async, self.admin,
+                                       data={'task_ids[]': [task.pk for task in ordered]})
+            self.assertEqual(data, {'success': True, 'message': '排序更新成功'})
+            self.assertEqual(
+                list(Task.objects.filter(pk__in=[task.pk for task in tasks]).order_by('order').values_list('pk', flat=True)),
+                [task.pk for task in ordered],
+            )
+
+    def test_order_update_rejected(self):
+        data = self.assertSameJson(update_task_order, update_task_order_async, self.owner,
+                                   data={'task_ids[]': [self.task.pk]})
+        self.assertEqual(data, {'success': False, 'message': '权限不足'})
+        data = self.assertSameJson(update_task_order, update_task_order_async, self.admin,
+                                   data={'task_ids[]': [self.task.pk + 100]})
+        self.assertEqual(data, {'success': False, 'message': '任务不存在'})
+        data = self.assertSameJson(update_task_order, update_task_order_async, self.admin, method='get')
+        self.assertEqual(data['message'], '请求方法不允许')
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
@@ -9,6 +10,14 @@ urlpatterns = [
     path('<int:pk>/', views.TaskDetailView.as_view(), name='task_detail'),
     path('<int:pk>/edit/', views.TaskUpdateView.as_view(), name='task_update'),
     path('<int:pk>/delete/', views.TaskDeleteView.as_view(), name='task_delete'),
-    path('<int:pk>/status/', views.update_task_status, name='update_task_status'),
-    path('order/', views.update_task_order, name='update_task_order'),
+    path('<int:pk>/status/', views.update_task_status_async if settings.ASYNC_VIEWS else views.update_task_status, name='update_task_status'),
+    path('status/bulk/', views.bulk_update_task_status, name='bulk_update_task_status'),
+    path('order/', views.update_task_order_async if settings.ASYNC_VIEWS else views.update_task_order, name='update_task_order'),
+    path('board/<int:project_id>/', views.task_board_view, name='task_board'),
+    path('board/<int:project_id>/column/<str:status>/', views.board_column, name='board_column'),
+    path('board/move/', views.move_board_task, name='move_board_task'),
+    path('<int:pk>/attachments/', views.create_attachment, name='create_attachment'),
+    path('attachments/upload/<uuid:upload_id>/', views.upload_attachment_chunk, name='upload_attachment_chunk'),
+    path('attachments/<int:attachment_id>/download/', views.download_attachment, name='download_attachment'),
+    path('attachments/<int:attachment_id>/delete/', views.delete_attachment, name='delete_attachment'),
 ] 
\ No newline at end of file
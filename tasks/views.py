@@ -1,14 +1,27 @@
+import os
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib import messages
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
-from django.urls import reverse_lazy
-from django.http import JsonResponse
-from django.db.models import Q
-from .models import Task
+from django.urls import reverse, reverse_lazy
+from django.http import JsonResponse, Http404
+from django.db import transaction
+from django.db.models import Q, F, Count, Max
+from django.conf import settings
+from django.views.decorators.http import require_POST
+from django.utils import timezone
+from .models import Task, TaskAttachment
+from .attachments import UploadConflict, append_chunk, attachment_response
+from .deletion import schedule_deletion
+from .facets import get_task_facets
+from .signals import tasks_status_changed
 from .forms import TaskForm, TaskFilterForm
 from projects.models import Project
+from TaskFlowPro.asyncviews import async_login_required
+from TaskFlowPro.conditional import ConditionalGetMixin
+from TaskFlowPro.streaming import render_list
 
 class TaskListView(LoginRequiredMixin, ListView):
     """
@@ -22,7 +35,7 @@ class TaskListView(LoginRequiredMixin, ListView):
     def get_queryset(self):
         """获取用户可见的任务"""
         user = self.request.user
-        queryset = Task.objects.select_related('project', 'assignee', 'creator')
+        queryset = Task.objects.with_due_state().select_related('project', 'assignee', 'creator')
         
         # 根据用户权限过滤
         if not user.profile.is_admin:
@@ -37,6 +50,10 @@ class TaskListView(LoginRequiredMixin, ListView):
                 queryset = queryset.filter(status=form.cleaned_data['status'])
             if form.cleaned_data.get('priority'):
                 queryset = queryset.filter(priority=form.cleaned_data['priority'])
+            if form.cleaned_data.get('due') == 'overdue':
+                queryset = queryset.overdue()
+            elif form.cleaned_data.get('due') == 'due_soon':
+                queryset = queryset.due_soon()
             if form.cleaned_data.get('project'):
                 queryset = queryset.filter(project=form.cleaned_data['project'])
             if form.cleaned_data.get('assignee'):
@@ -46,7 +63,11 @@ class TaskListView(LoginRequiredMixin, ListView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['filter_form'] = TaskFilterForm(self.request.GET, user=self.request.user)
+        filter_form = TaskFilterForm(self.request.GET, user=self.request.user)
+        facets = get_task_facets(self.request.user, filter_form.cleaned_data if filter_form.is_valid() else {})
+        filter_form.apply_facets(facets, self.request.GET)
+        context['filter_form'] = filter_form
+        context['has_tasks'] = bool(context['tasks'])
         return context
 
 @login_required
@@ -55,7 +76,7 @@ def task_list_view(request):
     任务列表视图（函数视图版本）
     """
     user = request.user
-    queryset = Task.objects.select_related('project', 'assignee', 'creator')
+    queryset = Task.objects.with_due_state().select_related('project', 'assignee', 'creator')
     
     # 根据用户权限过滤
     if not user.profile.is_admin:
@@ -70,19 +91,24 @@ def task_list_view(request):
             queryset = queryset.filter(status=filter_form.cleaned_data['status'])
         if filter_form.cleaned_data.get('priority'):
             queryset = queryset.filter(priority=filter_form.cleaned_data['priority'])
+        if filter_form.cleaned_data.get('due') == 'overdue':
+            queryset = queryset.overdue()
+        elif filter_form.cleaned_data.get('due') == 'due_soon':
+            queryset = queryset.due_soon()
         if filter_form.cleaned_data.get('project'):
             queryset = queryset.filter(project=filter_form.cleaned_data['project'])
         if filter_form.cleaned_data.get('assignee'):
             queryset = queryset.filter(assignee=filter_form.cleaned_data['assignee'])
+    facets = get_task_facets(user, filter_form.cleaned_data if filter_form.is_valid() else {})
+    filter_form.apply_facets(facets, request.GET)
     
     context = {
-        'tasks': queryset,
         'filter_form': filter_form,
         'user': user,
     }
-    return render(request, 'tasks/task_list.html', context)
+    return render_list(request, 'tasks/task_list.html', context, 'tasks', queryset, 'tasks/_task_card.html', 'task')
 
-class TaskDetailView(LoginRequiredMixin, DetailView):
+class TaskDetailView(LoginRequiredMixin, ConditionalGetMixin, DetailView):
     """
     任务详情视图
     """
@@ -90,15 +116,42 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
     template_name = 'tasks/task_detail.html'
     context_object_name = 'task'
     
+    def get_validator_parts(self):
+        """任务本身、所属项目、评论以及侧栏中的项目统计"""
+        task = self.object
+        comments = task.comments.aggregate(count=Count('id'), latest=Max('updated_at'))
+        stats = Task.objects.filter(project_id=task.project_id).aggregate(
+            total=Count('id'), completed=Count('id', filter=Q(status='completed'))
+        )
+        attachments = task.attachments.filter(status='complete').aggregate(count=Count('id'), latest=Max('updated_at'))
+        self._comments_latest = comments['latest']
+        self._attachments_latest = attachments['latest']
+        return [
+            task.pk, task.updated_at.isoformat(), task.due_state, task.days_until_due,
+            task.project.updated_at.isoformat(),
+            comments['count'], comments['latest'],
+            stats['total'], stats['completed'],
+            attachments['count'], attachments['latest'],
+        ]
+    
+    def get_last_modified(self):
+        # 有截止日期时页面中的“已逾期 / 还有 N 天”随时间变化，只用 ETag 判断
+        if self.object.due_date:
+            return None
+        return max(filter(None, [
+            self.object.updated_at, self.object.project.updated_at, self._comments_latest, self._attachments_latest,
+        ]))
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['attachments'] = self.object.attachments.filter(status='complete').select_related('uploaded_by')
+        context['attachment_max_size'] = settings.ATTACHMENT_MAX_SIZE
+        return context
+    
     def get_queryset(self):
         """确保用户有权限查看任务"""
         user = self.request.user
-        if user.profile.is_admin:
-            return Task.objects.select_related('project', 'assignee', 'creator')
-        else:
-            return Task.objects.filter(
-                Q(project__members=user) | Q(assignee=user) | Q(creator=user)
-            ).select_related('project', 'assignee', 'creator')
+        return Task.objects.with_due_state().visible_to(user).select_related('project', 'assignee', 'creator')
 
 class TaskCreateView(LoginRequiredMixin, CreateView):
     """
@@ -174,9 +227,11 @@ class TaskDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         user = self.request.user
         return user.profile.is_admin or task.creator == user
     
-    def delete(self, request, *args, **kwargs):
-        messages.success(request, '任务删除成功！')
-        return super().delete(request, *args, **kwargs)
+    def form_valid(self, form):
+        """标记删除后立即返回，评论、附件等由后台任务分批删除"""
+        schedule_deletion(self.object, self.request.user)
+        messages.success(self.request, '任务删除成功！')
+        return redirect(self.get_success_url())
 
 @login_required
 def update_task_status(request, pk):
@@ -205,6 +260,60 @@ def update_task_status(request, pk):
     
     return JsonResponse({'success': False, 'message': '请求方法不允许'})
 
+@login_required
+@require_POST
+def bulk_update_task_status(request):
+    """
+    AJAX 批量更新任务状态
+
+    一次查询完成全部权限检查，一条 UPDATE 完成修改，按任务返回结果：
+    updated / unchanged / forbidden / not_found
+    """
+    user = request.user
+    new_status = request.POST.get('status')
+    if new_status not in dict(Task.STATUS_CHOICES):
+        return JsonResponse({'success': False, 'message': '无效的状态值'})
+    
+    try:
+        task_ids = list(dict.fromkeys(int(i) for i in request.POST.getlist('task_ids[]')))
+    except ValueError:
+        return JsonResponse({'success': False, 'message': '无效的任务编号'})
+    if not task_ids:
+        return JsonResponse({'success': False, 'message': '请选择任务'})
+    if len(task_ids) > settings.TASK_BULK_UPDATE_MAX:
+        return JsonResponse({'success': False, 'message': f'一次最多更新 {settings.TASK_BULK_UPDATE_MAX} 个任务'})
+    
+    results = {task_id: 'not_found' for task_id in task_ids}
+    with transaction.atomic():
+        rows = Task.objects.select_for_update().filter(id__in=task_ids).values_list(
+            'id', 'creator_id', 'assignee_id', 'project_id', 'status'
+        )
+        changed_ids = []
+        project_ids = set()
+        for task_id, creator_id, assignee_id, project_id, status in rows:
+            if not (user.profile.is_admin or creator_id == user.id or assignee_id == user.id):
+                results[task_id] = 'forbidden'
+            elif status == new_status:
+                results[task_id] = 'unchanged'
+            else:
+                results[task_id] = 'updated'
+                changed_ids.append(task_id)
+                project_ids.add(project_id)
+        
+        if changed_ids:
+            Task.objects.filter(id__in=changed_ids).update(status=new_status, updated_at=timezone.now())
+            transaction.on_commit(lambda: tasks_status_changed.send(
+                sender=Task, task_ids=changed_ids, status=new_status, project_ids=project_ids
+            ))
+    
+    return JsonResponse({
+        'success': True,
+        'message': f'已更新 {len(changed_ids)} 个任务',
+        'status': dict(Task.STATUS_CHOICES)[new_status],
+        'updated': len(changed_ids),
+        'results': {str(task_id): result for task_id, result in results.items()},
+    })
+
 @login_required
 def update_task_order(request):
     """
@@ -231,3 +340,278 @@ def update_task_order(request):
             return JsonResponse({'success': False, 'message': str(e)})
     
     return JsonResponse({'success': False, 'message': '请求方法不允许'})
+
+@async_login_required
+async def update_task_status_async(request, pk):
+    """
+    AJAX 更新任务状态（异步版本，ASYNC_VIEWS 开启时使用）
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': '请求方法不允许'})
+    try:
+        task = await Task.objects.aget(pk=pk)
+    except Task.DoesNotExist:
+        raise Http404('任务不存在')
+
+    user = request.user
+    if not (user.profile.is_admin or task.creator_id == user.id or task.assignee_id == user.id):
+        return JsonResponse({'success': False, 'message': '权限不足'})
+
+    new_status = request.POST.get('status')
+    if new_status not in dict(Task.STATUS_CHOICES):
+        return JsonResponse({'success': False, 'message': '无效的状态值'})
+    task.status = new_status
+    await task.asave()
+    return JsonResponse({
+        'success': True,
+        'message': '状态更新成功',
+        'status': task.get_status_display()
+    })
+
+@async_login_required
+async def update_task_order_async(request):
+    """
+    AJAX 更新任务排序（异步版本，一次查询取出任务，一条批量 UPDATE 写回）
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': '请求方法不允许'})
+    if not request.user.profile.is_admin:
+        return JsonResponse({'success': False, 'message': '权限不足'})
+
+    try:
+        task_ids = [int(task_id) for task_id in request.POST.getlist('task_ids[]')]
+    except ValueError:
+        return JsonResponse({'success': False, 'message': '无效的任务编号'})
+    tasks = {task.id: task async for task in Task.objects.filter(id__in=task_ids).only('id', 'order', 'updated_at')}
+    if len(tasks) != len(set(task_ids)):
+        return JsonResponse({'success': False, 'message': '任务不存在'})
+
+    now = timezone.now()
+    for index, task_id in enumerate(task_ids):
+        tasks[task_id].order = index
+        tasks[task_id].updated_at = now
+    await Task.objects.abulk_update(tasks.values(), ['order', 'updated_at'])
+    return JsonResponse({'success': True, 'message': '排序更新成功'})
+
+def _board_project(user, project_id):
+    """看板所属项目：管理员可访问全部激活项目，其他人须为项目成员"""
+    projects = Project.objects.filter(is_active=True)
+    if not user.profile.is_admin:
+        projects = projects.filter(members=user)
+    return get_object_or_404(projects, pk=project_id)
+
+@login_required
+def task_board_view(request, project_id):
+    """
+    项目看板视图，每个状态一列，列内任务由 board_column 分页加载
+    """
+    project = _board_project(request.user, project_id)
+    columns = [{'status': value, 'label': label} for value, label in Task.STATUS_CHOICES]
+    context = {
+        'project': project,
+        'columns': columns,
+        'page_size': settings.TASK_BOARD_PAGE_SIZE,
+    }
+    return render(request, 'tasks/task_board.html', context)
+
+@login_required
+def board_column(request, project_id, status):
+    """
+    AJAX 分页获取看板某一列的任务
+    """
+    if status not in dict(Task.STATUS_CHOICES):
+        raise Http404('无效的状态值')
+    project = _board_project(request.user, project_id)
+    
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    page_size = settings.TASK_BOARD_PAGE_SIZE
+    offset = (page - 1) * page_size
+    
+    # 借助 (project, status, order, -created_at) 索引，只读取当前页（多取一条判断是否有下一页）
+    tasks = list(
+        Task.objects.with_due_state()
+        .filter(project=project, status=status)
+        .select_related('assignee')
+        .only('id', 'title', 'priority', 'status', 'due_date', 'order', 'assignee__username')
+        .order_by('order', '-created_at')[offset:offset + page_size + 1]
+    )
+    has_next = len(tasks) > page_size
+    
+    return JsonResponse({
+        'success': True,
+        'status': status,
+        'page': page,
+        'has_next': has_next,
+        'tasks': [
+            {
+                'id': task.id,
+                'title': task.title,
+                'priority': task.priority,
+                'priority_display': task.get_priority_display(),
+                'assignee': task.assignee.username,
+                'due_date': task.due_date.strftime('%m-%d %H:%M') if task.due_date else None,
+                'due_state': task.due_state,
+                'url': reverse('tasks:task_detail', kwargs={'pk': task.id}),
+            }
+            for task in tasks[:page_size]
+        ],
+    })
+
+@login_required
+@require_POST
+def move_board_task(request):
+    """
+    AJAX 看板拖拽：把任务移到目标列中 task_ids[] 所示的位置
+
+    task_ids[] 是目标列已加载部分的新顺序，只用来确定被拖动任务前一个任务是谁。
+    新的 order 取前一个任务的 order + 1，只有排在插入位置之后且 order 会冲突的任务整体后移，
+    不改写未加载的任务，也不按当前页重新编号。
+    """
+    user = request.user
+    new_status = request.POST.get('status')
+    if new_status not in dict(Task.STATUS_CHOICES):
+        return JsonResponse({'success': False, 'message': '无效的状态值'})
+    
+    try:
+        task_id = int(request.POST.get('task_id', ''))
+        ordered_ids = [int(i) for i in request.POST.getlist('task_ids[]')]
+    except ValueError:
+        return JsonResponse({'success': False, 'message': '无效的任务编号'})
+    if task_id not in ordered_ids:
+        ordered_ids.append(task_id)
+    
+    with transaction.atomic():
+        task = Task.objects.select_for_update().filter(pk=task_id).first()
+        if task is None:
+            return JsonResponse({'success': False, 'message': '任务不存在'})
+        # 看板可见性（项目成员）与任务编辑权限
+        _board_project(user, task.project_id)
+        if not (user.profile.is_admin or task.creator_id == user.id or task.assignee_id == user.id):
+            return JsonResponse({'success': False, 'message': '权限不足'})
+        
+        column = Task.objects.filter(project_id=task.project_id, status=new_status).exclude(pk=task_id)
+        others = [i for i in ordered_ids if i != task_id]
+        neighbours = {
+            row['id']: row for row in column.filter(id__in=others).values('id', 'order', 'created_at')
+        }
+        if len(neighbours) != len(set(others)):
+            return JsonResponse({'success': False, 'message': '看板已被修改，请刷新后重试'})
+        
+        position = ordered_ids.index(task_id)
+        if position == 0:
+            # 放到列首：排在当前最小的 order 之前
+            first = column.order_by('order').values_list('order', flat=True).first()
+            task.order = 0 if first is None else first - 1
+        else:
+            previous = neighbours[ordered_ids[position - 1]]
+            task.order = previous['order'] + 1
+            # 排在前一个任务之后的任务：order 更大，或 order 相同但创建得更早
+            following = column.filter(
+                Q(order__gt=previous['order'])
+                | Q(order=previous['order'], created_at__lt=previous['created_at'])
+            ).exclude(pk=previous['id'])
+            if following.filter(order__lte=task.order).exists():
+                following.update(order=F('order') + 2)
+        
+        task.status = new_status
+        task.save(update_fields=['status', 'order', 'updated_at'])
+    
+    return JsonResponse({
+        'success': True,
+        'message': '任务已移动',
+        'status': task.get_status_display(),
+    })
+
+def _attachment_json(attachment):
+    return {
+        'id': attachment.id,
+        'upload_id': str(attachment.upload_id),
+        'filename': attachment.filename,
+        'size': attachment.size,
+        'offset': attachment.received,
+        'complete': attachment.is_complete,
+        'chunk_size': settings.ATTACHMENT_CHUNK_SIZE,
+        'url': reverse('tasks:download_attachment', kwargs={'attachment_id': attachment.id}),
+    }
+
+@login_required
+@require_POST
+def create_attachment(request, pk):
+    """
+    AJAX 创建附件上传，返回 upload_id，之后按块上传文件内容
+    """
+    task = get_object_or_404(Task.objects.visible_to(request.user), pk=pk)
+    filename = os.path.basename(request.POST.get('filename', '').replace('\\', '/')).strip()[:255]
+    try:
+        size = int(request.POST.get('size', ''))
+    except ValueError:
+        return JsonResponse({'success': False, 'message': '无效的文件大小'})
+    if not filename:
+        return JsonResponse({'success': False, 'message': '请选择文件'})
+    if not 0 <= size <= settings.ATTACHMENT_MAX_SIZE:
+        return JsonResponse({'success': False, 'message': f'附件不能超过 {settings.ATTACHMENT_MAX_SIZE // (1024 * 1024)} MB'})
+
+    attachment = TaskAttachment.objects.create(
+        task=task,
+        uploaded_by=request.user,
+        filename=filename,
+        content_type=request.POST.get('content_type', '')[:100],
+        size=size,
+        status='complete' if size == 0 else 'uploading',
+    )
+    if size == 0:
+        attachment.file_path.parent.mkdir(parents=True, exist_ok=True)
+        attachment.file_path.touch()
+    return JsonResponse({'success': True, **_attachment_json(attachment)})
+
+@login_required
+def upload_attachment_chunk(request, upload_id):
+    """
+    AJAX 分块上传：GET 返回已接收的字节数（用于断点续传），
+    POST 的请求体为从 X-Upload-Offset 开始的一块原始数据
+    """
+    attachment = get_object_or_404(TaskAttachment, upload_id=upload_id, uploaded_by=request.user)
+    if request.method == 'GET' or attachment.is_complete:
+        return JsonResponse({'success': True, **_attachment_json(attachment)})
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': '请求方法不允许'})
+
+    try:
+        offset = int(request.headers.get('X-Upload-Offset', ''))
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return JsonResponse({'success': False, 'message': '无效的偏移量'})
+    try:
+        attachment.received = append_chunk(attachment, offset, request, length)
+    except UploadConflict as exc:
+        return JsonResponse({'success': False, 'message': str(exc), 'offset': exc.received}, status=409)
+    if attachment.received == attachment.size:
+        attachment.status = 'complete'
+    return JsonResponse({'success': True, **_attachment_json(attachment)})
+
+@login_required
+def download_attachment(request, attachment_id):
+    """
+    下载附件：检查任务权限后交给 nginx 发送文件
+    """
+    attachment = get_object_or_404(
+        TaskAttachment.objects.filter(status='complete', task__in=Task.objects.visible_to(request.user).values('id')),
+        pk=attachment_id,
+    )
+    return attachment_response(attachment)
+
+@login_required
+@require_POST
+def delete_attachment(request, attachment_id):
+    """
+    AJAX 删除附件：上传者、任务创建者或管理员
+    """
+    attachment = get_object_or_404(TaskAttachment.objects.select_related('task'), pk=attachment_id)
+    user = request.user
+    if not (user.profile.is_admin or attachment.uploaded_by_id == user.id or attachment.task.creator_id == user.id):
+        return JsonResponse({'success': False, 'message': '权限不足'})
+    attachment.delete()
+    return JsonResponse({'success': True, 'message': '附件已删除'})
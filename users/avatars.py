@@ -0,0 +1,74 @@
+"""
+头像缩略图
+
+按原图内容的哈希命名（avatars/thumbs/<哈希前两位>/<哈希>-<尺寸>.<格式>），
+同一张图片的缩略图地址永远不变，可以按 immutable 长期缓存；
+重新上传会得到新的地址，不需要清理 CDN 或浏览器缓存。
+"""
+
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+from comments.thread_cache import invalidate_author_threads
+
+# 格式 -> (Pillow 格式名, 扩展名, 保存参数)
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 6}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+
+def thumbnail_name(digest, size, fmt):
+    extension = THUMBNAIL_FORMATS[fmt][1]
+    return f'avatars/thumbs/{digest[:2]}/{digest}-{size}.{extension}'
+
+
+def thumbnail_urls(digest):
+    """{'small': {'webp': url, 'jpeg': url}, ...}"""
+    return {
+        name: {fmt: default_storage.url(thumbnail_name(digest, size, fmt)) for fmt in THUMBNAIL_FORMATS}
+        for name, size in settings.AVATAR_THUMBNAIL_SIZES.items()
+    }
+
+
+def _square_rgb(data, max_size):
+    image = Image.open(io.BytesIO(data))
+    # JPEG 直接按接近目标的尺寸解码，避免完整解码大图
+    image.draft('RGB', (max_size * 2, max_size * 2))
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    return image.convert('RGB')
+
+
+def generate_thumbnails(profile):
+    """生成各尺寸的 WebP 与 JPEG 缩略图，返回内容哈希；已存在的文件不重复生成"""
+    with profile.avatar.open('rb') as avatar:
+        data = avatar.read()
+    digest = hashlib.sha256(data).hexdigest()[:32]
+
+    sizes = settings.AVATAR_THUMBNAIL_SIZES.values()
+    image = _square_rgb(data, max(sizes))
+    for size in sizes:
+        thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        for fmt, (pil_format, extension, options) in THUMBNAIL_FORMATS.items():
+            name = thumbnail_name(digest, size, fmt)
+            if default_storage.exists(name):
+                continue
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, pil_format, **options)
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    # 生成期间头像可能又被替换，只在原图未变时写入哈希
+    if type(profile).objects.filter(pk=profile.pk, avatar=profile.avatar.name).update(avatar_hash=digest):
+        # 评论线程缓存中保存了作者的头像地址
+        transaction.on_commit(lambda: invalidate_author_threads(profile.user_id))
+    return digest
@@ -1,7 +1,10 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm, SetPasswordForm
 from django.contrib.auth.models import User
+from django.db import transaction
+from comments.thread_cache import invalidate_author_threads
 from .models import UserProfile
+from .jobs import generate_avatar_thumbnails
 
 class UserRegistrationForm(UserCreationForm):
     """
@@ -62,7 +65,22 @@ class UserProfileForm(forms.ModelForm):
                 'rows': 3,
                 'placeholder': '请输入个人简介'
             }),
-        } 
+        }
+
+    def save(self, commit=True):
+        profile = super().save(commit=False)
+        avatar_changed = 'avatar' in self.changed_data
+        if avatar_changed:
+            # 新头像的缩略图由后台任务生成，完成前显示原图
+            profile.avatar_hash = ''
+        if commit:
+            profile.save()
+            if avatar_changed:
+                # 缩略图生成前评论中显示原图（或不显示头像）
+                transaction.on_commit(lambda: invalidate_author_threads(profile.user_id))
+            if avatar_changed and profile.avatar:
+                generate_avatar_thumbnails.delay(profile_id=profile.pk)
+        return profile
 
 class AdminApplyForm(forms.Form):
     answer = forms.CharField(label='管理员申请问题：公司创始人是谁？', max_length=100)
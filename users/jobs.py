@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.mail import send_mail
+from jobs.queue import job
+from .avatars import generate_thumbnails
+from .models import PasswordResetCode, UserProfile
+
+
+@job()
+def send_password_reset_code(code_id):
+    """
+    发送找回密码验证码邮件
+
+    任务参数只有验证码记录的 id，验证码本身不写入任务表（管理后台可以看到任务参数）。
+    重试时验证码已使用或已过期则不再发送。
+    """
+    record = PasswordResetCode.objects.select_related('user').filter(pk=code_id, is_used=False).first()
+    if record is None or record.is_expired or not record.user.email:
+        return
+    send_mail(
+        subject='TaskFlowPro 找回密码验证码',
+        message=(
+            f'您的验证码为：{record.code}\n'
+            f'有效期：{settings.PASSWORD_RESET_CODE_EXPIRE_MINUTES}分钟。\n'
+            '若非本人操作请忽略本邮件。'
+        ),
+        from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', None),
+        recipient_list=[record.user.email],
+        fail_silently=False,
+    )
+
+
+@job()
+def generate_avatar_thumbnails(profile_id):
+    """生成头像缩略图"""
+    profile = UserProfile.objects.filter(pk=profile_id).first()
+    if profile and profile.avatar:
+        generate_thumbnails(profile)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from users.avatars import generate_thumbnails
+from users.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = '为尚未生成缩略图的头像生成缩略图'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='重新检查所有头像（已存在的缩略图文件不会重复生成）')
+
+    def handle(self, *args, **options):
+        profiles = UserProfile.objects.exclude(avatar='').exclude(avatar__isnull=True)
+        if not options['all']:
+            profiles = profiles.filter(avatar_hash='')
+
+        done = failed = 0
+        for profile in profiles.only('id', 'avatar').iterator():
+            try:
+                generate_thumbnails(profile)
+                done += 1
+            except (OSError, ValueError) as exc:
+                failed += 1
+                self.stderr.write(f'{profile.avatar.name}: {exc}')
+        self.stdout.write(self.style.SUCCESS(f'已处理头像 {done} 个，失败 {failed} 个'))
@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from users.models import PasswordResetCode
+
+
+class Command(BaseCommand):
+    """
+    分批删除过期的找回密码验证码
+
+    按 expires_at 索引取一批主键再删除，每批是一个独立的短事务，
+    SQLite 上不会长时间持有写锁。已使用的验证码同样会在过期后被删除；
+    过期后仍保留 PASSWORD_RESET_CODE_RETENTION_HOURS 小时，供频率限制统计。
+    """
+    help = '分批删除已过期的找回密码验证码'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批删除的数量')
+        parser.add_argument('--sleep', type=float, default=0.1, help='每批之间暂停的秒数')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timezone.timedelta(hours=settings.PASSWORD_RESET_CODE_RETENTION_HOURS)
+        expired = PasswordResetCode.objects.filter(expires_at__lt=cutoff).order_by('expires_at')
+
+        total = 0
+        while True:
+            ids = list(expired.values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deleted, _ = PasswordResetCode.objects.filter(id__in=ids).delete()
+            total += deleted
+            if len(ids) < options['batch_size']:
+                break
+            time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f'已删除验证码 {total} 条'))
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("users", "0002_passwordresetcode"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="passwordresetcode",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="password_reset_codes",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="用户",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="passwordresetcode",
+            index=models.Index(
+                fields=["user", "-created_at"], name="users_passw_user_id_cc0237_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="passwordresetcode",
+            index=models.Index(
+                fields=["expires_at"], name="users_passw_expires_1b97a8_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_passwordresetcode_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="avatar_hash",
+            field=models.CharField(
+                blank=True, editable=False, max_length=32, verbose_name="头像内容哈希"
+            ),
+        ),
+    ]
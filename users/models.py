@@ -1,8 +1,10 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
+from .avatars import THUMBNAIL_FORMATS, thumbnail_urls
 
 class UserProfile(models.Model):
     """
@@ -17,6 +19,7 @@ class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     role = models.CharField(max_length=10, choices=USER_ROLES, default='member', verbose_name='用户角色')
     avatar = models.ImageField(upload_to='avatars/', null=True, blank=True, verbose_name='头像')
+    avatar_hash = models.CharField(max_length=32, blank=True, editable=False, verbose_name='头像内容哈希')
     bio = models.TextField(max_length=500, blank=True, verbose_name='个人简介')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
@@ -33,6 +36,14 @@ class UserProfile(models.Model):
     def is_admin(self):
         return self.role == 'admin'
 
+    @property
+    def avatar_thumbnails(self):
+        """各尺寸头像地址；缩略图尚未生成时退回原图，没有头像时为空"""
+        if self.avatar_hash:
+            return thumbnail_urls(self.avatar_hash)
+        url = self.avatar.url if self.avatar else ''
+        return {name: {fmt: url for fmt in THUMBNAIL_FORMATS} for name in settings.AVATAR_THUMBNAIL_SIZES}
+
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     """创建用户时自动创建用户档案"""
@@ -40,8 +51,10 @@ def create_user_profile(sender, instance, created, **kwargs):
         UserProfile.objects.create(user=instance)
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    """保存用户时自动保存用户档案"""
+def save_user_profile(sender, instance, update_fields=None, **kwargs):
+    """保存用户时自动保存用户档案（登录时只更新 last_login，不必保存档案）"""
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
     instance.profile.save()
 
 
@@ -49,7 +62,8 @@ class PasswordResetCode(models.Model):
     """
     找回密码邮箱验证码
     """
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='password_reset_codes', verbose_name='用户')
+    # 外键单列索引被下面以 user 开头的联合索引覆盖
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='password_reset_codes', verbose_name='用户', db_index=False)
     code = models.CharField(max_length=6, verbose_name='验证码')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     expires_at = models.DateTimeField(verbose_name='过期时间')
@@ -60,6 +74,10 @@ class PasswordResetCode(models.Model):
         verbose_name_plural = '找回密码验证码'
         indexes = [
             models.Index(fields=['user', 'code', 'is_used']),
+            # 频率限制：按用户取最近一条、统计最近一小时
+            models.Index(fields=['user', '-created_at']),
+            # 过期清理
+            models.Index(fields=['expires_at']),
         ]
         ordering = ['-created_at']
 
@@ -0,0 +1,148 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from projects.models import Project
+from tasks.models import Task, TaskQuerySet
+from tasks.signals import tasks_status_changed
+
+SCOPES = ('assigned', 'created', 'project')
+
+
+def _cache_key(user_id):
+    return f'dashboard_stats:{user_id}'
+
+
+def _week_end(now):
+    """本周日 24:00（本地时间）"""
+    local = timezone.localtime(now)
+    start_of_today = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    return start_of_today + timezone.timedelta(days=7 - local.weekday())
+
+
+def compute_dashboard_stats(user):
+    """
+    计算仪表板统计
+
+    一条聚合查询得到“我负责的 / 我创建的 / 我参与项目的”任务按状态、
+    优先级、逾期与本周到期的数量，另一条查询统计参与的项目数。
+    """
+    now = timezone.now()
+    member_project_ids = Project.objects.filter(is_active=True, members=user).values('id')
+    scopes = {
+        'assigned': Q(assignee=user),
+        'created': Q(creator=user),
+        'project': Q(project_id__in=member_project_ids),
+    }
+    is_open = Q(status__in=TaskQuerySet.OPEN_STATUSES)
+    buckets = {'total': Q()}
+    buckets.update({value: Q(status=value) for value, label in Task.STATUS_CHOICES})
+    buckets.update({value: Q(priority=value) for value, label in Task.PRIORITY_CHOICES})
+    buckets['overdue'] = is_open & Q(due_date__lt=now)
+    buckets['due_this_week'] = is_open & Q(due_date__gte=now, due_date__lt=_week_end(now))
+
+    aggregates = {
+        f'{scope}__{bucket}': Count('id', filter=scope_q & bucket_q)
+        for scope, scope_q in scopes.items()
+        for bucket, bucket_q in buckets.items()
+    }
+    row = Task.objects.filter(
+        Q(assignee=user) | Q(creator=user) | Q(project_id__in=member_project_ids)
+    ).aggregate(**aggregates)
+
+    stats = {scope: {bucket: row[f'{scope}__{bucket}'] for bucket in buckets} for scope in SCOPES}
+    stats['projects'] = Project.objects.filter(is_active=True, members=user).count()
+    return stats
+
+
+def get_dashboard_stats(user):
+    """读取缓存的仪表板统计，缺失时重新计算"""
+    return cache.get_or_set(
+        _cache_key(user.pk),
+        lambda: compute_dashboard_stats(user),
+        settings.DASHBOARD_STATS_CACHE_SECONDS,
+    )
+
+
+def invalidate_dashboard_stats(user_ids):
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if user_ids:
+        cache.delete_many([_cache_key(user_id) for user_id in user_ids])
+
+
+def _project_member_ids(project_ids):
+    return Project.members.through.objects.filter(project_id__in=project_ids).values_list('user_id', flat=True)
+
+
+def task_user_ids(tasks):
+    """
+    一批任务涉及的负责人、创建者与项目成员
+
+    每类各一条 DISTINCT 查询，结果规模取决于用户数而不是任务数，供批量 UPDATE 前后失效统计。
+    """
+    tasks = tasks.order_by()
+    user_ids = set(tasks.values_list('assignee_id', flat=True).distinct())
+    user_ids.update(tasks.values_list('creator_id', flat=True).distinct())
+    user_ids.update(_project_member_ids(tasks.values('project_id')).distinct())
+    return user_ids
+
+
+STATS_USER_FIELDS = ('assignee_id', 'creator_id', 'project_id')
+
+
+@receiver(pre_save, sender=Task)
+def remember_task_users(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    保存前记下原来的负责人、创建者与项目
+
+    重新分配或移动到其它项目后，原负责人、原项目成员的统计同样需要失效。
+    update_fields 不涉及这些字段时不必查询。
+    """
+    instance._stats_previous = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not {'assignee', 'creator', 'project', *STATS_USER_FIELDS} & set(update_fields):
+        return
+    instance._stats_previous = Task._base_manager.filter(pk=instance.pk).values_list(*STATS_USER_FIELDS).first()
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def task_changed(sender, instance, **kwargs):
+    """任务变化时失效负责人、创建者与项目成员的统计（保存时包括变化前的）"""
+    assignee_id, creator_id, project_id = getattr(instance, '_stats_previous', None) or (None, None, None)
+    invalidate_dashboard_stats([
+        instance.assignee_id, instance.creator_id, assignee_id, creator_id,
+        *_project_member_ids({instance.project_id, project_id} - {None}),
+    ])
+
+
+@receiver(tasks_status_changed)
+def tasks_bulk_changed(sender, task_ids, project_ids, **kwargs):
+    """批量更新状态后失效相关用户的统计"""
+    user_ids = set(_project_member_ids(project_ids))
+    for assignee_id, creator_id in Task.objects.filter(id__in=task_ids).values_list('assignee_id', 'creator_id'):
+        user_ids.update((assignee_id, creator_id))
+    invalidate_dashboard_stats(user_ids)
+
+
+@receiver(post_save, sender=Project)
+def project_changed(sender, instance, **kwargs):
+    """项目激活状态变化会影响成员的项目统计"""
+    invalidate_dashboard_stats(_project_member_ids([instance.pk]))
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def project_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """成员加入或离开项目"""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        # instance 为用户
+        invalidate_dashboard_stats([instance.pk])
+    elif action == 'pre_clear':
+        invalidate_dashboard_stats(_project_member_ids([instance.pk]))
+    else:
+        invalidate_dashboard_stats(pk_set or [])
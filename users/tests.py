@@ -1,3 +1,133 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job
+from projects.models import Project
+from tasks.models import Task
+from .jobs import send_password_reset_code
+from .models import PasswordResetCode
+from .stats import get_dashboard_stats
+
+
+class PasswordResetJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pass')
+        self.code = PasswordResetCode.objects.create(
+            user=self.user, code='123456', expires_at=timezone.now() + timezone.timedelta(minutes=10),
+        )
+
+    @override_settings(JOBS_EAGER=False)
+    def test_payload_does_not_contain_code(self):
+        job = send_password_reset_code.delay(code_id=self.code.pk)
+        self.assertEqual(Job.objects.get(pk=job.pk).payload, {'code_id': self.code.pk})
+
+    def test_sends_code_to_user_email(self):
+        send_password_reset_code(code_id=self.code.pk)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['alice@example.com'])
+        self.assertIn('123456', mail.outbox[0].body)
+
+    def test_used_or_expired_code_not_sent(self):
+        PasswordResetCode.objects.filter(pk=self.code.pk).update(is_used=True)
+        send_password_reset_code(code_id=self.code.pk)
+        expired = PasswordResetCode.objects.create(user=self.user, code='654321', expires_at=timezone.now())
+        send_password_reset_code(code_id=expired.pk)
+        self.assertEqual(mail.outbox, [])
+
+
+class DashboardStatsInvalidationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='pass')
+        cls.alice = User.objects.create_user('alice', password='pass')
+        cls.bob = User.objects.create_user('bob', password='pass')
+        cls.old_project = Project.objects.create(name='旧项目', owner=cls.owner)
+        cls.new_project = Project.objects.create(name='新项目', owner=cls.owner)
+        cls.old_member = User.objects.create_user('old_member', password='pass')
+        cls.old_project.members.add(cls.old_member)
+
+    def setUp(self):
+        cache.clear()
+        self.task = Task.objects.create(
+            title='任务', project=self.old_project, assignee=self.alice, creator=self.owner,
+        )
+
+    def test_reassign_invalidates_previous_assignee(self):
+        self.assertEqual(get_dashboard_stats(self.alice)['assigned']['total'], 1)
+        self.task.assignee = self.bob
+        self.task.save()
+        self.assertEqual(get_dashboard_stats(self.alice)['assigned']['total'], 0)
+        self.assertEqual(get_dashboard_stats(self.bob)['assigned']['total'], 1)
+
+    def test_move_invalidates_previous_project_members(self):
+        self.assertEqual(get_dashboard_stats(self.old_member)['project']['total'], 1)
+        self.task.project = self.new_project
+        self.task.save()
+        self.assertEqual(get_dashboard_stats(self.old_member)['project']['total'], 0)
+
+    def test_update_fields_without_users_skips_lookup(self):
+        self.task.status = 'done'
+        with self.assertNumQueries(2):
+            # UPDATE 与失效时查询项目成员，不读取旧值
+            self.task.save(update_fields=['status'])
+
+
+@override_settings(PASSWORD_RESET_CODE_RETENTION_HOURS=24)
+class PurgePasswordResetCodesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('reset', password='pass')
+        now = timezone.now()
+        self.old = timezone.timedelta(hours=25)
+
+        def create(expires_at, **kwargs):
+            return PasswordResetCode.objects.create(user=self.user, code='123456', expires_at=expires_at, **kwargs)
+
+        # 已过期但仍在保留期内的验证码用于频率限制，不能删除
+        self.kept = [
+            create(now + timezone.timedelta(minutes=10)),
+            create(now - timezone.timedelta(hours=23)),
+            create(now - timezone.timedelta(hours=23), is_used=True),
+        ]
+        self.create = create
+        self.now = now
+
+    def purge(self, batch_size):
+        out = StringIO()
+        with mock.patch('users.management.commands.purge_password_reset_codes.time.sleep') as sleep:
+            call_command('purge_password_reset_codes', batch_size=batch_size, sleep=0, stdout=out)
+        return out.getvalue(), sleep.call_count
+
+    def test_only_codes_past_retention_deleted(self):
+        self.create(self.now - self.old)
+        self.create(self.now - self.old, is_used=True)
+        output, _ = self.purge(batch_size=1000)
+        self.assertIn('已删除验证码 2 条', output)
+        self.assertQuerysetEqual(
+            PasswordResetCode.objects.order_by('pk'), [code.pk for code in self.kept], transform=lambda code: code.pk
+        )
+
+    def test_batching_stops_on_short_batch(self):
+        for _ in range(5):
+            self.create(self.now - self.old)
+        # 2 + 2 + 1：最后一批不足 batch_size，不再查询也不再暂停
+        with self.assertNumQueries(6):
+            output, sleeps = self.purge(batch_size=2)
+        self.assertIn('已删除验证码 5 条', output)
+        self.assertEqual(sleeps, 2)
+        self.assertEqual(PasswordResetCode.objects.count(), len(self.kept))
+
+    def test_batching_with_exact_multiple(self):
+        for _ in range(4):
+            self.create(self.now - self.old)
+        # 2 + 2 之后还要再查一次才能确认没有剩余
+        with self.assertNumQueries(5):
+            output, sleeps = self.purge(batch_size=2)
+        self.assertIn('已删除验证码 4 条', output)
+        self.assertEqual(sleeps, 2)
@@ -9,10 +9,11 @@ from .forms import UserRegistrationForm, UserLoginForm, UserProfileForm, AdminAp
 from .models import UserProfile
 from django.utils import timezone
 from django.contrib.auth.models import User
-from django.core.mail import send_mail
 from django.conf import settings
 from .forms import PasswordResetRequestForm, PasswordResetConfirmForm
 from .models import PasswordResetCode
+from .stats import get_dashboard_stats
+from .jobs import send_password_reset_code
 import random
 
 def register_view(request):
@@ -90,10 +91,17 @@ def dashboard_view(request):
     用户仪表板视图
     """
     user = request.user
+    stats = get_dashboard_stats(user)
     context = {
         'user': user,
-        'total_projects': user.projects.count() if hasattr(user, 'projects') else 0,
-        'total_tasks': user.tasks.count() if hasattr(user, 'tasks') else 0,
+        'stats': stats,
+        'stats_rows': [
+            ('我负责的', stats['assigned']),
+            ('我创建的', stats['created']),
+            ('我参与的项目', stats['project']),
+        ],
+        'total_projects': stats['projects'],
+        'total_tasks': stats['assigned']['total'],
     }
     return render(request, 'users/dashboard.html', context)
 
@@ -150,19 +158,9 @@ def forgot_password_request_view(request):
             # 生成6位数字验证码
             code = f"{random.randint(0, 999999):06d}"
             expires_at = timezone.now() + timezone.timedelta(minutes=settings.PASSWORD_RESET_CODE_EXPIRE_MINUTES)
-            PasswordResetCode.objects.create(user=user, code=code, expires_at=expires_at)
-            # 发送邮件
-            send_mail(
-                subject='TaskFlowPro 找回密码验证码',
-                message=(
-                    f'您的验证码为：{code}\n'
-                    f'有效期：{settings.PASSWORD_RESET_CODE_EXPIRE_MINUTES}分钟。\n'
-                    '若非本人操作请忽略本邮件。'
-                ),
-                from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', None),
-                recipient_list=[email],
-                fail_silently=False,
-            )
+            reset_code = PasswordResetCode.objects.create(user=user, code=code, expires_at=expires_at)
+            # 发送邮件（后台任务，失败时自动重试）
+            send_password_reset_code.delay(code_id=reset_code.pk)
             messages.success(request, '验证码已发送到邮箱，请在有效期内完成验证。')
             request.session['password_reset_user_id'] = user.id
             request.session['password_reset_email'] = email